@@ -7,33 +7,46 @@ v2: Developer Agent 对外暴露，QA Agent 在 Workflow 中后台运行
     CLI 模式使用完整 Workflow（Developer + QA）。
 """
 import os
-import yaml
+from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
 from agno.agent import Agent
-from agno.models.openai.like import OpenAILike
 from agno.tools.shell import ShellTools
 from agno.tools.file import FileTools
 from agno.os import AgentOS
 from agno.db.sqlite import SqliteDb
+from fastapi import Response
 
 # ---------------------------------------------------------------------------
 # 配置
 # ---------------------------------------------------------------------------
 load_dotenv(override=True)
 
+# agents 包内模块在导入时读取环境变量，需在 load_dotenv 之后导入
+from agents.catalog import skill_catalog
+from agents.history import HISTORY_TOKEN_BUDGET
+from agents.llm import create_model
+from agents.metrics import PROMETHEUS_CONTENT_TYPE, metrics_registry, record_agent_tools
+from agents.registry import registry
+
 API_KEY = os.getenv("OPENAI_API_KEY", "")
 BASE_URL = os.getenv("OPENAI_BASE_URL", "https://kspmas.ksyun.com/v1")
 MODEL_ID = os.getenv("OPENAI_MODEL", "kimi-k2.5")
 HOST = os.getenv("AGENT_HOST", "0.0.0.0")
 PORT = int(os.getenv("AGENT_PORT", "7777"))
+SKILL_TOP_K = int(os.getenv("SKILL_TOP_K", "5"))
+# 多轮对话历史按 token 预算压缩（AGENT_HISTORY_TOKEN_BUDGET，见 agents.history），
+# 运行数上限只作为从会话中取历史的兜底
+HISTORY_MAX_RUNS = int(os.getenv("AGENT_HISTORY_MAX_RUNS", "20"))
+# Prometheus 指标端点路径（AgentOS 自带的 /metrics 是 JSON 格式的会话统计，不能占用）
+METRICS_PATH = os.getenv("AGENT_METRICS_PATH", "/metrics/prometheus")
 
 BASE_DIR = Path(__file__).resolve().parent
 PROMPTS_DIR = BASE_DIR / "prompts"
 SKILLS_DIR = BASE_DIR / "skills"
 WORKSPACE_DIR = BASE_DIR / "workspace"
-DB_DIR = BASE_DIR / "tmp"
+DB_DIR = Path(os.getenv("AGENT_DB_DIR", str(BASE_DIR / "tmp")))
 
 # 确保目录存在
 WORKSPACE_DIR.mkdir(parents=True, exist_ok=True)
@@ -44,48 +57,69 @@ DB_DIR.mkdir(parents=True, exist_ok=True)
 # ---------------------------------------------------------------------------
 
 def load_system_prompt() -> str:
-    """加载系统提示词"""
+    """加载系统提示词（与 Developer Agent 共享注册表缓存）"""
     path = PROMPTS_DIR / "system_prompt.txt"
-    return path.read_text(encoding="utf-8") if path.exists() else ""
+    return registry.read_text(path) if path.exists() else ""
+
+
+def format_relevant_skills(query: str, k: int | None = None) -> str:
+    """从 Skill 目录索引中检索与用户需求最相关的 top-k 模板"""
+    hits = skill_catalog.search(query, k or SKILL_TOP_K)
+    return "\n".join(
+        f"- {h.skill.id}: {h.skill.name} — {h.skill.description}" for h in hits
+    )
 
 
-def load_all_skills_info() -> str:
-    """加载所有 Skill 信息，拼接到 instructions 中"""
-    if not SKILLS_DIR.exists():
-        return ""
-    parts = []
-    for f in SKILLS_DIR.glob("*.yaml"):
-        with open(f, "r", encoding="utf-8") as fh:
-            data = yaml.safe_load(fh)
-            parts.append(f"- {data.get('id', f.stem)}: {data.get('name', '')} — {data.get('description', '')}")
-    return "\n".join(parts)
+def build_turn_context(message: str) -> str:
+    """
+    每轮附加上下文：与本次用户消息最相关的模板以及当前时间。
+    由模型层只追加到发给模型的本轮用户消息末尾，不写入会话历史；
+    system_message 与历史消息因此保持字节级稳定，多轮对话的前缀（含历史）都能命中提示词缓存。
+    system_message 中也不罗列整个模板目录，目录增长时提示词长度保持不变。
+    """
+    skills_info = format_relevant_skills(message)
+    return (
+        "\n\n<RELEVANT_SKILLS>\n"
+        f"{skills_info if skills_info else '（没有匹配的模板，请自由发挥）'}\n"
+        "</RELEVANT_SKILLS>"
+        "\n\n<RUNTIME_CONTEXT>\n"
+        f"- current_time: {datetime.now().astimezone().strftime('%Y-%m-%d %H:%M %Z')}\n"
+        "</RUNTIME_CONTEXT>"
+    )
 
 
 def build_system_message() -> str:
-    """构建完整的 system_message：系统提示词 + 运行时上下文 + Skills 信息"""
+    """构建完整的 system_message：系统提示词 + 运行时上下文（注册表缓存）"""
+    def _load():
+        return _assemble_system_message(), [PROMPTS_DIR / "system_prompt.txt"]
+
+    return registry.get("agentos:system-message", _load)
+
+
+def _assemble_system_message() -> str:
     # 加载宪法级系统提示词
     base_prompt = load_system_prompt()
 
     # 拼接运行时上下文
-    skills_info = load_all_skills_info()
-
-    runtime_section = f"""
+    # 注意：这里只能放跨请求不变的内容（不插值路径、时间等），保证 system_message
+    # 字节级稳定，命中服务端提示词前缀缓存；易变信息由 build_turn_context 附在本轮用户消息末尾
+    runtime_section = """
 
 ====================
 运行时上下文（AgentOS 模式）
 ====================
-- 工作目录: {WORKSPACE_DIR}
+- 工作目录: 文件与命令工具的根目录即工作目录，请使用相对路径
 - 每次生成任务请先在工作目录下创建一个子目录作为项目根目录
 - 默认技术栈: Vite + React + Tailwind CSS
 - 包管理器: npm
 - 构建命令: npm run build
 
 可用模板（Skills）:
-{skills_info if skills_info else "（暂无模板）"}
+- 与本次需求最相关的模板会以 <RELEVANT_SKILLS> 区块附在用户消息末尾
 
 用户交互流程:
 1. 用户描述需求（如：帮我做个饭店菜单网页）
-2. 你根据需求匹配合适的模板，或自由发挥
+2. 你根据需求从 <RELEVANT_SKILLS> 中匹配合适的模板，或自由发挥
 3. 按照系统提示词中的四阶段工作流执行
 4. 必须使用工具（FileTools / ShellTools）真正创建文件和执行命令
 5. 禁止跳过工具调用直接编造交付 JSON
@@ -102,10 +136,10 @@ def create_agent(name: str, model_id: str, description: str) -> Agent:
     """工厂函数：创建指定模型的 Web Builder Agent"""
     return Agent(
         name=name,
-        model=OpenAILike(
-            id=model_id,
-            api_key=API_KEY,
-            base_url=BASE_URL,
+        model=create_model(
+            model_id, API_KEY, BASE_URL,
+            history_token_budget=HISTORY_TOKEN_BUDGET,
+            turn_context=build_turn_context,
         ),
         description=description,
         system_message=build_system_message(),
@@ -113,9 +147,9 @@ def create_agent(name: str, model_id: str, description: str) -> Agent:
             ShellTools(base_dir=WORKSPACE_DIR),
             FileTools(base_dir=WORKSPACE_DIR),
         ],
-        add_datetime_to_context=True,
+        post_hooks=[record_agent_tools],
         add_history_to_context=True,
-        num_history_runs=5,
+        num_history_runs=HISTORY_MAX_RUNS,
         markdown=True,
         debug_mode=True,
     )
@@ -150,6 +184,12 @@ agent_os = AgentOS(
 )
 app = agent_os.get_app()
 
+
+@app.get(METRICS_PATH, include_in_schema=False)
+def prometheus_metrics() -> Response:
+    """Prometheus 文本格式的进程级指标：阶段耗时、模型延迟与 token、工具调用"""
+    return Response(metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     if not API_KEY or API_KEY == "your-api-key-here":
         print("[错误] 请先配置 OPENAI_API_KEY")
@@ -161,6 +201,7 @@ if __name__ == "__main__":
     print(f"  Web Builder Agent v2 - AgentOS 服务")
     print(f"  模式: Developer Agent (AgentOS) + QA Agent (后台)")
     print(f"  后端地址: http://{HOST}:{PORT}")
+    print(f"  指标端点: http://{HOST}:{PORT}{METRICS_PATH}")
     print(f"  前端连接: 在 AgentUI 中输入 http://<你的VPS公网IP>:{PORT}")
     print(f"{'='*60}\n")
 
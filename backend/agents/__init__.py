@@ -1,6 +1,6 @@
 """
 Web Builder Agent - Agents 模块
-导出 Developer Agent、QA Agent 和 Workflow
+导出 Developer Agent、QA Agent、Workflow 与并发调度器
 """
 from agents.developer import (
     create_developer_agent,
@@ -14,11 +14,15 @@ from agents.developer import (
 )
 from agents.qa import create_qa_agent
 from agents.workflow import WebBuilderWorkflow
+from agents.scheduler import WorkflowScheduler, WorkflowJob, JobResult
 
 __all__ = [
     "create_developer_agent",
     "create_qa_agent",
     "WebBuilderWorkflow",
+    "WorkflowScheduler",
+    "WorkflowJob",
+    "JobResult",
     "load_skill",
     "list_skills",
     "build_user_message",
@@ -0,0 +1,239 @@
+"""
+Web Builder Agent - 批量生成
+读取 JSONL / YAML 任务清单，通过进程池并行执行 WebBuilderWorkflow：
+1. 每个任务在独立的工作进程中运行，互不共享 Agent / 模型实例
+2. 每个任务的交付 JSON（_build_delivery_json 的输出）写入 <output_dir>/<run_id>.json
+3. 全部结束后汇总吞吐量、p50/p95 耗时、通过/失败分布与 QA 评分分布
+
+任务清单格式：
+  JSONL: 每行一个 {"skill_id": "...", "user_input": "...", "run_id": "..."}（后两项可选）
+  YAML : 任务列表，或 {"jobs": [...]}，字段同上
+"""
+import json
+import math
+import os
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import yaml
+from agno.utils.log import logger
+
+from agents.scheduler import JobResult, WorkflowJob
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
+BATCH_OUTPUT_DIR = BASE_DIR / "artifacts" / "batch"
+DEFAULT_BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+
+# QA 评分分布的分段: (标签, 下界, 上界)，左闭右开
+SCORE_BUCKETS = [("0-59", 0, 60), ("60-79", 60, 80), ("80-89", 80, 90), ("90-100", 90, 101)]
+
+
+# ---------------------------------------------------------------------------
+# 任务清单
+# ---------------------------------------------------------------------------
+
+def load_batch_manifest(path: str | Path) -> list[WorkflowJob]:
+    """读取 JSONL / YAML 任务清单"""
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"任务清单不存在: {path}")
+
+    text = path.read_text(encoding="utf-8")
+    if path.suffix in (".yaml", ".yml"):
+        data = yaml.safe_load(text) or []
+        entries = data.get("jobs", []) if isinstance(data, dict) else data
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    jobs = []
+    for i, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict) or not entry.get("skill_id"):
+            raise ValueError(f"任务清单第 {i} 项缺少 skill_id: {entry}")
+        job = WorkflowJob(skill_id=entry["skill_id"], user_input=entry.get("user_input", ""))
+        if entry.get("run_id"):
+            job.run_id = str(entry["run_id"])
+        jobs.append(job)
+
+    run_ids = Counter(j.run_id for j in jobs)
+    duplicated = [r for r, n in run_ids.items() if n > 1]
+    if duplicated:
+        raise ValueError(f"任务清单中 run_id 重复: {', '.join(duplicated)}")
+    return jobs
+
+
+# ---------------------------------------------------------------------------
+# 工作进程
+# ---------------------------------------------------------------------------
+
+def _run_job(job: WorkflowJob, output_dir: str) -> JobResult:
+    """在工作进程中执行单个任务，并把交付 JSON 写入 output_dir"""
+    # 延迟导入：Workflow 及其依赖只在工作进程内加载
+    from agno.workflow import RunEvent
+    from agents.workflow import WebBuilderWorkflow
+
+    start = time.perf_counter()
+    try:
+        workflow = WebBuilderWorkflow(session_id=f"batch-{job.run_id}")
+        last = None
+        for response in workflow.run(
+            skill_id=job.skill_id, user_input=job.user_input, run_id=job.run_id
+        ):
+            if response.event == RunEvent.workflow_completed:
+                last = response
+
+        delivery = json.loads(last.content) if last is not None and last.content else None
+        if delivery is not None:
+            path = Path(output_dir) / f"{job.run_id}.json"
+            path.write_text(json.dumps(delivery, ensure_ascii=False, indent=2), encoding="utf-8")
+        return JobResult(
+            run_id=job.run_id,
+            skill_id=job.skill_id,
+            status=(delivery or {}).get("status", "fail"),
+            delivery=delivery,
+            duration=time.perf_counter() - start,
+        )
+    except Exception as e:
+        return JobResult(
+            run_id=job.run_id,
+            skill_id=job.skill_id,
+            status="error",
+            error=f"{type(e).__name__}: {e}",
+            duration=time.perf_counter() - start,
+        )
+
+
+# ---------------------------------------------------------------------------
+# 汇总报告
+# ---------------------------------------------------------------------------
+
+def _percentile(values: list[float], pct: float) -> float:
+    """最近秩法百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass
+class BatchReport:
+    """批量运行汇总"""
+    total: int = 0
+    wall_time: float = 0.0
+    throughput: float = 0.0  # 任务/分钟
+    p50: float = 0.0
+    p95: float = 0.0
+    statuses: dict[str, int] = field(default_factory=dict)
+    qa_passed: int = 0
+    qa_failed: int = 0
+    qa_missing: int = 0
+    score_buckets: dict[str, int] = field(default_factory=dict)
+    score_mean: float | None = None
+
+    @classmethod
+    def from_results(cls, results: list[JobResult], wall_time: float) -> "BatchReport":
+        durations = [r.duration for r in results]
+        qa_blocks = [(r.delivery or {}).get("qa") for r in results]
+        scores = [qa["score"] for qa in qa_blocks if qa]
+
+        buckets = {label: 0 for label, _, _ in SCORE_BUCKETS}
+        for score in scores:
+            for label, lo, hi in SCORE_BUCKETS:
+                if lo <= score < hi:
+                    buckets[label] += 1
+                    break
+
+        return cls(
+            total=len(results),
+            wall_time=wall_time,
+            throughput=len(results) / wall_time * 60 if wall_time > 0 else 0.0,
+            p50=_percentile(durations, 50),
+            p95=_percentile(durations, 95),
+            statuses=dict(Counter(r.status for r in results)),
+            qa_passed=sum(1 for qa in qa_blocks if qa and qa.get("passed")),
+            qa_failed=sum(1 for qa in qa_blocks if qa and not qa.get("passed")),
+            qa_missing=sum(1 for qa in qa_blocks if not qa),
+            score_buckets=buckets,
+            score_mean=sum(scores) / len(scores) if scores else None,
+        )
+
+    def format(self) -> str:
+        lines = [
+            f"任务数: {self.total} | 总耗时: {self.wall_time:.1f}s | 吞吐量: {self.throughput:.2f} 任务/分钟",
+            f"单任务耗时: p50={self.p50:.1f}s | p95={self.p95:.1f}s",
+            "运行状态: " + ", ".join(f"{k}={v}" for k, v in sorted(self.statuses.items())),
+            f"QA 结果: 通过={self.qa_passed} | 未通过={self.qa_failed} | 无报告={self.qa_missing}",
+            "QA 评分分布: " + ", ".join(f"[{k}]={v}" for k, v in self.score_buckets.items()),
+        ]
+        if self.score_mean is not None:
+            lines.append(f"QA 平均分: {self.score_mean:.1f}")
+        return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# 入口
+# ---------------------------------------------------------------------------
+
+def run_batch(
+    jobs: list[WorkflowJob],
+    workers: int | None = None,
+    output_dir: str | Path | None = None,
+) -> tuple[list[JobResult], BatchReport]:
+    """
+    通过进程池并行执行一批任务。
+
+    Args:
+        jobs: 任务列表
+        workers: 工作进程数（默认读取 BATCH_WORKERS，缺省 4）
+        output_dir: 交付 JSON 输出目录（默认 artifacts/batch/<batch_id>）
+
+    Returns:
+        (按提交顺序排列的结果列表, 汇总报告)
+    """
+    workers = workers or DEFAULT_BATCH_WORKERS
+    if workers < 1:
+        raise ValueError(f"workers 必须 >= 1: {workers}")
+    output_dir = Path(output_dir or BATCH_OUTPUT_DIR / uuid.uuid4().hex[:8])
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"[Batch] 开始批量生成 | 任务数={len(jobs)} | workers={workers} | 输出={output_dir}")
+    start = time.perf_counter()
+    results: dict[str, JobResult] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_run_job, job, str(output_dir)): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # 工作进程异常退出（如被 OOM 杀掉）时 future 本身抛错
+                result = JobResult(
+                    run_id=job.run_id,
+                    skill_id=job.skill_id,
+                    status="error",
+                    error=f"{type(e).__name__}: {e}",
+                )
+            results[job.run_id] = result
+            logger.info(
+                f"[Batch] 任务结束 ({len(results)}/{len(jobs)}) | run_id={result.run_id} | "
+                f"status={result.status} | {result.duration:.1f}s"
+            )
+
+    ordered = [results[job.run_id] for job in jobs]
+    report = BatchReport.from_results(ordered, time.perf_counter() - start)
+
+    summary = {
+        "report": asdict(report),
+        "jobs": [
+            {k: v for k, v in asdict(r).items() if k != "delivery"} for r in ordered
+        ],
+    }
+    (output_dir / "summary.json").write_text(
+        json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    return ordered, report
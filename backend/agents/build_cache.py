@@ -0,0 +1,171 @@
+"""
+Web Builder Agent - 构建结果缓存
+npm run build 会在 Developer 自检、Phase 3 修复后以及 QA 核查时反复执行，
+而两次构建之间源码往往没有变化。
+
+缓存以「源码指纹」为键（workdir 内容哈希清单 + 依赖指纹，跳过 node_modules / dist）：
+  <BUILD_CACHE_DIR>/<key>/result.json   退出码、日志摘要、原始耗时
+  <BUILD_CACHE_DIR>/<key>/dist/         构建产物
+命中时直接恢复 dist/ 并返回记录的结果，不再调用 vite / tsc。
+
+只缓存成功的构建：失败往往由依赖未装好等环境因素导致，源码不变时也可能在下一次成功。
+淘汰：超过 BUILD_CACHE_MAX_AGE_DAYS 未命中的条目失效；总大小超过 BUILD_CACHE_MAX_MB 时按最近使用时间淘汰
+（每次写入新条目后执行）。
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from agno.utils.log import logger
+
+from agents.deps_cache import dependency_key
+from agents.manifest import build_manifest
+from agents.shell_tools import log_path_for, run_logged
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
+BUILD_CACHE_DIR = Path(os.getenv("BUILD_CACHE_DIR", str(BASE_DIR / "tmp" / "build_cache")))
+BUILD_CACHE_ENABLED = os.getenv("BUILD_CACHE", "true").lower() == "true"
+BUILD_CACHE_MAX_BYTES = int(float(os.getenv("BUILD_CACHE_MAX_MB", "1024")) * 1024 ** 2)
+BUILD_CACHE_MAX_AGE = float(os.getenv("BUILD_CACHE_MAX_AGE_DAYS", "7")) * 86400
+BUILD_TIMEOUT = 300
+
+# 不影响构建结果的文件（构建副产物、文档），不计入源码指纹
+KEY_IGNORED_SUFFIXES = {".tsbuildinfo", ".md"}
+
+
+@dataclass
+class BuildResult:
+    """一次 npm run build 的结果"""
+    exit_code: int
+    log_summary: str
+    duration: float
+    cached: bool = False
+    key: str | None = None
+    log_file: str | None = None  # 本次构建的完整日志（相对 workdir；缓存命中时为 None）
+
+
+def source_key(workdir: str | Path) -> str | None:
+    """计算 workdir 的源码指纹；没有 package.json 时返回 None"""
+    deps = dependency_key(workdir)
+    if deps is None:
+        return None
+    digest = hashlib.sha256(deps.encode("utf-8"))
+    for rel, file_hash in build_manifest(workdir).items():
+        if Path(rel).suffix in KEY_IGNORED_SUFFIXES:
+            continue
+        digest.update(f"{rel}\0{file_hash}\n".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def _restore(entry: Path, workdir: Path) -> BuildResult:
+    record = json.loads((entry / "result.json").read_text(encoding="utf-8"))
+    os.utime(entry / "result.json")  # 记录最近使用时间，供 LRU 淘汰
+    dist = workdir / "dist"
+    if dist.exists():
+        shutil.rmtree(dist)
+    if (entry / "dist").is_dir():
+        shutil.copytree(entry / "dist", dist, symlinks=True)
+    return BuildResult(
+        exit_code=record["exit_code"],
+        log_summary=record["log_summary"],
+        duration=record["duration"],
+        cached=True,
+        key=entry.name,
+    )
+
+
+def _store(result: BuildResult, workdir: Path) -> None:
+    entry = BUILD_CACHE_DIR / result.key
+    if entry.exists():
+        return
+    # 先写临时目录再整体 rename，避免并发写入同一个键时留下不完整条目
+    tmp = BUILD_CACHE_DIR / f".{result.key}.{uuid.uuid4().hex[:8]}"
+    try:
+        tmp.mkdir(parents=True)
+        if (workdir / "dist").is_dir():
+            shutil.copytree(workdir / "dist", tmp / "dist", symlinks=True)
+        (tmp / "result.json").write_text(
+            json.dumps(asdict(result), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        os.rename(tmp, entry)
+        logger.info(f"[BuildCache] 写入缓存 | key={result.key}")
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+    evict()
+
+
+def _entry_size(entry: Path) -> int:
+    size = 0
+    for root, _, files in os.walk(entry):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return size
+
+
+def evict(max_bytes: int = BUILD_CACHE_MAX_BYTES, max_age: float = BUILD_CACHE_MAX_AGE) -> int:
+    """删除过期条目，总大小超出上限时按最近使用时间从旧到新删除，返回删除的条目数"""
+    if not BUILD_CACHE_DIR.exists():
+        return 0
+    now = time.time()
+    entries, removed, total = [], 0, 0
+    for record in BUILD_CACHE_DIR.glob("*/result.json"):
+        try:
+            last_used = record.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        entry = record.parent
+        if now - last_used > max_age:
+            shutil.rmtree(entry, ignore_errors=True)
+            removed += 1
+            continue
+        size = _entry_size(entry)
+        entries.append((last_used, size, entry))
+        total += size
+    for _, size, entry in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+        removed += 1
+    if removed:
+        logger.info(f"[BuildCache] 淘汰 {removed} 个条目 | 剩余={total / 1024 ** 2:.1f}MB")
+    return removed
+
+
+def run_build(workdir: str | Path) -> BuildResult:
+    """
+    在 workdir 中执行 npm run build；源码指纹命中缓存时直接返回记录的结果并恢复 dist/。
+    """
+    workdir = Path(workdir)
+    key = source_key(workdir) if BUILD_CACHE_ENABLED else None
+    if key and (BUILD_CACHE_DIR / key / "result.json").exists():
+        try:
+            result = _restore(BUILD_CACHE_DIR / key, workdir)
+            logger.info(f"[BuildCache] 命中缓存 | key={key} | workdir={workdir}")
+            return result
+        except OSError as e:
+            # 条目在恢复过程中被淘汰，重新构建
+            logger.warning(f"[BuildCache] 恢复缓存失败 | key={key} | {e}")
+
+    logger.info(f"[BuildCache] npm run build | cwd={workdir}")
+    run = run_logged(["npm", "run", "build"], workdir, log_path_for(workdir, "npm-build"), BUILD_TIMEOUT)
+    result = BuildResult(
+        exit_code=run.exit_code,
+        log_summary=run.details().strip(),
+        duration=run.duration,
+        key=key,
+        log_file=str(run.log_path.relative_to(workdir)),
+    )
+    if key and result.exit_code == 0:
+        _store(result, workdir)
+    return result
@@ -0,0 +1,262 @@
+"""
+Web Builder Agent - 批量文件工具
+用 FileTools 创建 15~25 个文件的项目需要同样数量的工具调用，每次都是一轮完整的模型往返。
+BulkFileTools 为 Developer 提供：
+1. write_files：一次调用写入多个文件（Phase 2 生成项目）
+2. apply_patch：应用多文件 unified diff（Phase 3 修复），支持新增 / 删除 / 重命名文件，
+   hunk 行号偏移时按上下文就近匹配
+
+所有路径都必须位于绑定的 workdir 内；任一文件校验或 hunk 匹配失败时整批不落盘。
+"""
+import os
+import re
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from agno.tools import Toolkit
+from agno.utils.log import logger
+
+
+BULK_MAX_FILES = 100
+BULK_MAX_FILE_BYTES = 1024 * 1024
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchError(ValueError):
+    """补丁无法解析或无法应用"""
+
+
+@dataclass
+class FilePatch:
+    """unified diff 中一个文件的改动"""
+    old_path: str | None  # None 表示新增文件
+    new_path: str | None  # None 表示删除文件
+    hunks: list[tuple[int, list[str]]] = field(default_factory=list)  # (旧文件起始行, hunk 行)
+
+    @property
+    def path(self) -> str:
+        return self.new_path or self.old_path
+
+
+def _strip_prefix(raw: str) -> str | None:
+    path = raw.split("\t")[0].strip()
+    if path == "/dev/null":
+        return None
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    return path
+
+
+def parse_patch(patch: str) -> list[FilePatch]:
+    """解析多文件 unified diff"""
+    lines = patch.splitlines()
+    files: list[FilePatch] = []
+    current: FilePatch | None = None
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+            current = FilePatch(_strip_prefix(line[4:]), _strip_prefix(lines[i + 1][4:]))
+            if current.old_path is None and current.new_path is None:
+                raise PatchError(f"第 {i + 1} 行: 新旧路径不能都是 /dev/null")
+            files.append(current)
+            i += 2
+            continue
+        match = _HUNK_RE.match(line)
+        if match:
+            if current is None:
+                raise PatchError(f"第 {i + 1} 行: hunk 之前缺少 ---/+++ 文件头")
+            body = []
+            i += 1
+            # 不依赖 hunk 头里的行数（模型生成的补丁经常算错），读到下一个 hunk / 文件头为止
+            while i < len(lines):
+                nxt = lines[i]
+                if nxt.startswith("@@") or nxt.startswith("diff --git"):
+                    break
+                if nxt.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+                    break
+                if not nxt.startswith("\\"):  # "\ No newline at end of file"
+                    body.append(nxt)
+                i += 1
+            # 文件之间的空行不属于 hunk；hunk 内的空行视为被去掉了行首空格的上下文行
+            while body and body[-1] == "":
+                body.pop()
+            body = [l if l[:1] in (" ", "-", "+") else " " + l for l in body]
+            current.hunks.append((int(match.group(1)), body))
+            continue
+        i += 1
+    if not files:
+        raise PatchError("没有找到任何文件改动（需要 --- / +++ 文件头）")
+    return files
+
+
+def _find(lines: list[str], needle: list[str], hint: int) -> int:
+    """从 hint 开始向两侧搜索 needle 的位置；先精确匹配，再忽略行尾空白匹配"""
+    hint = min(max(hint, 0), len(lines) - len(needle))
+    if not needle:
+        return hint
+    for normalize in (lambda s: s, lambda s: s.rstrip()):
+        target = [normalize(l) for l in needle]
+        for delta in range(len(lines) + 1):
+            for pos in (hint - delta, hint + delta) if delta else (hint,):
+                if 0 <= pos <= len(lines) - len(needle) and [
+                    normalize(l) for l in lines[pos:pos + len(needle)]
+                ] == target:
+                    return pos
+    return -1
+
+
+def apply_hunks(original: str, hunks: list[tuple[int, list[str]]], path: str) -> str:
+    """把一个文件的全部 hunk 应用到原文"""
+    lines = original.split("\n")
+    trailing_newline = bool(lines) and lines[-1] == ""
+    if trailing_newline:
+        lines.pop()
+    offset = 0
+    for n, (start, body) in enumerate(hunks, 1):
+        old = [l[1:] for l in body if l[0] in (" ", "-")]
+        new = [l[1:] for l in body if l[0] in (" ", "+")]
+        pos = _find(lines, old, max(start - 1, 0) + offset)
+        if pos < 0:
+            raise PatchError(f"{path}: 第 {n} 个 hunk 的上下文与文件内容不匹配")
+        lines[pos:pos + len(old)] = new
+        offset = pos - max(start - 1, 0) + len(new) - len(old)
+    return "\n".join(lines) + ("\n" if trailing_newline or not original else "")
+
+
+def _atomic_write(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class BulkFileTools(Toolkit):
+    """限定在 base_dir 内的批量写入 / 补丁工具"""
+
+    def __init__(self, base_dir: str | Path, **kwargs):
+        self.base_dir = Path(base_dir)
+        super().__init__(
+            name="bulk_file_tools",
+            tools=[self.write_files, self.apply_patch],
+            instructions=(
+                "创建项目文件时，用 write_files 一次写入多个文件（每次可写入一批相关文件），"
+                "不要逐个调用 save_file；修改已有文件时，优先用 apply_patch 提交一份多文件 unified diff。"
+            ),
+            add_instructions=True,
+            **kwargs,
+        )
+
+    def _resolve(self, rel: str) -> Path:
+        """把相对路径解析到 base_dir 内；越界、绝对路径时抛出 ValueError"""
+        if not rel or Path(rel).is_absolute():
+            raise ValueError(f"路径必须是相对工作目录的路径: {rel!r}")
+        base = self.base_dir.resolve()
+        path = (base / rel).resolve()
+        if path == base or not path.is_relative_to(base):
+            raise ValueError(f"路径超出工作目录: {rel!r}")
+        return path
+
+    # 参数名不能用 files：agno 会把名为 files 的参数当作媒体文件注入，不暴露给模型
+    def write_files(self, entries: list[dict[str, str]]) -> str:
+        """
+        一次写入多个文件（已存在的文件会被覆盖，父目录自动创建）。
+
+        Args:
+            entries: 文件列表，每项为 {"path": 相对工作目录的路径, "content": 文件完整内容}
+
+        Returns:
+            写入结果：成功写入的文件列表，或校验失败的原因（校验失败时不写入任何文件）
+        """
+        if not entries:
+            return "error: entries 为空"
+        if len(entries) > BULK_MAX_FILES:
+            return f"error: 单次最多写入 {BULK_MAX_FILES} 个文件"
+
+        planned: dict[Path, tuple[str, str]] = {}
+        errors = []
+        for n, item in enumerate(entries, 1):
+            if not isinstance(item, dict) or not isinstance(item.get("path"), str) \
+                    or not isinstance(item.get("content"), str):
+                errors.append(f"第 {n} 项: 需要 path 与 content 字符串字段")
+                continue
+            try:
+                path = self._resolve(item["path"])
+            except ValueError as e:
+                errors.append(f"第 {n} 项: {e}")
+                continue
+            if len(item["content"].encode("utf-8")) > BULK_MAX_FILE_BYTES:
+                errors.append(f"第 {n} 项: {item['path']} 超过 {BULK_MAX_FILE_BYTES} 字节")
+                continue
+            planned[path] = (item["path"], item["content"])
+        if errors:
+            return "error: 校验失败，未写入任何文件\n" + "\n".join(errors)
+
+        for path, (_, content) in planned.items():
+            _atomic_write(path, content)
+        logger.info(f"[BulkFiles] 写入 {len(planned)} 个文件 | cwd={self.base_dir}")
+        return f"已写入 {len(planned)} 个文件:\n" + "\n".join(
+            f"- {rel} ({len(content.splitlines())} 行)" for rel, content in planned.values()
+        )
+
+    def apply_patch(self, patch: str) -> str:
+        """
+        应用多文件 unified diff（git diff / diff -u 格式，支持新增、删除与重命名文件）。
+
+        Args:
+            patch: unified diff 文本，每个文件以 "--- a/路径" 与 "+++ b/路径" 开头，
+                   新增文件的旧路径为 /dev/null，删除文件的新路径为 /dev/null，
+                   新旧路径不同表示重命名（改动按旧文件内容应用）
+
+        Returns:
+            应用结果：改动的文件列表，或失败原因（任一文件失败时不修改任何文件）
+        """
+        try:
+            file_patches = parse_patch(patch)
+            # (动作, 写入或删除的路径, 新内容；None 表示删除, 重命名时写入后要删除的旧路径)
+            results: list[tuple[str, Path, str | None, Path | None]] = []
+            for fp in file_patches:
+                old_path = self._resolve(fp.old_path) if fp.old_path is not None else None
+                new_path = self._resolve(fp.new_path) if fp.new_path is not None else None
+                if old_path is None:
+                    if new_path.exists():
+                        raise PatchError(f"{fp.new_path}: 文件已存在，无法作为新文件创建")
+                    original = ""
+                else:
+                    if not old_path.is_file():
+                        raise PatchError(f"{fp.old_path}: 文件不存在")
+                    original = old_path.read_text(encoding="utf-8")
+                if new_path is None:
+                    results.append(("删除", old_path, None, None))
+                    continue
+                content = apply_hunks(original, fp.hunks, fp.path)
+                if old_path is None:
+                    results.append(("新增", new_path, content, None))
+                elif old_path != new_path:
+                    if new_path.exists():
+                        raise PatchError(f"{fp.new_path}: 文件已存在，无法把 {fp.old_path} 重命名为该路径")
+                    results.append(("重命名", new_path, content, old_path))
+                else:
+                    results.append(("修改", new_path, content, None))
+        except (PatchError, ValueError, OSError) as e:
+            return f"error: 补丁未应用: {e}"
+
+        for _, path, content, renamed_from in results:
+            if content is None:
+                path.unlink(missing_ok=True)
+                continue
+            _atomic_write(path, content)
+            if renamed_from is not None:
+                renamed_from.unlink(missing_ok=True)
+        logger.info(f"[BulkFiles] 应用补丁 | 文件数={len(results)} | cwd={self.base_dir}")
+        base = self.base_dir.resolve()
+
+        def _rel(path: Path) -> str:
+            return path.relative_to(base).as_posix()
+
+        return f"补丁已应用，改动 {len(results)} 个文件:\n" + "\n".join(
+            f"- [{action}] " + (f"{_rel(renamed_from)} -> " if renamed_from else "") + _rel(path)
+            for action, path, _, renamed_from in results
+        )
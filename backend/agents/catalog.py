@@ -0,0 +1,228 @@
+"""
+Web Builder Agent - Skill 目录索引
+list_skills() 原本每次调用都 glob + 解析全部 YAML，AgentOS 则把所有 Skill 塞进 system_message，
+Skill 数量增长到数百个后两者都无法扩展。SkillCatalog 提供：
+1. 常驻内存的倒排索引（id / name / description / tags），查询只访问命中的词项
+2. 热加载：按文件 mtime 增量重新解析新增 / 修改 / 删除的 YAML（按间隔节流目录扫描）
+3. search(query, k)：返回与用户需求最相关的 top-k Skill，供 AgentOS 只注入相关模板
+
+分词：ASCII 按单词切分（id 的连字符同样切开），中文按单字 + 相邻二元组切分，无需额外分词依赖。
+"""
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yaml
+from agno.utils.log import logger
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
+SKILLS_DIR = BASE_DIR / "skills"
+CATALOG_RELOAD_INTERVAL = float(os.getenv("SKILL_CATALOG_RELOAD_INTERVAL", "2"))
+
+# 各字段命中的权重
+FIELD_WEIGHTS = {"id": 3.0, "name": 3.0, "tags": 2.5, "description": 1.0}
+
+_ASCII_RE = re.compile(r"[a-z0-9]+")
+_CJK_RUN_RE = re.compile(r"[\u4e00-\u9fff]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """ASCII 单词 + 中文单字与二元组"""
+    text = text.lower()
+    tokens = _ASCII_RE.findall(text)
+    for run in _CJK_RUN_RE.findall(text):
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+@dataclass
+class SkillEntry:
+    """目录中的一个 Skill"""
+    id: str
+    name: str
+    description: str
+    tags: list[str] = field(default_factory=list)
+    path: Path | None = None
+    mtime_ns: int = 0
+
+    def summary(self) -> dict:
+        return {"id": self.id, "name": self.name, "description": self.description}
+
+
+@dataclass
+class SkillHit:
+    """一次查询的命中结果"""
+    skill: SkillEntry
+    score: float
+
+
+class SkillCatalog:
+    """带倒排索引与热加载的 Skill 目录"""
+
+    def __init__(self, skills_dir: str | Path | None = None, reload_interval: float | None = None):
+        self.skills_dir = Path(skills_dir or SKILLS_DIR)
+        self.reload_interval = CATALOG_RELOAD_INTERVAL if reload_interval is None else reload_interval
+        self._entries: dict[Path, SkillEntry] = {}
+        self._by_id: dict[str, SkillEntry] = {}
+        # 词项 → {skill_id: 加权词频}
+        self._postings: dict[str, dict[str, float]] = defaultdict(dict)
+        self._tokens: dict[str, set[str]] = {}
+        self._lock = threading.RLock()
+        self._last_scan = 0.0
+
+    # -------------------------------------------------------------------
+    # 热加载
+    # -------------------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        扫描 skills 目录，增量加载变化的 YAML。
+
+        Returns:
+            是否有变化
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_scan < self.reload_interval:
+                return False
+            self._last_scan = now
+
+            current: dict[Path, int] = {}
+            if self.skills_dir.exists():
+                with os.scandir(self.skills_dir) as it:
+                    for e in it:
+                        if e.is_file() and e.name.endswith(".yaml"):
+                            current[Path(e.path)] = e.stat().st_mtime_ns
+
+            changed = False
+            for path in set(self._entries) - set(current):
+                self._remove(self._entries.pop(path))
+                changed = True
+            for path, mtime_ns in current.items():
+                old = self._entries.get(path)
+                if old is not None and old.mtime_ns == mtime_ns:
+                    continue
+                entry = self._load(path, mtime_ns)
+                if old is not None:
+                    self._remove(old)
+                if entry is None:
+                    self._entries.pop(path, None)
+                else:
+                    self._entries[path] = entry
+                    self._add(entry)
+                changed = True
+            if changed:
+                logger.info(f"[SkillCatalog] 索引已更新 | Skill 数={len(self._by_id)}")
+            return changed
+
+    @staticmethod
+    def _load(path: Path, mtime_ns: int) -> SkillEntry | None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+        except (OSError, yaml.YAMLError) as e:
+            logger.warning(f"[SkillCatalog] 跳过无法解析的 Skill: {path} | {e}")
+            return None
+        return SkillEntry(
+            id=str(data.get("id", path.stem)),
+            name=str(data.get("name", path.stem)),
+            description=str(data.get("description", "")),
+            tags=[str(t) for t in data.get("tags") or []],
+            path=path,
+            mtime_ns=mtime_ns,
+        )
+
+    def _add(self, entry: SkillEntry) -> None:
+        """加入索引；多个文件声明同一个 id 时按路径排序取第一个，其余告警后忽略"""
+        existing = self._by_id.get(entry.id)
+        if existing is not None and existing.path != entry.path:
+            keep, skipped = sorted((existing, entry), key=lambda e: str(e.path))
+            logger.warning(
+                f"[SkillCatalog] Skill id 重复: {entry.id} | 使用 {keep.path}，忽略 {skipped.path}"
+            )
+            if keep is existing:
+                return
+            self._unindex(existing)
+        self._index(entry)
+
+    def _remove(self, entry: SkillEntry) -> None:
+        """移出索引；被忽略的同 id 条目随之接替"""
+        if self._by_id.get(entry.id) is not entry:
+            return
+        self._unindex(entry)
+        for other in sorted(self._entries.values(), key=lambda e: str(e.path)):
+            if other.id == entry.id and other is not entry:
+                self._index(other)
+                break
+
+    def _index(self, entry: SkillEntry) -> None:
+        self._by_id[entry.id] = entry
+        weights: Counter = Counter()
+        fields = {
+            "id": entry.id.replace("-", " ").replace("_", " "),
+            "name": entry.name,
+            "tags": " ".join(entry.tags),
+            "description": entry.description,
+        }
+        for name, text in fields.items():
+            for token in tokenize(text):
+                weights[token] += FIELD_WEIGHTS[name]
+        for token, weight in weights.items():
+            self._postings[token][entry.id] = weight
+        self._tokens[entry.id] = set(weights)
+
+    def _unindex(self, entry: SkillEntry) -> None:
+        self._by_id.pop(entry.id, None)
+        for token in self._tokens.pop(entry.id, set()):
+            postings = self._postings.get(token, {})
+            postings.pop(entry.id, None)
+            if not postings:
+                self._postings.pop(token, None)
+
+    # -------------------------------------------------------------------
+    # 查询
+    # -------------------------------------------------------------------
+
+    def all(self) -> list[SkillEntry]:
+        """全部 Skill（按 id 排序）"""
+        self.refresh()
+        with self._lock:
+            return sorted(self._by_id.values(), key=lambda e: e.id)
+
+    def get(self, skill_id: str) -> SkillEntry | None:
+        self.refresh()
+        with self._lock:
+            return self._by_id.get(skill_id)
+
+    def search(self, query: str, k: int = 5) -> list[SkillHit]:
+        """
+        返回与 query 最相关的 top-k Skill。
+
+        评分：对每个查询词项累加 idf × 字段加权词频（词频做对数压缩），无命中的 Skill 不返回。
+        """
+        self.refresh()
+        with self._lock:
+            total = len(self._by_id)
+            if not total:
+                return []
+            scores: dict[str, float] = defaultdict(float)
+            for token in set(tokenize(query)):
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for skill_id, weight in postings.items():
+                    scores[skill_id] += idf * (1 + math.log(weight))
+            ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+            return [SkillHit(self._by_id[sid], score) for sid, score in ranked]
+
+
+# 进程级共享实例
+skill_catalog = SkillCatalog()
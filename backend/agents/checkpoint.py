@@ -0,0 +1,83 @@
+"""
+Web Builder Agent - Workflow 断点续跑
+每个阶段完成后把运行状态落盘，进程崩溃或模型超时后可通过 run_id 从最后完成的阶段继续：
+  python main.py --resume <run_id>
+
+检查点存放在 tmp/checkpoints/<run_id>.json（不放进 workdir，避免被 QA 审查或计入内容清单）。
+"""
+import os
+import time
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from models.schemas import QAReport
+
+
+# ---------------------------------------------------------------------------
+# 路径常量
+# ---------------------------------------------------------------------------
+BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
+CHECKPOINT_DIR = BASE_DIR / "tmp" / "checkpoints"
+
+# 阶段推进顺序：started → develop → qa → fix（可多轮）→ fixed → delivered
+PHASE_ORDER = ["started", "develop", "qa", "fix", "fixed", "delivered"]
+
+
+class WorkflowCheckpoint(BaseModel):
+    """一次运行的持久化状态"""
+    run_id: str
+    skill_id: str
+    user_input: str = ""
+    phase: str = Field(
+        default="started",
+        description="最后完成的阶段: started / develop / qa / fix / fixed / delivered",
+    )
+    dev_content: str | None = Field(
+        default=None,
+        description="Developer Phase 1 的最终输出",
+    )
+    qa_report: QAReport | None = None
+    fix_round: int = Field(
+        default=0,
+        description="已完成的修复轮数",
+    )
+    manifests: dict[str, dict[str, str]] = Field(default_factory=dict)
+    updated_at: float = Field(default_factory=time.time)
+
+    def reached(self, phase: str) -> bool:
+        """是否已完成（或越过）指定阶段"""
+        return PHASE_ORDER.index(self.phase) >= PHASE_ORDER.index(phase)
+
+
+def checkpoint_path(run_id: str) -> Path:
+    return CHECKPOINT_DIR / f"{run_id}.json"
+
+
+def save_checkpoint(checkpoint: WorkflowCheckpoint) -> None:
+    """原子写入检查点（先写临时文件再替换，避免写一半时崩溃留下损坏文件）"""
+    CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
+    checkpoint.updated_at = time.time()
+    path = checkpoint_path(checkpoint.run_id)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(checkpoint.model_dump_json(indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def load_checkpoint(run_id: str) -> WorkflowCheckpoint | None:
+    """读取检查点，不存在时返回 None"""
+    path = checkpoint_path(run_id)
+    if not path.exists():
+        return None
+    return WorkflowCheckpoint.model_validate_json(path.read_text(encoding="utf-8"))
+
+
+def list_checkpoints() -> list[WorkflowCheckpoint]:
+    """列出所有检查点（最近更新的在前）"""
+    if not CHECKPOINT_DIR.exists():
+        return []
+    checkpoints = [
+        WorkflowCheckpoint.model_validate_json(p.read_text(encoding="utf-8"))
+        for p in CHECKPOINT_DIR.glob("*.json")
+    ]
+    return sorted(checkpoints, key=lambda c: c.updated_at, reverse=True)
@@ -0,0 +1,235 @@
+"""
+Web Builder Agent - node_modules 共享缓存
+同一 Skill 生成的项目依赖集合几乎相同（Vite + React + Tailwind），
+每个运行都在全新的 workdir 里从零 npm install 是除 LLM 之外最大的耗时。
+
+缓存以「依赖指纹」为键（package.json 依赖声明 + package-lock.json + Node 版本）：
+  <NODE_MODULES_CACHE_DIR>/<key>/node_modules
+  <NODE_MODULES_CACHE_DIR>/<key>/package-lock.json
+命中时通过硬链接把 node_modules 物化到 workdir（跨文件系统时退化为复制），不再下载和解压。
+
+物化出来的文件与缓存共享 inode，因此写入缓存时把文件设为只读：npm 整体替换文件（先删后写）不受影响，
+原地修改会直接报错，而不会悄悄污染缓存和其他运行。
+淘汰：超过 NODE_MODULES_CACHE_MAX_AGE_DAYS 未使用的条目删除；总大小超过 NODE_MODULES_CACHE_MAX_GB 时
+按最近使用时间淘汰（每次写入新条目后执行）。
+"""
+import hashlib
+import json
+import os
+import shutil
+import stat
+import subprocess
+import time
+import uuid
+from pathlib import Path
+
+from agno.utils.log import logger
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
+NODE_MODULES_CACHE_DIR = Path(
+    os.getenv("NODE_MODULES_CACHE_DIR", str(BASE_DIR / "tmp" / "node_modules_cache"))
+)
+NODE_MODULES_CACHE_ENABLED = os.getenv("NODE_MODULES_CACHE", "true").lower() == "true"
+NODE_MODULES_CACHE_MAX_BYTES = int(float(os.getenv("NODE_MODULES_CACHE_MAX_GB", "10")) * 1024 ** 3)
+NODE_MODULES_CACHE_MAX_AGE = float(os.getenv("NODE_MODULES_CACHE_MAX_AGE_DAYS", "30")) * 86400
+
+# 条目内记录总字节数的文件，淘汰时不必遍历 node_modules
+SIZE_FILE = ".size"
+
+_node_version: str | None = None
+
+
+def node_version() -> str:
+    """当前 Node 版本（进程内只探测一次）"""
+    global _node_version
+    if _node_version is None:
+        try:
+            _node_version = subprocess.run(
+                ["node", "--version"], capture_output=True, text=True, timeout=10
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            _node_version = "unknown"
+    return _node_version
+
+
+def dependency_key(workdir: str | Path) -> str | None:
+    """
+    计算 workdir 的依赖指纹；没有 package.json 或无法解析时返回 None。
+
+    只取 package.json 中影响安装结果的字段，改动 scripts / name 等不会使缓存失效。
+    """
+    workdir = Path(workdir)
+    try:
+        package = json.loads((workdir / "package.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    digest = hashlib.sha256()
+    declared = {
+        k: package.get(k)
+        for k in ("dependencies", "devDependencies", "optionalDependencies", "overrides")
+    }
+    digest.update(json.dumps(declared, sort_keys=True).encode("utf-8"))
+    lockfile = workdir / "package-lock.json"
+    if lockfile.exists():
+        digest.update(lockfile.read_bytes())
+    digest.update(node_version().encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def link_tree(src: Path, dst: Path) -> int:
+    """把 src 目录树以硬链接方式复制到 dst（跨设备时复制文件），返回文件数"""
+    count = 0
+    for root, dirs, files in os.walk(src):
+        rel = Path(root).relative_to(src)
+        target_root = dst / rel
+        target_root.mkdir(parents=True, exist_ok=True)
+        # os.walk 不跟随目录符号链接，这里按原样重建（如 node_modules/.bin 中的链接）
+        for name in dirs + files:
+            path = Path(root) / name
+            target = target_root / name
+            if path.is_symlink():
+                os.symlink(os.readlink(path), target)
+                count += 1
+            elif name in files:
+                try:
+                    os.link(path, target)
+                except OSError:
+                    shutil.copy2(path, target)
+                count += 1
+    return count
+
+
+def seal_tree(root: Path) -> int:
+    """去掉 root 下所有普通文件的写权限（目录保持可写，便于整体删除与替换），返回总字节数"""
+    total = 0
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            st = os.lstat(path)
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            total += st.st_size
+            if st.st_mode & 0o222:
+                os.chmod(path, stat.S_IMODE(st.st_mode) & ~0o222)
+    return total
+
+
+def materialize_node_modules(workdir: str | Path) -> bool:
+    """
+    缓存命中时把 node_modules（及 package-lock.json）物化到 workdir。
+
+    Returns:
+        True 表示已从缓存物化，调用方可以跳过 npm install
+    """
+    if not NODE_MODULES_CACHE_ENABLED:
+        return False
+    workdir = Path(workdir)
+    key = dependency_key(workdir)
+    if key is None:
+        return False
+    entry = NODE_MODULES_CACHE_DIR / key
+    if not (entry / "node_modules").is_dir():
+        return False
+
+    target = workdir / "node_modules"
+    if target.exists():
+        shutil.rmtree(target)
+    try:
+        files = link_tree(entry / "node_modules", target)
+    except OSError as e:
+        # 条目在物化过程中被淘汰，回退到 npm install
+        logger.warning(f"[DepsCache] 物化失败 | key={key} | {e}")
+        shutil.rmtree(target, ignore_errors=True)
+        return False
+    os.utime(entry)  # 记录最近使用时间，供 LRU 淘汰
+    if (entry / "package-lock.json").exists() and not (workdir / "package-lock.json").exists():
+        shutil.copy2(entry / "package-lock.json", workdir / "package-lock.json")
+    logger.info(f"[DepsCache] 命中缓存 | key={key} | 文件数={files} | workdir={workdir}")
+    return True
+
+
+def store_node_modules(workdir: str | Path, key: str | None = None) -> bool:
+    """
+    把 workdir 中刚安装好的 node_modules 写入缓存。
+
+    Args:
+        workdir: 已完成 npm install 的工作目录
+        key: 安装前计算的依赖指纹（npm install 会生成 package-lock.json，
+             因此需要用安装前的指纹存一份，保证下一次同样输入能命中）
+    """
+    if not NODE_MODULES_CACHE_ENABLED:
+        return False
+    workdir = Path(workdir)
+    source = workdir / "node_modules"
+    if not source.is_dir():
+        return False
+
+    keys = {k for k in (key, dependency_key(workdir)) if k}
+    stored = False
+    for k in keys:
+        entry = NODE_MODULES_CACHE_DIR / k
+        if entry.exists():
+            continue
+        # 先写临时目录再整体 rename，并发运行同时写同一个键时只有一个生效
+        tmp = NODE_MODULES_CACHE_DIR / f".{k}.{uuid.uuid4().hex[:8]}"
+        try:
+            link_tree(source, tmp / "node_modules")
+            size = seal_tree(tmp / "node_modules")
+            if (workdir / "package-lock.json").exists():
+                shutil.copy2(workdir / "package-lock.json", tmp / "package-lock.json")
+            (tmp / SIZE_FILE).write_text(str(size))
+            os.rename(tmp, entry)
+            stored = True
+            logger.info(f"[DepsCache] 写入缓存 | key={k}")
+        except OSError:
+            # 目标已被其他运行抢先写入
+            shutil.rmtree(tmp, ignore_errors=True)
+    if stored:
+        evict_node_modules_cache()
+    return stored
+
+
+def evict_node_modules_cache(
+    max_bytes: int = NODE_MODULES_CACHE_MAX_BYTES,
+    max_age: float = NODE_MODULES_CACHE_MAX_AGE,
+) -> int:
+    """删除过期条目，总大小超出上限时按最近使用时间从旧到新删除，返回删除的条目数"""
+    if not NODE_MODULES_CACHE_DIR.exists():
+        return 0
+    now = time.time()
+    entries, removed, total = [], 0, 0
+    for entry in NODE_MODULES_CACHE_DIR.iterdir():
+        if entry.name.startswith(".") or not entry.is_dir():
+            continue
+        try:
+            last_used = entry.stat().st_mtime
+            size = int((entry / SIZE_FILE).read_text())
+        except (OSError, ValueError):
+            last_used, size = 0, 0  # 缺少记录的条目视为最旧
+        if now - last_used > max_age:
+            _remove_entry(entry)
+            removed += 1
+            continue
+        entries.append((last_used, size, entry))
+        total += size
+    for _, size, entry in sorted(entries):
+        if total <= max_bytes:
+            break
+        _remove_entry(entry)
+        total -= size
+        removed += 1
+    if removed:
+        logger.info(f"[DepsCache] 淘汰 {removed} 个条目 | 剩余={total / 1024 ** 3:.2f}GB")
+    return removed
+
+
+def _remove_entry(entry: Path) -> None:
+    # 先改名使条目立即失效，再删除；删除中途退出时留下的隐藏目录不会被误用
+    trash = entry.with_name(f".{entry.name}.evicted-{uuid.uuid4().hex[:8]}")
+    try:
+        os.rename(entry, trash)
+    except OSError:
+        return
+    shutil.rmtree(trash, ignore_errors=True)
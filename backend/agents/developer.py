@@ -1,20 +1,27 @@
 """
 Web Builder Agent - Developer Agent 定义
 从原 main.py 重构提取，保持原有能力不变：
-- ShellTools + FileTools 生成完整前端项目
+- CompactShellTools + FileTools 生成完整前端项目（命令输出写入日志文件，只返回压缩摘要）
 - 加载 system_prompt.txt 作为系统提示词（宪法）
 - 加载 skill YAML 模板作为差异化规格
-- 执行 npm install && npm run build 自检
+- 执行 npm install && npm run build 自检（依赖安装走 node_modules 共享缓存）
 """
 import os
 import yaml
 from pathlib import Path
 
 from agno.agent import Agent
-from agno.models.openai.like import OpenAILike
-from agno.tools.shell import ShellTools
 from agno.tools.file import FileTools
 
+from agents.bulk_files import BulkFileTools
+from agents.catalog import skill_catalog
+from agents.llm import create_model
+from agents.metrics import record_agent_tools
+from agents.npm_tools import NpmTools
+from agents.shell_tools import CompactShellTools
+from agents.registry import registry
+from agents.scaffold import resolve_scaffold, scaffold_notes
+
 
 # ---------------------------------------------------------------------------
 # 路径常量
@@ -37,7 +44,7 @@ def load_system_prompt() -> str:
     path = PROMPTS_DIR / "system_prompt.txt"
     if not path.exists():
         raise FileNotFoundError(f"系统提示词文件不存在: {path}")
-    return path.read_text(encoding="utf-8")
+    return registry.read_text(path)
 
 
 def load_skill(skill_id: str) -> dict:
@@ -45,37 +52,30 @@ def load_skill(skill_id: str) -> dict:
     path = SKILLS_DIR / f"{skill_id}.yaml"
     if not path.exists():
         raise FileNotFoundError(f"Skill 文件不存在: {path}")
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    return registry.load_yaml(path)
 
 
 def list_skills() -> list[dict]:
-    """列出所有可用的 Skills"""
-    skills = []
-    if not SKILLS_DIR.exists():
-        return skills
-    for f in SKILLS_DIR.glob("*.yaml"):
-        with open(f, "r", encoding="utf-8") as fh:
-            data = yaml.safe_load(fh)
-            skills.append({
-                "id": data.get("id", f.stem),
-                "name": data.get("name", f.stem),
-                "description": data.get("description", ""),
-            })
-    return skills
-
-
-def build_user_message(skill: dict, user_input: str, run_id: str, workdir: str) -> str:
-    """构建注入给 Developer Agent 的完整用户消息（按文档注入顺序）"""
+    """列出所有可用的 Skills（来自 Skill 目录索引，变更的 YAML 会被热加载）"""
+    return [entry.summary() for entry in skill_catalog.all()]
 
-    runtime_context = f"""<RUNTIME_CONTEXT>
-- run_id: {run_id}
-- workdir: {workdir}
-- default_stack: {skill.get('stack', 'Vite + React + Tailwind CSS')}
-- package_manager: npm
-- build_command: npm run build
-- dev_command: npm run dev
-</RUNTIME_CONTEXT>"""
+
+def build_user_message(
+    skill: dict,
+    user_input: str,
+    run_id: str,
+    workdir: str,
+    existing_files: list[str] | None = None,
+) -> str:
+    """
+    构建注入给 Developer Agent 的完整用户消息。
+
+    为了命中服务端的提示词前缀缓存，区块按「越稳定越靠前」排列：
+    SKILL_SPEC（同一 Skill 的所有运行字节级一致）→ EXISTING_FILES（同一脚手架一致）
+    → USER_INPUT → RUNTIME_CONTEXT（run_id / workdir 每次运行都不同，放在最后）。
+
+    existing_files 为 workdir 中已由脚手架预置的文件，会以 <EXISTING_FILES> 区块告知 Agent。
+    """
 
     skill_spec = f"""<SKILL_SPEC>
 名称: {skill.get('name', '')}
@@ -97,7 +97,33 @@ def build_user_message(skill: dict, user_input: str, run_id: str, workdir: str)
 {user_input}
 </USER_INPUT>"""
 
-    return f"{runtime_context}\n\n{skill_spec}\n\n{user_section}"
+    runtime_context = f"""<RUNTIME_CONTEXT>
+- default_stack: {skill.get('stack', 'Vite + React + Tailwind CSS')}
+- package_manager: npm
+- build_command: npm run build
+- dev_command: npm run dev
+- run_id: {run_id}
+- workdir: {workdir}
+</RUNTIME_CONTEXT>"""
+
+    sections = [skill_spec]
+    if existing_files:
+        file_list = "\n".join(f"- {f}" for f in existing_files)
+        rules = ["- 无需重新创建上述文件，只在需要时修改（如在 package.json 中追加依赖）"]
+        # existing_files 非空说明已应用了该 Skill 解析出的脚手架，附上该脚手架自己的使用说明
+        scaffold = resolve_scaffold(skill)
+        if scaffold and scaffold_notes(scaffold):
+            rules.append(scaffold_notes(scaffold))
+        rule_text = "\n".join(rules)
+        sections.append(f"""<EXISTING_FILES>
+工作目录已预置以下项目脚手架文件（依赖、构建配置与入口均已就绪）：
+{file_list}
+
+{rule_text}
+</EXISTING_FILES>""")
+    sections.append(user_section)
+    sections.append(runtime_context)
+    return "\n\n".join(sections)
 
 
 # ---------------------------------------------------------------------------
@@ -129,16 +155,15 @@ def create_developer_agent(
 
     return Agent(
         name="DeveloperAgent",
-        model=OpenAILike(
-            id=_model_id,
-            api_key=_api_key,
-            base_url=_base_url,
-        ),
+        model=create_model(_model_id, _api_key, _base_url),
         system_message=system_prompt,
         tools=[
-            ShellTools(base_dir=workdir),
+            CompactShellTools(base_dir=workdir),
             FileTools(base_dir=workdir),
+            BulkFileTools(base_dir=workdir),
+            NpmTools(base_dir=workdir),
         ],
+        post_hooks=[record_agent_tools],
         markdown=True,
         debug_mode=True,
     )
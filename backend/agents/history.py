@@ -0,0 +1,199 @@
+"""
+Web Builder Agent - 对话历史压缩
+AgentOS 的 Agent 开启 add_history_to_context 后，历史运行中的工具载荷（FileTools 写入的整份文件、
+npm 日志等）会随每一轮对话重复发送，几轮之后提示词迅速膨胀。
+
+compact_history() 在每次模型请求前按 token 预算压缩历史消息（agno 标记为 from_history 的消息），
+以轮（从一条用户消息到下一条用户消息之前）为单位，每次处理固定的 AGENT_HISTORY_COMPACT_BLOCK 轮：
+1. 历史总量不超过预算时原样保留
+2. 从最早的一块开始，整块省略其中所有的工具载荷，直到不超出预算：
+   - 工具结果：保留工具名、关键参数与首行摘要，正文省略
+   - 工具调用参数：长字符串（文件内容、补丁等）替换为长度说明，参数仍是合法 JSON
+   用户消息与 Assistant 的文字回复（对话中的决策）保持不变
+3. 仍超出预算时按块丢弃最早的对话（工具调用与其结果总在同一轮内，不会被拆开）
+
+压缩只作用于发给模型的消息副本，会话数据库中保存的历史不受影响。
+省略与丢弃的边界只落在块边界上：新增对话不跨过下一个块边界时，已压缩部分逐字节不变，
+后续请求仍能命中提示词前缀缓存；边界前移的那一轮缓存从旧边界处失效。
+agno 按 AGENT_HISTORY_MAX_RUNS 截取历史窗口后，窗口滑动本身会改变历史开头，不在此列。
+"""
+import json
+import os
+from dataclasses import dataclass
+
+from agno.models.message import Message
+from agno.utils.log import logger
+
+from agents.knowledge import estimate_tokens
+
+
+# 历史消息的 token 预算（估算值），0 表示不压缩
+HISTORY_TOKEN_BUDGET = int(os.getenv("AGENT_HISTORY_TOKEN_BUDGET", "8000"))
+# 省略 / 丢弃的粒度（轮数）：越大边界移动越少，前缀缓存越稳定，但可能多压缩一些
+HISTORY_COMPACT_BLOCK = max(1, int(os.getenv("AGENT_HISTORY_COMPACT_BLOCK", "4")))
+# 超过该字符数的工具结果 / 工具参数字符串才会被省略
+HISTORY_ELIDE_MIN_CHARS = 200
+# 省略后保留的摘要长度 / 引用中参数值的最大长度
+HISTORY_PREVIEW_CHARS = 120
+HISTORY_ARG_VALUE_CHARS = 80
+
+
+@dataclass
+class CompactionResult:
+    """一次历史压缩的结果"""
+    messages: list[Message]
+    tokens_before: int = 0
+    tokens_after: int = 0
+    elided: int = 0
+    dropped_turns: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.elided or self.dropped_turns)
+
+
+def message_tokens(message: Message) -> int:
+    """估算单条消息的 token 数（文本内容 + 工具调用参数）"""
+    content = message.content or ""
+    if not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False, default=str)
+    tokens = estimate_tokens(content)
+    for call in message.tool_calls or []:
+        function = call.get("function") or {}
+        tokens += estimate_tokens(str(function.get("name", ""))) + estimate_tokens(str(function.get("arguments", "")))
+    return tokens + 4  # 角色等固定开销
+
+
+def _describe_call(tool_name: str | None, tool_args: dict | None) -> str:
+    """工具调用的简短描述：工具名 + 短参数值，如 save_file(file_name=src/App.tsx)"""
+    args = []
+    for key, value in (tool_args or {}).items():
+        if isinstance(value, (str, int, float, bool)) and len(str(value)) <= HISTORY_ARG_VALUE_CHARS:
+            args.append(f"{key}={value}")
+        elif isinstance(value, list) and all(isinstance(v, str) for v in value):
+            joined = " ".join(value)
+            if len(joined) <= HISTORY_ARG_VALUE_CHARS:
+                args.append(f"{key}={joined}")
+    return f"{tool_name or 'tool'}({', '.join(args)})"
+
+
+def _elide_value(value):
+    if isinstance(value, str) and len(value) > HISTORY_ELIDE_MIN_CHARS:
+        return f"[已省略 {len(value)} 字符]"
+    if isinstance(value, list):
+        return [_elide_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _elide_value(v) for k, v in value.items()}
+    return value
+
+
+def _elide_tool_calls(message: Message) -> Message | None:
+    """省略 Assistant 工具调用中的长参数，没有可省略的内容时返回 None"""
+    calls, changed = [], False
+    for call in message.tool_calls or []:
+        function = call.get("function") or {}
+        arguments = function.get("arguments")
+        if not isinstance(arguments, str) or len(arguments) <= HISTORY_ELIDE_MIN_CHARS:
+            calls.append(call)
+            continue
+        try:
+            elided = json.dumps(_elide_value(json.loads(arguments)), ensure_ascii=False)
+        except ValueError:
+            elided = json.dumps({"_elided": f"[已省略 {len(arguments)} 字符]"}, ensure_ascii=False)
+        if elided == arguments:
+            calls.append(call)
+            continue
+        calls.append({**call, "function": {**function, "arguments": elided}})
+        changed = True
+    return message.model_copy(update={"tool_calls": calls}) if changed else None
+
+
+def _elide_tool_result(message: Message) -> Message | None:
+    """把工具结果替换为引用 + 首行摘要"""
+    content = message.content
+    if not isinstance(content, str) or len(content) <= HISTORY_ELIDE_MIN_CHARS:
+        return None
+    first_line = next((line.strip() for line in content.splitlines() if line.strip()), "")
+    reference = (
+        f"[历史工具输出已省略：{_describe_call(message.tool_name, message.tool_args)}，"
+        f"约 {estimate_tokens(content)} tokens；需要时请重新调用工具获取最新内容]"
+    )
+    if first_line:
+        reference += f"\n摘要: {first_line[:HISTORY_PREVIEW_CHARS]}"
+    return message.model_copy(update={"content": reference})
+
+
+def _elide(message: Message) -> Message | None:
+    if message.role == "tool":
+        return _elide_tool_result(message)
+    if message.role == "assistant" and message.tool_calls:
+        return _elide_tool_calls(message)
+    return None
+
+
+def _turns(history: list[Message]) -> list[tuple[int, int]]:
+    """把历史切分为轮：每轮从一条用户消息开始，到下一条用户消息之前结束，返回 [(start, end)]"""
+    spans, start = [], 0
+    for i in range(1, len(history) + 1):
+        if i == len(history) or history[i].role == "user":
+            spans.append((start, i))
+            start = i
+    return spans
+
+
+def compact_history(messages: list[Message], budget: int = HISTORY_TOKEN_BUDGET) -> CompactionResult:
+    """
+    按 token 预算压缩 messages 中的历史消息，返回新的消息列表（不修改入参中的消息对象）。
+
+    Args:
+        messages: 发给模型的完整消息列表（system + 历史 + 本轮消息）
+        budget: 历史消息的 token 预算，<= 0 时不压缩
+    """
+    indexes = [i for i, m in enumerate(messages) if m.from_history]
+    if budget <= 0 or not indexes:
+        return CompactionResult(messages=messages)
+
+    history = [messages[i] for i in indexes]
+    tokens = [message_tokens(m) for m in history]
+    result = CompactionResult(messages=messages, tokens_before=sum(tokens))
+    total = result.tokens_before
+    if total <= budget:
+        result.tokens_after = total
+        return result
+
+    spans = _turns(history)
+    block = HISTORY_COMPACT_BLOCK
+
+    # 第 2 步：从最早的一块开始，整块省略工具载荷（不在块中间停下，边界才稳定）
+    cut = 0
+    while total > budget and cut < len(spans):
+        for start, end in spans[cut:cut + block]:
+            for i in range(start, end):
+                elided = _elide(history[i])
+                if elided is None:
+                    continue
+                saved = tokens[i] - message_tokens(elided)
+                if saved <= 0:
+                    continue
+                history[i], tokens[i] = elided, tokens[i] - saved
+                total -= saved
+                result.elided += 1
+        cut += block
+
+    # 第 3 步：按块丢弃最早的对话
+    dropped = 0
+    while total > budget and dropped < len(spans):
+        last = min(len(spans), dropped + block)
+        total -= sum(tokens[spans[dropped][0]:spans[last - 1][1]])
+        dropped = last
+    result.dropped_turns = dropped
+    history = history[spans[dropped][0]:] if dropped < len(spans) else []
+
+    first = indexes[0]
+    result.messages = messages[:first] + history + [m for m in messages[first:] if not m.from_history]
+    result.tokens_after = total
+    logger.debug(
+        f"[History] 压缩历史: {result.tokens_before} → {result.tokens_after} tokens | "
+        f"省略工具载荷={result.elided} | 丢弃轮数={result.dropped_turns}"
+    )
+    return result
@@ -0,0 +1,280 @@
+"""
+Web Builder Agent - 审查知识检索
+QA 原本把 agent-skills/*/SKILL.md 全文拼进 system_message，与项目内容无关，
+知识库每增加一份文件，每次审查的输入 token 就线性增长。KnowledgeIndex 提供：
+1. 按 SKILL.md 的 ## 章节切分，对「标题 + 规则正文」建立离线 BM25 索引
+2. 从项目实际文件中提取检索信号（依赖、import、Hook、JSX 标签与属性、文件类型）
+3. 在 token 预算内按相关度（叠加章节优先级 CRITICAL / HIGH / MEDIUM / LOW）挑选章节
+
+索引通过注册表缓存，任一 SKILL.md 变化或目录增删文件时自动重建。
+"""
+import json
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from agents.catalog import tokenize
+from agents.manifest import SKIPPED_DIRS
+from agents.registry import registry
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
+AGENT_SKILLS_DIR = BASE_DIR / "agent-skills"
+QA_KNOWLEDGE_TOKEN_BUDGET = int(os.getenv("QA_KNOWLEDGE_TOKEN_BUDGET", "1500"))
+
+# BM25 参数；标题词项按 HEADING_BOOST 倍计入词频
+BM25_K1 = 1.5
+BM25_B = 0.75
+HEADING_BOOST = 3
+PRIORITY_BOOST = {"CRITICAL": 1.5, "HIGH": 1.25, "MEDIUM": 1.0, "LOW": 0.8}
+
+# 提取检索信号时读取的源码文件与单文件读取上限
+QUERY_SOURCE_SUFFIXES = {".ts", ".tsx", ".js", ".jsx", ".css", ".html"}
+QUERY_MAX_FILES = 200
+QUERY_MAX_FILE_BYTES = 32 * 1024
+
+_IMPORT_RE = re.compile(r"""(?:from|import)\s*\(?\s*['"]([^'"]+)['"]""")
+_HOOK_RE = re.compile(r"\buse[A-Z]\w*")
+_TAG_RE = re.compile(r"<([A-Za-z][\w.]*)")
+_ATTR_RE = re.compile(r"\s([a-zA-Z][\w-]*)=[{\"']")
+_CSS_PROP_RE = re.compile(r"(?m)^\s*(@[\w-]+|[a-z-]+)\s*[:{]")
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中文约 1 字 1 token，其余约 4 字符 1 token"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def read_skill_body(skill_file: Path) -> str:
+    """读取 SKILL.md，去掉 YAML frontmatter，只保留 Markdown 正文"""
+    def _load():
+        content = skill_file.read_text(encoding="utf-8")
+        if content.startswith("---"):
+            # 找到第二个 --- 的位置
+            end = content.find("---", 3)
+            if end != -1:
+                content = content[end + 3:].strip()
+        return content, [skill_file]
+
+    return registry.get(f"skill-body:{skill_file}", _load)
+
+
+def skill_files(skills_dir: Path = AGENT_SKILLS_DIR) -> list[Path]:
+    """知识库目录下的全部 SKILL.md（按目录名排序）"""
+    if not skills_dir.exists():
+        return []
+    return [d / "SKILL.md" for d in sorted(skills_dir.iterdir()) if (d / "SKILL.md").exists()]
+
+
+@dataclass
+class KnowledgeSection:
+    """SKILL.md 中的一个 ## 章节"""
+    skill: str  # agent-skills 目录名
+    title: str  # 文档标题（# 级）
+    heading: str  # 章节标题（不含 ##）
+    text: str  # 章节全文（含标题行）
+    order: int  # 在知识库中的原始顺序
+    tokens: int
+
+    @property
+    def priority(self) -> float:
+        level = self.heading.split(" ", 1)[0].upper()
+        return PRIORITY_BOOST.get(level, 1.0)
+
+
+@dataclass
+class KnowledgeHit:
+    section: KnowledgeSection
+    score: float
+
+
+def split_sections(skill: str, body: str, start: int = 0) -> list[KnowledgeSection]:
+    """把 SKILL.md 正文按 ## 标题切成章节"""
+    title_match = re.search(r"(?m)^# (.+)$", body)
+    title = title_match.group(1).strip() if title_match else skill
+    sections = []
+    for part in re.split(r"(?m)^(?=## )", body):
+        if not part.startswith("## "):
+            continue
+        text = part.strip()
+        sections.append(KnowledgeSection(
+            skill=skill,
+            title=title,
+            heading=text.splitlines()[0][3:].strip(),
+            text=text,
+            order=start + len(sections),
+            tokens=estimate_tokens(text),
+        ))
+    return sections
+
+
+class KnowledgeIndex:
+    """SKILL.md 章节上的 BM25 索引"""
+
+    def __init__(self, sections: list[KnowledgeSection]):
+        self.sections = sections
+        self._tf: list[Counter] = []
+        for section in sections:
+            tf = Counter(tokenize(section.text))
+            for token in tokenize(section.heading):
+                tf[token] += HEADING_BOOST - 1
+            self._tf.append(tf)
+        self._lengths = [sum(tf.values()) for tf in self._tf]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        self._df: Counter = Counter()
+        for tf in self._tf:
+            self._df.update(tf.keys())
+
+    @classmethod
+    def build(cls, skills_dir: Path = AGENT_SKILLS_DIR) -> "KnowledgeIndex":
+        sections: list[KnowledgeSection] = []
+        for skill_file in skill_files(skills_dir):
+            sections += split_sections(skill_file.parent.name, read_skill_body(skill_file), len(sections))
+        return cls(sections)
+
+    def search(
+        self,
+        query_tokens: Counter,
+        sources: list[tuple[str, list[str] | None]] | None = None,
+    ) -> list[KnowledgeHit]:
+        """
+        按 BM25 × 章节优先级排序返回命中的章节（无命中词项的章节不返回）。
+
+        Args:
+            query_tokens: 查询词项及其出现次数（次数做对数压缩）
+            sources: 只在这些 (目录名, 章节标题关键字) 范围内检索，格式同 QA_CATEGORY_KNOWLEDGE
+        """
+        total = len(self.sections)
+        hits = []
+        for i, section in enumerate(self.sections):
+            if sources is not None and not _in_sources(section, sources):
+                continue
+            tf, length = self._tf[i], self._lengths[i]
+            score = 0.0
+            for token, qtf in query_tokens.items():
+                freq = tf.get(token)
+                if not freq:
+                    continue
+                idf = math.log(1 + (total - self._df[token] + 0.5) / (self._df[token] + 0.5))
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self._avg_length)
+                score += idf * freq * (BM25_K1 + 1) / (freq + norm) * (1 + math.log(qtf))
+            if score > 0:
+                hits.append(KnowledgeHit(section, score * section.priority))
+        return sorted(hits, key=lambda h: (-h.score, h.section.order))
+
+
+def _in_sources(section: KnowledgeSection, sources: list[tuple[str, list[str] | None]]) -> bool:
+    return any(
+        section.skill == skill and (keywords is None or any(k in section.heading for k in keywords))
+        for skill, keywords in sources
+    )
+
+
+def get_knowledge_index() -> KnowledgeIndex:
+    """进程内共享的知识索引（注册表缓存）"""
+    def _load():
+        files = skill_files()
+        return KnowledgeIndex.build(), [AGENT_SKILLS_DIR, *files]
+
+    return registry.get("qa:knowledge-index", _load)
+
+
+# ---------------------------------------------------------------------------
+# 项目检索信号
+# ---------------------------------------------------------------------------
+
+def project_query(workdir: str | Path, stack: str = "") -> Counter:
+    """
+    从项目文件中提取检索词项：技术栈、package.json 依赖、源码中的 import / Hook /
+    JSX 标签与属性 / CSS 属性，以及出现的文件类型。
+    """
+    workdir = Path(workdir)
+    signals: list[str] = [stack]
+
+    package_json = workdir / "package.json"
+    if package_json.exists():
+        try:
+            data = json.loads(package_json.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        for field in ("dependencies", "devDependencies"):
+            signals.extend(data.get(field) or {})
+
+    count = 0
+    for root, dirs, files in os.walk(workdir):
+        dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS)
+        for name in sorted(files):
+            suffix = Path(name).suffix
+            if suffix not in QUERY_SOURCE_SUFFIXES:
+                continue
+            if count >= QUERY_MAX_FILES:
+                break
+            count += 1
+            signals.append(suffix[1:])
+            try:
+                with open(os.path.join(root, name), "r", encoding="utf-8", errors="ignore") as f:
+                    source = f.read(QUERY_MAX_FILE_BYTES)
+            except OSError:
+                continue
+            if suffix == ".css":
+                signals.extend(_CSS_PROP_RE.findall(source))
+                continue
+            signals.extend(_IMPORT_RE.findall(source))
+            signals.extend(_HOOK_RE.findall(source))
+            signals.extend(_TAG_RE.findall(source))
+            signals.extend(_ATTR_RE.findall(source))
+
+    return Counter(token for signal in signals for token in tokenize(signal))
+
+
+def select_knowledge(
+    workdir: str | Path,
+    stack: str = "",
+    budget: int | None = None,
+    sources: list[tuple[str, list[str] | None]] | None = None,
+) -> str:
+    """
+    挑选与项目相关的审查规则章节，拼接为知识文本。
+
+    按相关度贪心填充 token 预算（放不下的章节跳过，继续尝试更短的），
+    输出时按知识库原始顺序、以文档标题分组。项目中没有可用信号时退回按优先级挑选。
+
+    Args:
+        workdir: 项目工作目录
+        stack: 技术栈描述
+        budget: token 预算（默认读取 QA_KNOWLEDGE_TOKEN_BUDGET）
+        sources: 限定检索范围，格式同 QA_CATEGORY_KNOWLEDGE
+    """
+    budget = QA_KNOWLEDGE_TOKEN_BUDGET if budget is None else budget
+    index = get_knowledge_index()
+    hits = index.search(project_query(workdir, stack), sources)
+    if not hits:
+        hits = [
+            KnowledgeHit(s, s.priority) for s in index.sections
+            if sources is None or _in_sources(s, sources)
+        ]
+        hits.sort(key=lambda h: (-h.score, h.section.order))
+
+    selected, used, titles = [], 0, set()
+    for hit in hits:
+        section = hit.section
+        # 每份文档第一次入选时还要算上其标题行
+        cost = section.tokens + (0 if section.title in titles else estimate_tokens(f"# {section.title}\n\n"))
+        if used + cost > budget:
+            continue
+        selected.append(section)
+        titles.add(section.title)
+        used += cost
+
+    parts, current_title = [], None
+    for section in sorted(selected, key=lambda s: s.order):
+        if section.title != current_title:
+            parts.append(f"# {section.title}")
+            current_title = section.title
+        parts.append(section.text)
+    return "\n\n".join(parts)
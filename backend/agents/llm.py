@@ -0,0 +1,311 @@
+"""
+Web Builder Agent - 模型工厂
+Developer / QA / AgentOS 的所有 Agent 都通过 create_model() 创建模型实例，
+便于在一处统一接入模型层的横切能力：
+- 记录每次请求的 prompt token 与服务端前缀缓存命中的 token（agents.metrics）
+- 记录每次请求的首 token 延迟、总耗时与 token 用量（agents.metrics，Prometheus 指标）
+- 进程级共享的 HTTP 连接池（keep-alive，安装 h2 时启用 HTTP/2），
+  所有模型实例复用同一批到 OPENAI_BASE_URL 的连接，省去每个运行的 TLS 握手
+- 可选的对话历史压缩（agents.history）：按 token 预算省略历史中的工具载荷，用于 AgentOS 多轮对话
+- 可选的每轮附加上下文（turn_context）：只追加到发给模型的本轮用户消息末尾，不写入会话，
+  system_message 与历史消息保持字节级稳定，可以命中服务端前缀缓存
+- 挂在连接池上的自适应限流（agents.ratelimit，LLM_RATE_LIMIT）：按 Key / 模型的令牌桶、
+  AIMD 并发窗口与 Retry-After 退避，所有 Agent 共享
+- 可选的响应磁盘缓存与确定性回放（agents.llm_cache，LLM_CACHE=on / replay）
+- 可选的多模型延迟感知路由与对冲请求（agents.router，LLM_ROUTER_MODELS）
+"""
+import asyncio
+import importlib.util
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable
+
+import httpx
+from agno.models.metrics import Metrics
+from agno.models.openai.like import OpenAILike
+from agno.utils.log import logger
+from openai import AsyncOpenAI as AsyncOpenAIClient
+from openai import OpenAI as OpenAIClient
+
+from agents.history import compact_history
+from agents.llm_cache import install_cache, response_cache
+from agents.metrics import observe_model_request, observe_model_tokens
+from agents.ratelimit import LLM_RATE_LIMIT, AsyncRateLimitedTransport, RateLimitedTransport, rate_limiters
+from agents.router import LLM_HEDGE_AFTER, LLM_ROUTER_MODELS, RouterModel, parse_router_models
+
+
+# ---------------------------------------------------------------------------
+# 共享 HTTP 连接池
+# ---------------------------------------------------------------------------
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "600"))
+# OpenAI 客户端对 429 / 5xx / 连接错误的重试次数（重试同样经过限流器排队）
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+# HTTP/2 需要可选依赖 h2（pip install httpx[http2]），未安装时退回 HTTP/1.1
+LLM_HTTP2 = (
+    os.getenv("LLM_HTTP2", "true").lower() == "true"
+    and importlib.util.find_spec("h2") is not None
+)
+
+_http_client: httpx.Client | None = None
+# 异步连接绑定在创建它的事件循环上，每个事件循环各自一个客户端
+_async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_http_lock = threading.Lock()
+
+# 每个模型实例缓存的每轮附加上下文条数（按用户消息 id，同一轮内的多次请求复用同一份）
+TURN_CONTEXT_CACHE_SIZE = 256
+
+
+def _transport_kwargs() -> dict:
+    return {
+        "http2": LLM_HTTP2,
+        "limits": httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def _http_client_kwargs() -> dict:
+    return {
+        "timeout": httpx.Timeout(LLM_HTTP_TIMEOUT, connect=10.0),
+        "follow_redirects": True,
+    }
+
+
+def _transport() -> httpx.BaseTransport:
+    transport = httpx.HTTPTransport(**_transport_kwargs())
+    return RateLimitedTransport(transport) if LLM_RATE_LIMIT else transport
+
+
+def _async_transport() -> httpx.AsyncBaseTransport:
+    transport = httpx.AsyncHTTPTransport(**_transport_kwargs())
+    return AsyncRateLimitedTransport(transport) if LLM_RATE_LIMIT else transport
+
+
+def get_http_client() -> httpx.Client:
+    """进程级共享的同步 HTTP 客户端"""
+    global _http_client
+    with _http_lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(transport=_transport(), **_http_client_kwargs())
+            logger.debug(f"[LLM] 创建共享 HTTP 连接池 | http2={LLM_HTTP2} | rate_limit={LLM_RATE_LIMIT}")
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """当前事件循环共享的异步 HTTP 客户端"""
+    loop = asyncio.get_running_loop()
+    with _http_lock:
+        client = _async_http_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(transport=_async_transport(), **_http_client_kwargs())
+            _async_http_clients[loop] = client
+        return client
+
+
+# ---------------------------------------------------------------------------
+# 模型
+# ---------------------------------------------------------------------------
+
+@dataclass
+class InstrumentedOpenAILike(OpenAILike):
+    """
+    OpenAILike 的扩展：
+    - 使用共享 HTTP 连接池创建 OpenAI 客户端，并按配置挂上响应缓存
+    - 在解析每次响应的 usage 时记录提示词缓存命中情况与 token 用量
+    - 记录每次请求的首 token 延迟（非流式为完整响应耗时）与总耗时
+    - history_token_budget > 0 时，发送前按预算压缩历史消息（agents.history）
+    - 设置了 turn_context 时，把它对本轮用户消息生成的文本追加到请求中的该消息末尾
+    """
+
+    history_token_budget: int = 0
+    # 参数为本轮用户消息文本，返回追加在其末尾的上下文（如相关模板、当前时间）
+    turn_context: Callable[[str], str] | None = None
+    _turn_blocks: "OrderedDict[str, str]" = field(default_factory=OrderedDict, repr=False)
+
+    def _prepare_request(self, kwargs: dict) -> dict:
+        """发送前处理消息副本：压缩历史、附加本轮上下文（agno 保存的消息不受影响）"""
+        messages = kwargs.get("messages")
+        if not messages:
+            return kwargs
+        prepared = messages
+        if self.history_token_budget > 0:
+            prepared = compact_history(prepared, self.history_token_budget).messages
+        if self.turn_context is not None:
+            prepared = self._append_turn_context(prepared)
+        return kwargs if prepared is messages else {**kwargs, "messages": prepared}
+
+    def _append_turn_context(self, messages: list) -> list:
+        index = next(
+            (i for i in range(len(messages) - 1, -1, -1)
+             if messages[i].role == "user" and not messages[i].from_history),
+            None,
+        )
+        if index is None or not isinstance(messages[index].content, str):
+            return messages
+        message = messages[index]
+        # 同一轮的工具调用循环会发起多次请求，复用第一次生成的文本，保证本轮内前缀一致
+        block = self._turn_blocks.get(message.id)
+        if block is None:
+            block = self.turn_context(message.content)
+            self._turn_blocks[message.id] = block
+            while len(self._turn_blocks) > TURN_CONTEXT_CACHE_SIZE:
+                self._turn_blocks.popitem(last=False)
+        if not block:
+            return messages
+        updated = message.model_copy(update={"content": message.content + block})
+        return messages[:index] + [updated] + messages[index + 1:]
+
+    def invoke(self, *args, **kwargs):
+        kwargs = self._prepare_request(kwargs)
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = super().invoke(*args, **kwargs)
+            status = "ok"
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            observe_model_request(self.id, elapsed, elapsed, status == "ok")
+
+    async def ainvoke(self, *args, **kwargs):
+        kwargs = self._prepare_request(kwargs)
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await super().ainvoke(*args, **kwargs)
+            status = "ok"
+            return response
+        except asyncio.CancelledError:
+            # 对冲请求中落败被取消的一方不计入指标
+            status = "cancelled"
+            raise
+        finally:
+            if status != "cancelled":
+                elapsed = time.perf_counter() - started
+                observe_model_request(self.id, elapsed, elapsed, status == "ok")
+
+    def invoke_stream(self, *args, **kwargs):
+        kwargs = self._prepare_request(kwargs)
+        started = time.perf_counter()
+        ttft = None
+        status = "error"
+        try:
+            for chunk in super().invoke_stream(*args, **kwargs):
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                yield chunk
+            status = "ok"
+        except GeneratorExit:
+            status = "cancelled"
+            raise
+        finally:
+            if status != "cancelled":
+                observe_model_request(self.id, ttft, time.perf_counter() - started, status == "ok")
+
+    async def ainvoke_stream(self, *args, **kwargs):
+        kwargs = self._prepare_request(kwargs)
+        started = time.perf_counter()
+        ttft = None
+        status = "error"
+        try:
+            async for chunk in super().ainvoke_stream(*args, **kwargs):
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                yield chunk
+            status = "ok"
+        except (GeneratorExit, asyncio.CancelledError):
+            status = "cancelled"
+            raise
+        finally:
+            if status != "cancelled":
+                observe_model_request(self.id, ttft, time.perf_counter() - started, status == "ok")
+
+    def get_client(self) -> OpenAIClient:
+        if self.client and not self.client.is_closed():
+            return self.client
+        client_params = self._get_client_params()
+        client_params["http_client"] = get_http_client()
+        self.client = install_cache(OpenAIClient(**client_params), response_cache)
+        return self.client
+
+    def get_async_client(self) -> AsyncOpenAIClient:
+        http_client = get_async_http_client()
+        # 复用当前事件循环的客户端；换了事件循环（如多次 asyncio.run）则重建
+        if self.async_client and not self.async_client.is_closed() and self.async_client._client is http_client:
+            return self.async_client
+        client_params = self._get_client_params()
+        client_params["http_client"] = http_client
+        self.async_client = install_cache(AsyncOpenAIClient(**client_params), response_cache, is_async=True)
+        return self.async_client
+
+    def _get_metrics(self, response_usage) -> Metrics:
+        metrics = super()._get_metrics(response_usage)
+        observe_model_tokens(self.id, metrics.input_tokens, metrics.output_tokens, metrics.cache_read_tokens)
+        if LLM_RATE_LIMIT and metrics.output_tokens:
+            # 发送前只预扣了估算的 prompt token，completion token 在这里补扣
+            host = httpx.URL(str(self.base_url)).host
+            rate_limiters.get(host, self.api_key, self.id).charge_tokens(metrics.output_tokens)
+        if metrics.input_tokens:
+            logger.debug(
+                f"[PromptCache] model={self.id} | prompt={metrics.input_tokens} | "
+                f"cached={metrics.cache_read_tokens} | "
+                f"uncached={metrics.input_tokens - metrics.cache_read_tokens}"
+            )
+        return metrics
+
+
+def create_model(
+    model_id: str | None = None,
+    api_key: str | None = None,
+    base_url: str | None = None,
+    history_token_budget: int = 0,
+    turn_context: Callable[[str], str] | None = None,
+) -> OpenAILike:
+    """
+    创建 OpenAI 兼容模型实例。
+
+    配置了 LLM_ROUTER_MODELS 时返回 RouterModel：model_id 作为首选模型，
+    与其余候选模型一起按延迟与健康状况路由。
+
+    Args:
+        model_id: 模型 ID（默认读取 OPENAI_MODEL）
+        api_key: API Key（默认读取 OPENAI_API_KEY）
+        base_url: API Base URL（默认读取 OPENAI_BASE_URL）
+        history_token_budget: 历史消息的 token 预算，超出时压缩（0 表示不压缩）
+        turn_context: 每轮附加上下文的生成函数，结果只追加到请求中的本轮用户消息末尾
+    """
+    model_id = model_id or os.getenv("OPENAI_MODEL", "kimi-k2.5")
+    api_key = api_key or os.getenv("OPENAI_API_KEY", "")
+    base_url = base_url or os.getenv("OPENAI_BASE_URL", "https://kspmas.ksyun.com/v1")
+    routes = parse_router_models(LLM_ROUTER_MODELS)
+    if not routes:
+        return InstrumentedOpenAILike(
+            id=model_id, api_key=api_key, base_url=base_url,
+            max_retries=LLM_MAX_RETRIES, history_token_budget=history_token_budget,
+            turn_context=turn_context,
+        )
+
+    # 首选模型排在第一位，统计相同时优先选择它
+    if all(route_id != model_id for route_id, _ in routes):
+        routes.insert(0, (model_id, None))
+    routes.sort(key=lambda route: route[0] != model_id)
+    candidates = [
+        InstrumentedOpenAILike(
+            id=route_id, api_key=api_key, base_url=route_url or base_url,
+            max_retries=LLM_MAX_RETRIES, history_token_budget=history_token_budget,
+            turn_context=turn_context,
+        )
+        for route_id, route_url in routes
+    ]
+    return RouterModel(id=model_id, candidates=candidates, hedge_after=LLM_HEDGE_AFTER)
@@ -0,0 +1,264 @@
+"""
+Web Builder Agent - 模型响应磁盘缓存
+同一 Skill 的重试（user_input 为空）、回归重跑等场景会发出完全相同的模型请求。
+ResponseCache 在 OpenAI 客户端的 chat.completions.create 外层缓存响应：
+- 键：模型 ID + 归一化后的请求参数（messages / tools / response_format 等）的 sha256
+  归一化会把每次运行都不同的内容替换为占位符：run_id（及包含它的 workdir 路径）、当前时间、
+  工具摘要中的命令耗时与构建耗时
+- 值：非流式响应的完整 JSON，或流式响应的全部 chunk；响应中的 run_id 同样存为占位符，
+  回放时替换为当前运行的 run_id
+- 淘汰：超过 LLM_CACHE_MAX_AGE_DAYS 的条目失效；总大小超过 LLM_CACHE_MAX_MB 时按最近使用时间淘汰
+
+模式（LLM_CACHE）：
+  off     不缓存（默认）
+  on      命中则回放，未命中则请求模型并写入缓存
+  replay  只回放，未命中时抛出 LLMCacheMiss，用于确定性地快速重放整次工作流
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from agno.utils.log import logger
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
+LLM_CACHE_MODE = os.getenv("LLM_CACHE", "off").lower()
+LLM_CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", str(BASE_DIR / "tmp" / "llm_cache")))
+LLM_CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 ** 2)
+LLM_CACHE_MAX_AGE = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "7")) * 86400
+# 每写入多少个条目执行一次容量淘汰
+EVICT_EVERY = 32
+
+RUN_ID_PLACEHOLDER = "{{RUN_ID}}"
+_RUN_ID_RE = re.compile(r"run_id: ([\w-]+)")
+_WORKDIR_RE = re.compile(re.escape(str(BASE_DIR / "workspace")) + r"/([\w-]+)")
+_VOLATILE_RE = re.compile(r"current_time: [^\n\"\\]*")
+# 工具摘要里每次执行都不同的耗时：CommandResult 的 "duration: 1.2s"、vite 的 "built in 850ms"
+_DURATION_RE = re.compile(r"(duration: |built in )\d+(?:\.\d+)?m?s")
+
+
+class LLMCacheMiss(RuntimeError):
+    """replay 模式下请求未命中缓存"""
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class ResponseCache:
+    """以文件为单位存储的模型响应缓存（线程 / 进程安全：写入先写临时文件再 rename）"""
+
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        mode: str | None = None,
+        max_bytes: int | None = None,
+        max_age: float | None = None,
+    ):
+        self.cache_dir = Path(cache_dir or LLM_CACHE_DIR)
+        self.mode = mode or LLM_CACHE_MODE
+        if self.mode not in ("off", "on", "replay"):
+            raise ValueError(f"未知的 LLM_CACHE 模式: {self.mode}")
+        self.max_bytes = LLM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.max_age = LLM_CACHE_MAX_AGE if max_age is None else max_age
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    # -------------------------------------------------------------------
+    # 键
+    # -------------------------------------------------------------------
+
+    @staticmethod
+    def make_key(model_id: str, params: dict) -> tuple[str, str | None]:
+        """
+        计算请求的缓存键。
+
+        Returns:
+            (键, 请求中出现的 run_id)；run_id 在键中已替换为占位符
+        """
+        text = _dumps({k: v for k, v in params.items() if k not in ("model", "stream")})
+        match = _RUN_ID_RE.search(text) or _WORKDIR_RE.search(text)
+        run_id = match.group(1) if match else None
+        if run_id:
+            text = text.replace(run_id, RUN_ID_PLACEHOLDER)
+        # 其余出现的 run_id（如历史消息中其他运行的）同样归一化
+        text = _RUN_ID_RE.sub(f"run_id: {RUN_ID_PLACEHOLDER}", text)
+        text = _WORKDIR_RE.sub(lambda m: m.group(0).replace(m.group(1), RUN_ID_PLACEHOLDER), text)
+        text = _VOLATILE_RE.sub("current_time: *", text)
+        text = _DURATION_RE.sub(r"\1*", text)
+        digest = hashlib.sha256(f"{model_id}\0{bool(params.get('stream'))}\0{text}".encode("utf-8"))
+        return digest.hexdigest(), run_id
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    # -------------------------------------------------------------------
+    # 读写
+    # -------------------------------------------------------------------
+
+    def get(self, key: str, run_id: str | None) -> dict | None:
+        path = self._path(key)
+        try:
+            st = path.stat()
+            if time.time() - st.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                raise FileNotFoundError(path)
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # 更新 mtime 作为最近使用时间，供容量淘汰使用
+        os.utime(path)
+        self.hits += 1
+        if run_id:
+            text = text.replace(RUN_ID_PLACEHOLDER, run_id)
+        return json.loads(text)
+
+    def put(self, key: str, run_id: str | None, entry: dict) -> None:
+        text = _dumps(entry)
+        if run_id:
+            text = text.replace(run_id, RUN_ID_PLACEHOLDER)
+        path = self._path(key)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            tmp.unlink(missing_ok=True)
+            logger.warning(f"[LLMCache] 写入失败: {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """删除过期条目，总大小超出上限时按最近使用时间从旧到新删除，返回删除的条目数"""
+        if not self.cache_dir.exists():
+            return 0
+        now = time.time()
+        entries, removed, total = [], 0, 0
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - st.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                removed += 1
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"[LLMCache] 淘汰 {removed} 个条目 | 剩余={total / 1024 ** 2:.1f}MB")
+        return removed
+
+    def _miss(self, model_id: str, key: str) -> None:
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"回放模式下缓存未命中 | model={model_id} | key={key[:16]}")
+
+
+# ---------------------------------------------------------------------------
+# OpenAI 客户端包装
+# ---------------------------------------------------------------------------
+
+class CachedCompletions:
+    """包装同步客户端的 chat.completions，create() 先查缓存"""
+
+    def __init__(self, inner, cache: ResponseCache):
+        self._inner = inner
+        self._cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def create(self, **params):
+        model_id = params.get("model", "")
+        key, run_id = self._cache.make_key(model_id, params)
+        entry = self._cache.get(key, run_id)
+        if entry is not None:
+            logger.debug(f"[LLMCache] 命中 | model={model_id} | key={key[:16]}")
+            if params.get("stream"):
+                return iter([ChatCompletionChunk.model_validate(c) for c in entry["chunks"]])
+            return ChatCompletion.model_validate(entry["response"])
+        self._cache._miss(model_id, key)
+
+        response = self._inner.create(**params)
+        if not params.get("stream"):
+            self._cache.put(key, run_id, {"model": model_id, "response": response.model_dump()})
+            return response
+        return self._record_stream(response, model_id, key, run_id)
+
+    def _record_stream(self, stream, model_id, key, run_id):
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk.model_dump())
+            yield chunk
+        # 只缓存被完整消费的流
+        self._cache.put(key, run_id, {"model": model_id, "chunks": chunks})
+
+
+class AsyncCachedCompletions(CachedCompletions):
+    """包装异步客户端的 chat.completions"""
+
+    async def create(self, **params):
+        model_id = params.get("model", "")
+        key, run_id = self._cache.make_key(model_id, params)
+        entry = self._cache.get(key, run_id)
+        if entry is not None:
+            logger.debug(f"[LLMCache] 命中 | model={model_id} | key={key[:16]}")
+            if params.get("stream"):
+                return _replay_async([ChatCompletionChunk.model_validate(c) for c in entry["chunks"]])
+            return ChatCompletion.model_validate(entry["response"])
+        self._cache._miss(model_id, key)
+
+        response = await self._inner.create(**params)
+        if not params.get("stream"):
+            self._cache.put(key, run_id, {"model": model_id, "response": response.model_dump()})
+            return response
+        return self._arecord_stream(response, model_id, key, run_id)
+
+    async def _arecord_stream(self, stream, model_id, key, run_id):
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk.model_dump())
+            yield chunk
+        self._cache.put(key, run_id, {"model": model_id, "chunks": chunks})
+
+
+async def _replay_async(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def install_cache(client, cache: ResponseCache, is_async: bool = False):
+    """把缓存挂到 OpenAI 客户端的 chat.completions 上（cache 未启用时原样返回）"""
+    if cache.enabled:
+        wrapper = AsyncCachedCompletions if is_async else CachedCompletions
+        client.chat.completions = wrapper(client.chat.completions, cache)
+    return client
+
+
+# 进程级共享实例
+response_cache = ResponseCache()
@@ -0,0 +1,81 @@
+"""
+Web Builder Agent - 工作目录内容哈希清单
+在每个阶段边界对 workdir 做一次内容快照（相对路径 → sha256），
+通过前后两次快照的差异得知 Developer 实际改动了哪些文件，供 QA 增量复审使用。
+"""
+import hashlib
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+# 依赖目录、构建产物与命令日志，不计入清单（也是 QA 审查、静态预检跳过的目录）
+SKIPPED_DIRS = {"node_modules", "dist", ".git", ".vite", ".agent-logs"}
+# lockfile 体积大且不由 Agent 编写，QA 审查与项目快照都跳过
+SKIPPED_FILES = {"package-lock.json", "pnpm-lock.yaml", "yarn.lock"}
+
+Manifest = dict[str, str]
+
+
+@dataclass
+class ManifestDiff:
+    """两次快照之间的文件差异"""
+    added: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> list[str]:
+        """新增或修改的文件（需要重新审查的文件）"""
+        return sorted(self.added + self.modified)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(workdir: str | Path) -> Manifest:
+    """对 workdir 生成内容哈希清单，跳过依赖目录与构建产物"""
+    workdir = Path(workdir)
+    manifest: Manifest = {}
+    if not workdir.exists():
+        return manifest
+    # 用 os.walk 在进入之前剪掉跳过的目录，不再遍历 node_modules 内的数万个文件
+    for root, dirs, files in os.walk(workdir):
+        dirs[:] = [d for d in dirs if d not in SKIPPED_DIRS]
+        for name in files:
+            path = Path(root) / name
+            if path.is_file():
+                manifest[path.relative_to(workdir).as_posix()] = hash_file(path)
+    return dict(sorted(manifest.items()))
+
+
+def diff_manifests(old: Manifest, new: Manifest) -> ManifestDiff:
+    """比较两次快照"""
+    return ManifestDiff(
+        added=sorted(set(new) - set(old)),
+        modified=sorted(p for p in set(old) & set(new) if old[p] != new[p]),
+        removed=sorted(set(old) - set(new)),
+    )
+
+
+def normalize_path(path: str, workdir: str | Path) -> str:
+    """
+    把 QA 报告中的文件路径归一化为清单中的相对路径：
+    去掉首尾空白、"./" 前缀与 workdir 前缀（绝对路径或相对路径写法），统一使用 "/"
+    """
+    path = path.strip().replace("\\", "/")
+    for prefix in (Path(workdir).resolve().as_posix(), Path(workdir).as_posix()):
+        if path.startswith(prefix + "/"):
+            path = path[len(prefix) + 1:]
+            break
+    while path.startswith("./"):
+        path = path.removeprefix("./")
+    return path
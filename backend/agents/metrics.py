@@ -0,0 +1,405 @@
+"""
+Web Builder Agent - 运行指标
+进程内的轻量指标收集：
+- Prometheus 风格的进程级指标（metrics_registry）：阶段耗时、模型请求延迟（首 token / 总耗时）、
+  prompt / completion / cached token（cached 为命中服务端前缀缓存的 prompt token）、
+  各工具（含 npm install / build）的调用次数与耗时，由 AgentOS 应用的 /metrics/prometheus 端点导出
+- 单次运行的汇总（RunMetrics）：工作流运行期间绑定到上下文，写入交付 JSON 的 metrics 区块
+"""
+import abc
+import threading
+import time
+from contextvars import Context, ContextVar, Token
+from dataclasses import dataclass
+from typing import Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+# ---------------------------------------------------------------------------
+# Prometheus 风格的指标注册表
+# ---------------------------------------------------------------------------
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# 覆盖从毫秒级工具调用到数分钟的 npm install / 模型长输出
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    type = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} 需要标签 {self.label_names}，实际为 {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}", *self._samples()]
+
+    @abc.abstractmethod
+    def _samples(self) -> list[str]:
+        """当前所有样本行（不含 HELP / TYPE）"""
+
+    @abc.abstractmethod
+    def reset(self) -> None:
+        """清空所有样本"""
+
+
+class CounterMetric(_Metric):
+    """只增不减的计数器"""
+    type = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}"
+                for k, v in sorted(self._values.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class GaugeMetric(CounterMetric):
+    """可增可减的当前值"""
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class HistogramMetric(_Metric):
+    """分桶直方图（累计桶 + sum + count）"""
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values: dict[tuple[str, ...], list] = {}  # 标签 → [各桶计数, sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, n in zip(self.buckets, counts):
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {n}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(round(total, 6))}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class MetricsRegistry:
+    """进程内指标注册表，render() 输出 Prometheus 文本格式"""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> CounterMetric:
+        return self._register(CounterMetric(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> GaugeMetric:
+        return self._register(GaugeMetric(name, help_text, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> HistogramMetric:
+        return self._register(HistogramMetric(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for m in metrics for line in m.render()) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+# 进程级共享实例
+metrics_registry = MetricsRegistry()
+
+RUNS_TOTAL = metrics_registry.counter(
+    "webbuilder_runs_total", "已结束的工作流运行数", ("status",))
+RUNS_IN_PROGRESS = metrics_registry.gauge(
+    "webbuilder_runs_in_progress", "正在执行的工作流运行数")
+PHASE_SECONDS = metrics_registry.histogram(
+    "webbuilder_phase_duration_seconds", "工作流各阶段耗时", ("phase",))
+MODEL_REQUESTS_TOTAL = metrics_registry.counter(
+    "webbuilder_model_requests_total", "模型请求数", ("model", "status"))
+MODEL_TTFT_SECONDS = metrics_registry.histogram(
+    "webbuilder_model_time_to_first_token_seconds", "模型请求首 token 延迟（非流式为完整响应耗时）", ("model",))
+MODEL_REQUEST_SECONDS = metrics_registry.histogram(
+    "webbuilder_model_request_duration_seconds", "模型请求总耗时", ("model",))
+MODEL_TOKENS_TOTAL = metrics_registry.counter(
+    "webbuilder_model_tokens_total", "模型 token 数（kind: prompt / completion / cached）", ("model", "kind"))
+TOOL_CALLS_TOTAL = metrics_registry.counter(
+    "webbuilder_tool_calls_total", "工具调用次数", ("tool", "status"))
+TOOL_SECONDS = metrics_registry.histogram(
+    "webbuilder_tool_duration_seconds", "工具调用耗时", ("tool",))
+
+
+# ---------------------------------------------------------------------------
+# 单次运行的指标
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ToolUsage:
+    calls: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class ModelUsage:
+    requests: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    ttft_seconds: float = 0.0  # 累计，求平均用
+    ttft_max: float = 0.0
+    request_seconds: float = 0.0
+
+
+class RunMetrics:
+    """
+    一次工作流运行的指标汇总，写入交付 JSON 的 metrics 区块。
+
+    通过 bind_run_metrics() 绑定到当前上下文后，模型请求与工具调用的记录函数
+    会同时累加到这里（asyncio 任务与 copy_context 的线程自动继承绑定）。
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.status = "success"  # 运行结束时计入 webbuilder_runs_total 的状态
+        self.phases: dict[str, float] = {}
+        self.model = ModelUsage()
+        self.tools: dict[str, ToolUsage] = {}
+        self._lock = threading.Lock()
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def add_model_request(self, ttft: float | None, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.model.requests += 1
+            self.model.errors += 0 if ok else 1
+            self.model.request_seconds += seconds
+            if ttft is not None:
+                self.model.ttft_seconds += ttft
+                self.model.ttft_max = max(self.model.ttft_max, ttft)
+
+    def add_model_tokens(self, prompt: int, completion: int, cached: int) -> None:
+        with self._lock:
+            self.model.prompt_tokens += prompt
+            self.model.completion_tokens += completion
+            self.model.cached_tokens += cached
+
+    def add_tool_call(self, tool: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            usage = self.tools.setdefault(tool, ToolUsage())
+            usage.calls += 1
+            usage.errors += 0 if ok else 1
+            usage.seconds += seconds
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            model = self.model
+            ok_requests = model.requests - model.errors
+            return {
+                "total_seconds": round(time.perf_counter() - self.started, 3),
+                "phases": {p: round(s, 3) for p, s in self.phases.items()},
+                "model": {
+                    "requests": model.requests,
+                    "errors": model.errors,
+                    "prompt_tokens": model.prompt_tokens,
+                    "completion_tokens": model.completion_tokens,
+                    "cached_tokens": model.cached_tokens,
+                    "ttft_avg": round(model.ttft_seconds / ok_requests, 3) if ok_requests else None,
+                    "ttft_max": round(model.ttft_max, 3),
+                    "request_seconds": round(model.request_seconds, 3),
+                },
+                "tools": {
+                    name: {"calls": u.calls, "errors": u.errors, "seconds": round(u.seconds, 3)}
+                    for name, u in sorted(self.tools.items())
+                },
+            }
+
+
+_current_run: ContextVar["RunMetrics | None"] = ContextVar("webbuilder_run_metrics", default=None)
+
+
+def bind_run_metrics(run_metrics: RunMetrics) -> Token:
+    """把 run_metrics 绑定到当前上下文（运行开始时调用）"""
+    RUNS_IN_PROGRESS.inc()
+    return _current_run.set(run_metrics)
+
+
+def unbind_run_metrics(token: Token, status: str) -> None:
+    """运行结束：解除绑定并按状态计数"""
+    RUNS_IN_PROGRESS.dec()
+    RUNS_TOTAL.inc(status=status)
+    try:
+        _current_run.reset(token)
+    except ValueError:
+        # 生成器在其他上下文中被关闭（如被垃圾回收）时无法 reset，直接清空
+        _current_run.set(None)
+
+
+def current_run_metrics() -> RunMetrics | None:
+    return _current_run.get()
+
+
+def iter_in_context(context: Context, iterator: Iterator[T]) -> Iterator[T]:
+    """
+    在 context 中逐步驱动同步生成器：每次恢复执行都在该上下文内进行，
+    生成器里绑定的运行指标只在其执行期间可见，不会在 yield 之间泄漏到调用方的上下文。
+    """
+    try:
+        while True:
+            try:
+                item = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            context.run(close)
+
+
+# ---------------------------------------------------------------------------
+# 记录入口（同时写入进程级指标与当前运行的汇总）
+# ---------------------------------------------------------------------------
+
+def observe_phase(phase: str, seconds: float) -> None:
+    PHASE_SECONDS.observe(seconds, phase=phase)
+    run = _current_run.get()
+    if run is not None:
+        run.add_phase(phase, seconds)
+
+
+def observe_model_request(model: str, ttft: float | None, seconds: float, ok: bool) -> None:
+    MODEL_REQUESTS_TOTAL.inc(model=model, status="ok" if ok else "error")
+    if ok:
+        MODEL_REQUEST_SECONDS.observe(seconds, model=model)
+        if ttft is not None:
+            MODEL_TTFT_SECONDS.observe(ttft, model=model)
+    run = _current_run.get()
+    if run is not None:
+        run.add_model_request(ttft if ok else None, seconds, ok)
+
+
+def observe_model_tokens(model: str, prompt: int, completion: int, cached: int) -> None:
+    MODEL_TOKENS_TOTAL.inc(prompt, model=model, kind="prompt")
+    MODEL_TOKENS_TOTAL.inc(completion, model=model, kind="completion")
+    MODEL_TOKENS_TOTAL.inc(cached, model=model, kind="cached")
+    run = _current_run.get()
+    if run is not None:
+        run.add_model_tokens(prompt, completion, cached)
+
+
+def tool_label(tool_name: str | None, tool_args: dict | None) -> str:
+    """工具指标的标签：通过 shell 执行的 npm install / build 归入 npm_install / npm_build"""
+    args = (tool_args or {}).get("args")
+    if isinstance(args, list) and args[:1] == ["npm"]:
+        if args[1:2] and args[1] in ("install", "ci", "i"):
+            return "npm_install"
+        if "build" in args:
+            return "npm_build"
+    return tool_name or "unknown"
+
+
+def observe_tool_call(tool: str, seconds: float, ok: bool) -> None:
+    TOOL_CALLS_TOTAL.inc(tool=tool, status="ok" if ok else "error")
+    TOOL_SECONDS.observe(seconds, tool=tool)
+    run = _current_run.get()
+    if run is not None:
+        run.add_tool_call(tool, seconds, ok)
+
+
+def record_agent_tools(run_output) -> None:
+    """
+    Agent 的 post_hook：记录本次 Agent 运行中的全部工具调用。
+
+    agno 的 tool_hooks 在同步 / 异步执行路径上对钩子类型的要求不同，
+    post_hook 在 run / arun、流式 / 非流式下都以同步方式调用，且能拿到每次调用的耗时。
+    """
+    for tool in getattr(run_output, "tools", None) or []:
+        duration = getattr(tool.metrics, "duration", None) if tool.metrics else None
+        observe_tool_call(tool_label(tool.tool_name, tool.tool_args), duration or 0.0, not tool.tool_call_error)
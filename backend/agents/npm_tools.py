@@ -0,0 +1,80 @@
+"""
+Web Builder Agent - npm 工具集
+为 Developer Agent 提供带缓存的依赖安装工具，替代通过 ShellTools 直接执行 npm install：
+- 依赖指纹命中共享缓存时，硬链接物化 node_modules，不再下载
+- 未命中时执行 npm install，并把结果写入缓存供后续运行复用
+- 构建走 agents.build_cache：源码未变化时直接返回上次的构建结果
+- 完整输出写入工作目录下的日志文件，只返回退出码、错误摘录与尾部（agents.shell_tools）
+"""
+from pathlib import Path
+
+from agno.tools import Toolkit
+from agno.utils.log import logger
+
+from agents.build_cache import run_build
+from agents.deps_cache import dependency_key, materialize_node_modules, store_node_modules
+from agents.shell_tools import log_path_for, run_logged
+
+
+NPM_INSTALL_TIMEOUT = 600
+
+
+class NpmTools(Toolkit):
+    """限定在 base_dir 内执行的 npm 工具"""
+
+    def __init__(self, base_dir: str | Path, **kwargs):
+        self.base_dir = Path(base_dir)
+        super().__init__(
+            name="npm_tools",
+            tools=[self.npm_install, self.npm_build],
+            instructions=(
+                "安装依赖时必须调用 npm_install 工具，构建检查时必须调用 npm_build 工具，"
+                "不要通过 shell 执行 npm install / npm run build。"
+            ),
+            add_instructions=True,
+            **kwargs,
+        )
+
+    def npm_install(self) -> str:
+        """
+        在项目目录中安装依赖（等价于 npm install，命中共享缓存时秒级完成）。
+        需要先写好 package.json。
+
+        Returns:
+            安装结果：exit_code 与输出摘要
+        """
+        if not (self.base_dir / "package.json").exists():
+            return "exit_code: 1\nerror: package.json 不存在，请先创建 package.json"
+
+        key = dependency_key(self.base_dir)
+        if materialize_node_modules(self.base_dir):
+            return f"exit_code: 0\n依赖已从本地缓存恢复（key={key}）"
+
+        logger.info(f"[NpmTools] npm install | cwd={self.base_dir}")
+        result = run_logged(
+            ["npm", "install", "--no-audit", "--no-fund"],
+            self.base_dir,
+            log_path_for(self.base_dir, "npm-install"),
+            NPM_INSTALL_TIMEOUT,
+        )
+        if result.exit_code == 0:
+            store_node_modules(self.base_dir, key)
+        return result.summary(self.base_dir)
+
+    def npm_build(self) -> str:
+        """
+        在项目目录中执行构建检查（等价于 npm run build，源码未变化时直接返回上次结果）。
+
+        Returns:
+            构建结果：exit_code 与日志摘要
+        """
+        if not (self.base_dir / "package.json").exists():
+            return "exit_code: 1\nerror: package.json 不存在，请先创建 package.json"
+
+        result = run_build(self.base_dir)
+        header = f"exit_code: {result.exit_code}"
+        if result.cached:
+            header += "\n源码未变化，复用上次构建结果"
+        elif result.log_file:
+            header += f"\nlog: {result.log_file}（完整日志，可用 read_log 查看）"
+        return f"{header}\n{result.log_summary}"
@@ -0,0 +1,96 @@
+"""
+Web Builder Agent - Agent 实例池
+每次运行都重新创建 Developer / QA Agent 会重复构造模型客户端与工具对象。
+AgentPool 把运行结束的 Agent 按类型保留下来，下一个运行取出后重新绑定到新的 workdir：
+- 工具（FileTools / CompactShellTools / NpmTools）在调用时读取 base_dir，重绑定只需替换该属性
+- 清空会话状态（session_id / 缓存会话），避免上一个运行的上下文泄漏到下一个运行
+- 模型实例与其 OpenAI 客户端随 Agent 一起复用，底层连接来自 agents.llm 的共享连接池
+- 每个 Agent 记录创建时的注册表版本；提示词 / 知识库热更新后，旧版本的 Agent 不再复用，
+  由工厂按新的 system_message 重建
+
+同一个 Agent 同一时刻只会被一个运行持有；池空时调用工厂新建。
+"""
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable
+
+from agno.agent import Agent
+from agno.utils.log import logger
+
+from agents.registry import registry
+
+
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "8"))
+
+
+def rebind_agent(agent: Agent, workdir: str | Path) -> Agent:
+    """把 Agent 的工具重新绑定到 workdir，并清空上一个运行的会话状态"""
+    workdir = Path(workdir).resolve()
+    for tool in agent.tools or []:
+        if hasattr(tool, "base_dir"):
+            tool.base_dir = workdir
+    agent.session_id = None
+    agent._cached_session = None
+    return agent
+
+
+def _version_of(agent: Agent) -> int | None:
+    return getattr(agent, "_registry_version", None)
+
+
+class AgentPool:
+    """按键（如 "developer" / "qa"）保存空闲 Agent 的线程安全池"""
+
+    def __init__(self, max_idle: int | None = None):
+        """
+        Args:
+            max_idle: 每个键最多保留的空闲 Agent 数（默认读取 AGENT_POOL_SIZE，0 表示不池化）
+        """
+        self.max_idle = AGENT_POOL_SIZE if max_idle is None else max_idle
+        self._idle: dict[str, list[Agent]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, key: str, workdir: str | Path, factory: Callable[..., Agent]) -> Agent:
+        """
+        取出一个绑定到 workdir 的 Agent，池中没有空闲实例时调用 factory(workdir=workdir) 新建。
+        注册表版本变化（提示词热更新）前创建的空闲 Agent 会被丢弃。
+        """
+        version = registry.refresh()
+        with self._lock:
+            idle = self._idle[key]
+            stale = [a for a in idle if _version_of(a) != version]
+            if stale:
+                idle[:] = [a for a in idle if _version_of(a) == version]
+                logger.info(f"[AgentPool] 提示词已更新，丢弃 {len(stale)} 个旧 Agent | key={key}")
+            agent = idle.pop() if idle else None
+            if agent is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if agent is None:
+            agent = factory(workdir=workdir)
+            agent._registry_version = version
+            return agent
+        logger.debug(f"[AgentPool] 复用 Agent | key={key} | workdir={workdir}")
+        return rebind_agent(agent, workdir)
+
+    def release(self, key: str, agent: Agent | None) -> None:
+        """运行结束后归还 Agent；池已满时直接丢弃"""
+        if agent is None:
+            return
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.max_idle and all(a is not agent for a in idle):
+                idle.append(agent)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._idle.clear()
+
+
+# 进程级共享实例
+agent_pool = AgentPool()
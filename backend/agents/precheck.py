@@ -0,0 +1,301 @@
+"""
+Web Builder Agent - 静态预检
+在 LLM QA 之前对工作目录做一次确定性的规则扫描，直接产出 QAIssue：
+1. Skill 约束类：禁止 emoji 图标、禁止调用外部 API（仅当 Skill constraints 声明时启用）
+2. 可访问性：<img> 缺少 alt、纯图标按钮缺少 aria-label
+3. React 实践：列表渲染缺少 key
+4. 性能：整库导入 / 引入重量级依赖
+
+规则全部基于正则，单次遍历项目文件，耗时为毫秒级；
+Workflow 据此在项目干净时缩小甚至跳过 LLM QA 调用。
+"""
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from models.schemas import QAIssue, QAReport
+from agents.qa import SEVERITY_PENALTY, SKIPPED_DIRS, _same_issue, merge_qa_reports
+
+
+# 需要扫描的源码后缀
+SOURCE_SUFFIXES = {".ts", ".tsx", ".js", ".jsx", ".html", ".css"}
+MARKUP_SUFFIXES = {".tsx", ".jsx", ".html"}
+SCRIPT_SUFFIXES = {".ts", ".tsx", ".js", ".jsx"}
+
+# 常见 emoji 区段（表情、符号、交通、补充符号、区域旗帜）。
+# 杂项符号与 Dingbats（U+2600–27BF）中大多是 ★ ✓ ✕ ➜ 这类文本符号，
+# 只匹配其中默认以 emoji 呈现的字符，以及后接 VS16（U+FE0F）的 emoji 变体
+EMOJI_RE = re.compile(
+    "[\U0001F1E6-\U0001F1FF\U0001F300-\U0001F5FF\U0001F600-\U0001F64F\U0001F680-\U0001F6FF"
+    "\U0001F900-\U0001F9FF\U0001FA70-\U0001FAFF"
+    "\u2614\u2615\u2648-\u2653\u267F\u2693\u26A1\u26AA\u26AB\u26BD\u26BE\u26C4\u26C5"
+    "\u26CE\u26D4\u26EA\u26F2\u26F3\u26F5\u26FA\u26FD\u2705\u270A\u270B\u2728\u274C"
+    "\u274E\u2753-\u2755\u2757\u2795-\u2797\u27B0\u27BF\u2B50\u2B55]"
+    "|[\u2600-\u27BF]\uFE0F"
+)
+EXTERNAL_API_RE = re.compile(
+    r"""fetch\(\s*[`'"]https?://|\baxios\b|new\s+XMLHttpRequest|new\s+WebSocket\(|new\s+EventSource\("""
+)
+# JSX 属性片段：允许属性值中出现 {...}（含一层嵌套），如 onClick={() => {}}
+JSX_ATTRS = r"(?:[^>{]|\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})*"
+IMG_TAG_RE = re.compile(rf"<img\b{JSX_ATTRS}>", re.S)
+ICON_BUTTON_RE = re.compile(rf"<button\b({JSX_ATTRS})>\s*<svg\b", re.S)
+MAP_JSX_RE = re.compile(rf"\.map\(\s*(?:\([^)]*\)|\w+)\s*=>\s*(?:\(\s*)?<([A-Za-z][\w.]*)({JSX_ATTRS})>", re.S)
+NAMESPACE_IMPORT_RE = re.compile(r"""import\s+\*\s+as\s+\w+\s+from\s+['"]([^./'"][^'"]*)['"]""")
+DEFAULT_IMPORT_RE = re.compile(r"""import\s+\w+\s+from\s+['"]([^./'"][^'"]*)['"]""")
+
+# 重量级依赖：出现在 package.json 或被整库导入时提示
+HEAVY_PACKAGES = {"moment", "lodash", "jquery", "antd", "@mui/material", "rxjs", "three"}
+
+
+@dataclass
+class PrecheckResult:
+    """静态预检结果"""
+    issues: list[QAIssue] = field(default_factory=list)
+    checks: list[str] = field(default_factory=list)
+    files_scanned: int = 0
+    duration: float = 0.0
+
+    @property
+    def clean(self) -> bool:
+        return not self.issues
+
+    @property
+    def has_critical(self) -> bool:
+        return any(i.severity == "critical" for i in self.issues)
+
+
+# ---------------------------------------------------------------------------
+# 规则
+# ---------------------------------------------------------------------------
+
+def _line_of(text: str, pos: int) -> int:
+    return text.count("\n", 0, pos) + 1
+
+
+def _issue(severity: str, category: str, path: str, description: str, suggestion: str) -> QAIssue:
+    return QAIssue(
+        severity=severity,
+        category=category,
+        file_path=path,
+        description=description,
+        suggestion=suggestion,
+    )
+
+
+def check_emoji(path: str, suffix: str, text: str) -> list[QAIssue]:
+    match = EMOJI_RE.search(text)
+    if not match:
+        return []
+    return [_issue(
+        "critical", "ui-ux", path,
+        f"第 {_line_of(text, match.start())} 行使用了 emoji（{match.group()}），违反 Skill 约束",
+        "改用内联 SVG 图标",
+    )]
+
+
+def check_external_api(path: str, suffix: str, text: str) -> list[QAIssue]:
+    if suffix not in SCRIPT_SUFFIXES and suffix != ".html":
+        return []
+    match = EXTERNAL_API_RE.search(text)
+    if not match:
+        return []
+    return [_issue(
+        "critical", "react-practices", path,
+        f"第 {_line_of(text, match.start())} 行调用了外部网络接口（{match.group().strip()}），违反 Skill 约束",
+        "改为使用本地硬编码数据",
+    )]
+
+
+def check_img_alt(path: str, suffix: str, text: str) -> list[QAIssue]:
+    if suffix not in MARKUP_SUFFIXES:
+        return []
+    issues = []
+    for match in IMG_TAG_RE.finditer(text):
+        if not re.search(r"\balt\s*=", match.group()):
+            issues.append(_issue(
+                "critical", "accessibility", path,
+                f"第 {_line_of(text, match.start())} 行 <img> 缺少 alt 属性",
+                '补充描述性 alt 文本，装饰性图片使用 alt=""',
+            ))
+    return issues
+
+
+def check_icon_button_label(path: str, suffix: str, text: str) -> list[QAIssue]:
+    if suffix not in MARKUP_SUFFIXES:
+        return []
+    issues = []
+    for match in ICON_BUTTON_RE.finditer(text):
+        attrs = match.group(1)
+        if "aria-label" not in attrs and "aria-labelledby" not in attrs and "title=" not in attrs:
+            # 按钮内若 SVG 之后还有可见文字，则不算纯图标按钮
+            end = text.find("</button>", match.end())
+            if end == -1:
+                continue
+            inner = re.sub(r"<svg\b.*?</svg>", "", text[match.end() - 4:end], flags=re.S)
+            if not re.sub(r"<[^>]+>|\{[^}]*\}", "", inner).strip():
+                issues.append(_issue(
+                    "warning", "accessibility", path,
+                    f"第 {_line_of(text, match.start())} 行纯图标按钮缺少 aria-label",
+                    "为按钮添加 aria-label 描述其用途",
+                ))
+    return issues
+
+
+def check_list_key(path: str, suffix: str, text: str) -> list[QAIssue]:
+    if suffix not in (".tsx", ".jsx"):
+        return []
+    issues = []
+    for match in MAP_JSX_RE.finditer(text):
+        tag, attrs = match.group(1), match.group(2)
+        if tag != "Fragment" and not re.search(r"\bkey\s*=", attrs):
+            issues.append(_issue(
+                "warning", "react-practices", path,
+                f"第 {_line_of(text, match.start())} 行列表渲染 <{tag}> 缺少 key",
+                "为列表项添加稳定且唯一的 key（如 item.id），不要使用数组下标",
+            ))
+    return issues
+
+
+def check_heavy_imports(path: str, suffix: str, text: str) -> list[QAIssue]:
+    if suffix not in SCRIPT_SUFFIXES:
+        return []
+    issues = []
+    for match in NAMESPACE_IMPORT_RE.finditer(text):
+        if match.group(1) not in ("react", "react-dom"):
+            issues.append(_issue(
+                "warning", "performance", path,
+                f"第 {_line_of(text, match.start())} 行整库导入 {match.group(1)}（import * as）",
+                "改为按需具名导入，便于 Tree Shaking",
+            ))
+    for match in DEFAULT_IMPORT_RE.finditer(text):
+        if match.group(1) in HEAVY_PACKAGES:
+            issues.append(_issue(
+                "warning", "performance", path,
+                f"第 {_line_of(text, match.start())} 行导入重量级依赖 {match.group(1)}",
+                "使用原生 API 或按需导入的轻量替代",
+            ))
+    return issues
+
+
+def check_package_json(workdir: Path) -> list[QAIssue]:
+    path = workdir / "package.json"
+    if not path.exists():
+        return []
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (ValueError, OSError):
+        return [_issue(
+            "critical", "performance", "package.json",
+            "package.json 无法解析", "修复 package.json 的 JSON 语法",
+        )]
+    heavy = sorted(HEAVY_PACKAGES & set(data.get("dependencies", {})))
+    if not heavy:
+        return []
+    return [_issue(
+        "warning", "performance", "package.json",
+        f"引入了重量级依赖: {', '.join(heavy)}",
+        "移除或替换为更轻量的实现",
+    )]
+
+
+# (名称, 规则函数, 是否仅在 Skill 约束声明时启用的关键字)
+FileCheck = Callable[[str, str, str], list[QAIssue]]
+FILE_CHECKS: list[tuple[str, FileCheck, str | None]] = [
+    ("emoji", check_emoji, "emoji"),
+    ("external-api", check_external_api, "外部 API"),
+    ("img-alt", check_img_alt, None),
+    ("icon-button-label", check_icon_button_label, None),
+    ("list-key", check_list_key, None),
+    ("heavy-imports", check_heavy_imports, None),
+]
+
+
+# ---------------------------------------------------------------------------
+# 入口
+# ---------------------------------------------------------------------------
+
+def run_precheck(workdir: str | Path, skill: dict | None = None) -> PrecheckResult:
+    """
+    单次遍历 workdir，执行所有启用的规则。
+
+    Args:
+        workdir: 项目工作目录
+        skill: Skill 规格；约束类规则仅在其 constraints 声明了对应约束时启用
+    """
+    start = time.perf_counter()
+    workdir = Path(workdir)
+    constraints = " ".join(str(c) for c in (skill or {}).get("constraints", []))
+    checks = [
+        (name, fn) for name, fn, keyword in FILE_CHECKS
+        if keyword is None or keyword in constraints
+    ]
+
+    result = PrecheckResult(checks=[name for name, _ in checks] + ["package-json"])
+    for path in sorted(workdir.rglob("*")):
+        rel = path.relative_to(workdir)
+        if any(part in SKIPPED_DIRS for part in rel.parts):
+            continue
+        if not path.is_file() or path.suffix not in SOURCE_SUFFIXES:
+            continue
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (UnicodeDecodeError, OSError):
+            continue
+        result.files_scanned += 1
+        for _, fn in checks:
+            result.issues.extend(fn(rel.as_posix(), path.suffix, text))
+
+    result.issues.extend(check_package_json(workdir))
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def build_precheck_report(result: PrecheckResult) -> QAReport:
+    """把预检结果转成 QAReport（评分沿用 qa_prompt.txt 的扣分规则）"""
+    score = max(0, 100 - sum(SEVERITY_PENALTY.get(i.severity, 0) for i in result.issues))
+    return QAReport(
+        passed=score >= 80 and not result.has_critical,
+        score=score,
+        summary=(
+            f"静态预检: 扫描 {result.files_scanned} 个文件，"
+            f"执行 {len(result.checks)} 项规则，发现 {len(result.issues)} 个问题"
+        ),
+        issues=result.issues,
+    )
+
+
+def merge_precheck_report(qa_report: QAReport, result: PrecheckResult) -> QAReport:
+    """
+    把预检问题并入 QA 报告。result 应在 QA 修复之后采集，其中的问题均视为未修复：
+    保留 QA 的 passed / score，只对 QA 未报告的预检问题扣分，
+    存在未修复的 critical 或扣分后低于 80 时判为未通过。
+    """
+    if result.clean:
+        return qa_report
+    merged = merge_qa_reports([qa_report, build_precheck_report(result)])
+    extra = [i for i in result.issues if not any(_same_issue(k, i) for k in qa_report.issues)]
+    score = max(0, qa_report.score - sum(SEVERITY_PENALTY.get(i.severity, 0) for i in extra))
+    return merged.model_copy(update={
+        "passed": qa_report.passed and score >= 80 and not result.has_critical,
+        "score": score,
+    })
+
+
+def format_precheck_for_qa(result: PrecheckResult) -> str:
+    """生成注入 QA 任务的预检摘要，避免 LLM 重复检查已覆盖的规则"""
+    lines = [
+        "静态预检已完成，以下规则无需重复检查: " + ", ".join(result.checks),
+    ]
+    if result.clean:
+        lines.append("预检结果: 未发现问题。")
+    else:
+        lines.append("预检已发现以下问题（会自动并入报告，不要重复上报）：")
+        lines.extend(
+            f"- [{i.severity}/{i.category}] {i.file_path}: {i.description}"
+            for i in result.issues
+        )
+    return "\n".join(lines)
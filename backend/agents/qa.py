@@ -6,17 +6,37 @@ Web Builder Agent - QA Agent 定义
 3. 性能审查（bundle 优化、加载性能）
 4. 直接修复 critical 级别问题
 
-通过加载 agent-skills/ 目录下的专业知识增强审查能力。
+通过加载 agent-skills/ 目录下的专业知识增强审查能力：默认按项目实际文件与技术栈检索相关规则章节
+（agents.knowledge，受 token 预算约束），QA_KNOWLEDGE_MODE=full 时全量注入。
+
+并行模式：按审查维度（或按项目文件分片）扇出多个只读 Reviewer 并发审查，
+每个 Reviewer 只注入与其维度匹配的 SKILL.md 章节，最后合并去重为一份 QAReport；
+审查过程中各 Reviewer 的流式事件按到达顺序汇总产出（stream_parallel_qa / astream_parallel_qa）。
 """
+import asyncio
+import contextvars
+import inspect
+import json
 import os
+import queue
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, AsyncIterator, Iterator
 
-from agno.agent import Agent
-from agno.models.openai.like import OpenAILike
+from agno.agent import Agent, RunResponse
 from agno.tools.file import FileTools
-from agno.tools.shell import ShellTools
+from agno.utils.log import logger
 
-from models.schemas import QAReport
+from agents.knowledge import read_skill_body, select_knowledge
+from agents.llm import create_model
+from agents.manifest import SKIPPED_DIRS, SKIPPED_FILES
+from agents.metrics import record_agent_tools
+from agents.npm_tools import NpmTools
+from agents.shell_tools import CompactShellTools
+from agents.snapshot import ProjectSnapshotTools
+from agents.registry import registry
+from models.schemas import QAIssue, QAReport
 
 
 # ---------------------------------------------------------------------------
@@ -26,33 +46,79 @@ BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
 PROMPTS_DIR = BASE_DIR / "prompts"
 AGENT_SKILLS_DIR = BASE_DIR / "agent-skills"
 
+# 审查维度 → 知识来源：(agent-skills 目录名, 章节标题关键字；None 表示整份文件)
+QA_CATEGORY_KNOWLEDGE: dict[str, list[tuple[str, list[str] | None]]] = {
+    "react-practices": [("react-best-practices", None)],
+    "ui-ux": [("ui-ux-guidelines", ["语义化", "响应式", "视觉一致性", "微交互", "图标", "空状态"])],
+    "performance": [("performance-audit", None)],
+    "accessibility": [("ui-ux-guidelines", ["可访问性", "语义化"])],
+}
+
+# 按文件分片时，审查范围内的源码后缀（跳过的目录与 lockfile 见 agents.manifest）
+REVIEWABLE_SUFFIXES = {".ts", ".tsx", ".js", ".jsx", ".css", ".html", ".json", ".md"}
+
+# 知识注入方式："retrieval" 按项目文件检索相关章节（受 token 预算约束）；"full" 全量拼入 system_message
+QA_KNOWLEDGE_MODE = os.getenv("QA_KNOWLEDGE_MODE", "retrieval")
+
+# 扣分规则（与 qa_prompt.txt 保持一致）
+SEVERITY_PENALTY = {"critical": 15, "warning": 5, "info": 1}
+SEVERITY_RANK = {"critical": 3, "warning": 2, "info": 1}
+
+# 合并去重：描述中的行号写法，以及无行号时判定为同一问题的描述相似度阈值
+ISSUE_LINE_RE = re.compile(r"第\s*(\d+)\s*行|\bline\s*(\d+)|\bL(\d+)\b", re.IGNORECASE)
+ISSUE_SIMILARITY_THRESHOLD = float(os.getenv("QA_ISSUE_SIMILARITY", "0.7"))
+
 
 # ---------------------------------------------------------------------------
 # Skills 加载
 # ---------------------------------------------------------------------------
 
-def load_agent_skills() -> str:
+def _select_sections(body: str, keywords: list[str]) -> str:
+    """只保留标题（## 级）包含任一关键字的章节，文档标题（# 级）保留"""
+    parts = re.split(r"(?m)^(?=## )", body)
+    kept = [parts[0].strip()] if parts and not parts[0].startswith("## ") else []
+    for part in parts:
+        if part.startswith("## "):
+            heading = part.splitlines()[0]
+            if any(k in heading for k in keywords):
+                kept.append(part.strip())
+    return "\n\n".join(p for p in kept if p)
+
+
+def load_agent_skills(category: str | None = None) -> str:
     """
     加载 agent-skills/ 目录下所有 SKILL.md 的内容，
     拼接成一段完整的知识文本注入到 QA Agent 的 instructions 中。
+
+    Args:
+        category: 只加载与该审查维度匹配的章节（见 QA_CATEGORY_KNOWLEDGE）；None 表示全部
     """
     if not AGENT_SKILLS_DIR.exists():
         return ""
+    if category is not None and category not in QA_CATEGORY_KNOWLEDGE:
+        raise ValueError(f"未知的审查维度: {category}")
+
+    def _load():
+        deps: list[Path] = [AGENT_SKILLS_DIR]
+        parts = []
+        if category is not None:
+            for skill_name, keywords in QA_CATEGORY_KNOWLEDGE[category]:
+                skill_file = AGENT_SKILLS_DIR / skill_name / "SKILL.md"
+                deps.append(skill_file)
+                if not skill_file.exists():
+                    continue
+                body = read_skill_body(skill_file)
+                parts.append(body if keywords is None else _select_sections(body, keywords))
+            return "\n\n---\n\n".join(p for p in parts if p), deps
 
-    parts = []
-    for skill_dir in sorted(AGENT_SKILLS_DIR.iterdir()):
-        skill_file = skill_dir / "SKILL.md"
-        if skill_file.exists():
-            content = skill_file.read_text(encoding="utf-8")
-            # 去掉 YAML frontmatter，只保留 Markdown 正文
-            if content.startswith("---"):
-                # 找到第二个 --- 的位置
-                end = content.find("---", 3)
-                if end != -1:
-                    content = content[end + 3:].strip()
-            parts.append(content)
+        for skill_dir in sorted(AGENT_SKILLS_DIR.iterdir()):
+            skill_file = skill_dir / "SKILL.md"
+            deps.append(skill_file)
+            if skill_file.exists():
+                parts.append(read_skill_body(skill_file))
+        return "\n\n---\n\n".join(parts), deps
 
-    return "\n\n---\n\n".join(parts)
+    return registry.get(f"qa:knowledge:{category or 'all'}", _load)
 
 
 def load_qa_prompt() -> str:
@@ -60,7 +126,60 @@ def load_qa_prompt() -> str:
     path = PROMPTS_DIR / "qa_prompt.txt"
     if not path.exists():
         raise FileNotFoundError(f"QA 系统提示词文件不存在: {path}")
-    return path.read_text(encoding="utf-8")
+    return registry.read_text(path)
+
+
+def format_qa_knowledge(knowledge: str) -> str:
+    """把知识文本包装为附录区块"""
+    return (
+        "====================\n"
+        "附录：专业审查知识库\n"
+        "====================\n"
+        "以下是你在审查时应参考的专业规则集：\n\n"
+        f"{knowledge}"
+    )
+
+
+def build_qa_system_message(category: str | None = None, include_knowledge: bool = True) -> str:
+    """
+    拼装 QA Agent 的 system_message：系统提示词 + 专业审查知识库（include_knowledge=False 时只有提示词）。
+    拼装结果按审查维度缓存，提示词或任一 SKILL.md 变化时自动重新拼装。
+    """
+    if not include_knowledge:
+        return load_qa_prompt()
+
+    def _load():
+        message = load_qa_prompt()
+        skills_knowledge = load_agent_skills(category)
+        if skills_knowledge:
+            message += "\n\n" + format_qa_knowledge(skills_knowledge)
+        # 依赖提示词文件与知识库目录下全部 SKILL.md
+        deps = [PROMPTS_DIR / "qa_prompt.txt", AGENT_SKILLS_DIR]
+        if AGENT_SKILLS_DIR.exists():
+            deps += [d / "SKILL.md" for d in sorted(AGENT_SKILLS_DIR.iterdir())]
+        return message, deps
+
+    return registry.get(f"qa:system-message:{category or 'all'}", _load)
+
+
+def select_qa_knowledge(
+    workdir: str | Path,
+    stack: str = "",
+    category: str | None = None,
+) -> str:
+    """
+    按项目实际文件检索相关的审查规则（retrieval 模式），返回附录区块；无相关规则时返回空字符串。
+
+    Args:
+        workdir: 项目工作目录
+        stack: 技术栈描述
+        category: 只在该审查维度对应的章节内检索（见 QA_CATEGORY_KNOWLEDGE）
+    """
+    if category is not None and category not in QA_CATEGORY_KNOWLEDGE:
+        raise ValueError(f"未知的审查维度: {category}")
+    sources = QA_CATEGORY_KNOWLEDGE[category] if category is not None else None
+    knowledge = select_knowledge(workdir, stack, sources=sources)
+    return format_qa_knowledge(knowledge) if knowledge else ""
 
 
 # ---------------------------------------------------------------------------
@@ -72,49 +191,350 @@ def create_qa_agent(
     api_key: str | None = None,
     base_url: str | None = None,
     model_id: str | None = None,
+    category: str | None = None,
+    files: list[str] | None = None,
 ) -> Agent:
     """
     创建 QA Agent 实例。
 
+    指定 category 或 files 时创建的是并行模式下的只读 Reviewer：
+    只注入对应维度的知识、只审查指定文件，不修改文件也不执行构建命令，
+    避免多个 Reviewer 并发改写同一文件。
+
     Args:
         workdir: 待审查的项目工作目录
         api_key: LLM API Key（默认从环境变量读取）
         base_url: LLM API Base URL（默认从环境变量读取）
         model_id: LLM 模型 ID（默认从环境变量读取）
+        category: 仅审查该维度（react-practices / ui-ux / performance / accessibility）
+        files: 仅审查这些文件（相对 workdir 的路径）
     """
     _api_key = api_key or os.getenv("OPENAI_API_KEY", "")
     _base_url = base_url or os.getenv("OPENAI_BASE_URL", "https://kspmas.ksyun.com/v1")
     _model_id = model_id or os.getenv("OPENAI_MODEL", "kimi-k2.5")
 
-    qa_prompt = load_qa_prompt()
-    skills_knowledge = load_agent_skills()
     workdir = Path(workdir)
+    is_reviewer = category is not None or files is not None
 
-    # 将系统提示词和 Skills 知识合并为完整的 system_message
-    full_system_message = qa_prompt
-    if skills_knowledge:
-        full_system_message += (
-            "\n\n"
-            "====================\n"
-            "附录：专业审查知识库\n"
-            "====================\n"
-            "以下是你在审查时应参考的专业规则集：\n\n"
-            f"{skills_knowledge}"
-        )
+    # retrieval 模式下，完整 QA Agent 在运行开始时创建（项目尚未生成，且会被实例池复用），
+    # 相关知识由工作流在审查时随任务一起下发；Reviewer 在项目生成后创建，直接检索注入
+    retrieval = QA_KNOWLEDGE_MODE == "retrieval"
+    full_system_message = build_qa_system_message(category, include_knowledge=not retrieval)
+    if retrieval and is_reviewer:
+        knowledge = select_qa_knowledge(workdir, category=category)
+        if knowledge:
+            full_system_message += "\n\n" + knowledge
+    if is_reviewer:
+        full_system_message += "\n\n" + _build_reviewer_scope(category, files)
+
+    if is_reviewer:
+        tools = [
+            FileTools(
+                base_dir=workdir,
+                enable_save_file=False,
+                enable_replace_file_chunk=False,
+            ),
+            ProjectSnapshotTools(base_dir=workdir),
+        ]
+    else:
+        tools = [
+            ProjectSnapshotTools(base_dir=workdir),
+            FileTools(base_dir=workdir),
+            CompactShellTools(base_dir=workdir),
+            NpmTools(base_dir=workdir),
+        ]
 
     return Agent(
-        name="QAAgent",
-        model=OpenAILike(
-            id=_model_id,
-            api_key=_api_key,
-            base_url=_base_url,
-        ),
+        name=f"QAReviewer[{category or 'all'}]" if is_reviewer else "QAAgent",
+        model=create_model(_model_id, _api_key, _base_url),
         system_message=full_system_message,
-        tools=[
-            FileTools(base_dir=workdir),
-            ShellTools(base_dir=workdir),
-        ],
+        tools=tools,
         response_model=QAReport,
+        post_hooks=[record_agent_tools],
         markdown=True,
         debug_mode=True,
     )
+
+
+def _build_reviewer_scope(category: str | None, files: list[str] | None) -> str:
+    """并行 Reviewer 的审查范围说明（覆盖系统提示词中的修复与全量审查流程）"""
+    lines = [
+        "====================",
+        "本次审查范围（并行审查模式，优先级高于上文流程）",
+        "====================",
+        "- 你是并行审查中的一个 Reviewer，只报告问题，不修改任何文件，不执行构建命令",
+        "- fixed_files 必须为空列表",
+    ]
+    if category:
+        lines.append(f"- 只审查维度: {category}，issues 的 category 一律填写 {category}")
+    if files:
+        lines.append("- 只审查以下文件（不要读取其它源码文件）：")
+        lines.extend(f"  - {f}" for f in files)
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# 并行审查：分片、扇出、合并
+# ---------------------------------------------------------------------------
+
+def list_reviewable_files(workdir: str | Path) -> list[str]:
+    """列出项目中需要审查的源码文件（相对路径），跳过依赖、构建产物和 lockfile"""
+    workdir = Path(workdir)
+    files = []
+    for path in sorted(workdir.rglob("*")):
+        rel = path.relative_to(workdir)
+        if any(part in SKIPPED_DIRS for part in rel.parts):
+            continue
+        if path.is_file() and path.suffix in REVIEWABLE_SUFFIXES and path.name not in SKIPPED_FILES:
+            files.append(rel.as_posix())
+    return files
+
+
+def partition_files(workdir: str | Path, shards: int) -> list[list[str]]:
+    """按文件大小贪心分片，使各分片的审查量尽量均衡"""
+    workdir = Path(workdir)
+    sizes = {f: (workdir / f).stat().st_size for f in list_reviewable_files(workdir)}
+    count = max(1, min(shards, len(sizes)))
+    buckets: list[list[str]] = [[] for _ in range(count)]
+    loads = [0] * count
+    for f in sorted(sizes, key=sizes.get, reverse=True):
+        idx = loads.index(min(loads))
+        buckets[idx].append(f)
+        loads[idx] += sizes[f]
+    return [sorted(b) for b in buckets if b]
+
+
+def create_qa_reviewers(
+    workdir: str | Path,
+    shard_by: str = "category",
+    shards: int | None = None,
+    **agent_kwargs,
+) -> list[Agent]:
+    """
+    创建并行审查用的 Reviewer 列表。
+
+    Args:
+        workdir: 待审查的项目工作目录
+        shard_by: "category" 每个审查维度一个 Reviewer；"files" 按文件分片
+        shards: 按文件分片时的分片数（默认读取 QA_PARALLEL_SHARDS，缺省 4）
+        agent_kwargs: 透传给 create_qa_agent 的模型参数
+    """
+    if shard_by == "category":
+        scoped = [
+            (category, create_qa_agent(workdir, category=category, **agent_kwargs))
+            for category in QA_CATEGORY_KNOWLEDGE
+        ]
+    elif shard_by == "files":
+        _shards = shards or int(os.getenv("QA_PARALLEL_SHARDS", "4"))
+        scoped = [
+            (f"files-{n}", create_qa_agent(workdir, files=part, **agent_kwargs))
+            for n, part in enumerate(partition_files(workdir, _shards), 1)
+        ]
+    else:
+        raise ValueError(f"未知的分片方式: {shard_by}")
+    for scope, agent in scoped:
+        agent._review_scope = scope
+    return [agent for _, agent in scoped]
+
+
+def reviewer_scope(agent: Agent) -> str | None:
+    """create_qa_reviewers 创建的 Reviewer 的审查范围：审查维度，或按文件分片时的 files-N"""
+    return getattr(agent, "_review_scope", None)
+
+
+def parse_qa_report(content) -> QAReport | None:
+    """把 Agent 返回的 content 解析为 QAReport"""
+    if not content:
+        return None
+    if isinstance(content, QAReport):
+        return content
+    # 尝试从字符串解析
+    try:
+        return QAReport.model_validate_json(
+            content if isinstance(content, str) else json.dumps(content)
+        )
+    except Exception as e:
+        logger.warning(f"[QA] QA 报告解析失败: {e}")
+        return None
+
+
+def _issue_path(issue: QAIssue) -> str:
+    return issue.file_path.strip().removeprefix("./")
+
+
+def _issue_line(issue: QAIssue) -> int | None:
+    """描述中的行号（"第 12 行" / "line 12" / "L12"），没有则返回 None"""
+    match = ISSUE_LINE_RE.search(issue.description)
+    return int(next(g for g in match.groups() if g)) if match else None
+
+
+def _issue_tokens(issue: QAIssue) -> set[str]:
+    """描述的词集合：英文/数字按单词切分，中文按相邻二字切分，忽略大小写与标点"""
+    tokens: set[str] = set()
+    for word in re.findall(r"[a-z0-9]+|[\u4e00-\u9fff]+", issue.description.lower()):
+        if word[0].isascii():
+            tokens.add(word)
+        elif len(word) == 1:
+            tokens.add(word)
+        else:
+            tokens.update(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def _same_issue(a: QAIssue, b: QAIssue, match_category: bool = True) -> bool:
+    """
+    判断两条问题是否指向同一处：必须是同一文件；双方都带行号时以行号为准，
+    否则按描述的词集合相似度（交集 / 较小集合）判断，容忍不同 Reviewer 的措辞差异。
+    """
+    if _issue_path(a) != _issue_path(b):
+        return False
+    if match_category and a.category != b.category:
+        return False
+    line_a, line_b = _issue_line(a), _issue_line(b)
+    if line_a is not None and line_b is not None:
+        return line_a == line_b
+    tokens_a, tokens_b = _issue_tokens(a), _issue_tokens(b)
+    if not tokens_a or not tokens_b:
+        return tokens_a == tokens_b
+    overlap = len(tokens_a & tokens_b) / min(len(tokens_a), len(tokens_b))
+    return overlap >= ISSUE_SIMILARITY_THRESHOLD
+
+
+def merge_qa_reports(reports: list[QAReport], match_category: bool = True) -> QAReport | None:
+    """
+    合并多个 Reviewer 的报告：同一文件中指向同一处的问题（见 _same_issue）只保留一条，
+    取最高严重度，再按 qa_prompt.txt 的扣分规则重新计算综合评分。
+    按审查维度分片时，不同 Reviewer 会把同一问题归入各自维度，应传 match_category=False。
+
+    issues 中包含 Reviewer 已直接修复的 critical 问题，无法据此判断是否"无未修复的 critical"，
+    因此 passed 沿用各 Reviewer 的结论：任一 Reviewer 未通过或合并评分低于 80 即未通过。
+    """
+    if not reports:
+        return None
+
+    merged: list[QAIssue] = []
+    for report in reports:
+        for issue in report.issues:
+            idx = next(
+                (i for i, kept in enumerate(merged) if _same_issue(kept, issue, match_category)),
+                None,
+            )
+            if idx is None:
+                merged.append(issue)
+            elif SEVERITY_RANK.get(issue.severity, 0) > SEVERITY_RANK.get(merged[idx].severity, 0):
+                merged[idx] = issue
+
+    issues = sorted(
+        merged,
+        key=lambda i: (-SEVERITY_RANK.get(i.severity, 0), i.file_path),
+    )
+    score = max(0, 100 - sum(SEVERITY_PENALTY.get(i.severity, 0) for i in issues))
+    fixed_files = sorted({f for r in reports for f in r.fixed_files})
+
+    return QAReport(
+        passed=score >= 80 and all(r.passed for r in reports),
+        score=score,
+        summary="\n".join(r.summary for r in reports if r.summary),
+        issues=issues,
+        fixed_files=fixed_files,
+    )
+
+
+# Reviewer 的流结束标记
+_REVIEW_DONE = object()
+
+
+def stream_parallel_qa(reviewers: list[Agent], qa_input: str) -> Iterator[tuple[Agent, Any]]:
+    """
+    同步流式接口：用线程池并发运行所有 Reviewer，按到达顺序产出 (Reviewer, 事件)。
+    事件为 Agent 的流式事件，每个 Reviewer 的最后一项是完整的 RunResponse；审查失败时产出异常。
+    """
+    if not reviewers:
+        return
+    arrivals: queue.Queue = queue.Queue()
+
+    def _review(agent: Agent) -> None:
+        try:
+            for chunk in agent.run(
+                qa_input, stream=True, stream_intermediate_steps=True, yield_run_response=True,
+            ):
+                arrivals.put((agent, chunk))
+        except Exception as e:
+            arrivals.put((agent, e))
+        finally:
+            arrivals.put((agent, _REVIEW_DONE))
+
+    # 每个线程复制当前上下文，使 Reviewer 的模型请求与工具调用计入本次运行的指标
+    with ThreadPoolExecutor(max_workers=len(reviewers)) as pool:
+        for agent in reviewers:
+            pool.submit(contextvars.copy_context().run, _review, agent)
+        remaining = len(reviewers)
+        while remaining:
+            agent, item = arrivals.get()
+            if item is _REVIEW_DONE:
+                remaining -= 1
+                continue
+            yield agent, item
+
+
+async def astream_parallel_qa(reviewers: list[Agent], qa_input: str) -> AsyncIterator[tuple[Agent, Any]]:
+    """stream_parallel_qa 的异步版本：并发消费所有 Reviewer 的异步流"""
+    if not reviewers:
+        return
+    arrivals: asyncio.Queue = asyncio.Queue()
+
+    async def _review(agent: Agent) -> None:
+        try:
+            stream = agent.arun(qa_input, stream=True, stream_intermediate_steps=True, yield_run_response=True)
+            # 部分 agno 版本的 arun 是协程，需要先 await 才能拿到异步迭代器
+            if inspect.isawaitable(stream):
+                stream = await stream
+            async for chunk in stream:
+                arrivals.put_nowait((agent, chunk))
+        except Exception as e:
+            arrivals.put_nowait((agent, e))
+        finally:
+            arrivals.put_nowait((agent, _REVIEW_DONE))
+
+    tasks = [asyncio.ensure_future(_review(agent)) for agent in reviewers]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            agent, item = await arrivals.get()
+            if item is _REVIEW_DONE:
+                remaining -= 1
+                continue
+            yield agent, item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _collect_report(agent: Agent, item: Any, reports: list[QAReport]) -> None:
+    if isinstance(item, Exception):
+        logger.warning(f"[QA] {agent.name} 审查失败: {item}")
+    elif isinstance(item, RunResponse):
+        report = parse_qa_report(item.content)
+        if report:
+            reports.append(report)
+
+
+def run_parallel_qa(
+    reviewers: list[Agent], qa_input: str, match_category: bool = True,
+) -> QAReport | None:
+    """同步接口：并发运行所有 Reviewer 并合并报告（不需要进度事件时使用）"""
+    reports: list[QAReport] = []
+    for agent, item in stream_parallel_qa(reviewers, qa_input):
+        _collect_report(agent, item, reports)
+    return merge_qa_reports(reports, match_category=match_category)
+
+
+async def arun_parallel_qa(
+    reviewers: list[Agent], qa_input: str, match_category: bool = True,
+) -> QAReport | None:
+    """异步接口：并发运行所有 Reviewer 并合并报告"""
+    reports: list[QAReport] = []
+    async for agent, item in astream_parallel_qa(reviewers, qa_input):
+        _collect_report(agent, item, reports)
+    return merge_qa_reports(reports, match_category=match_category)
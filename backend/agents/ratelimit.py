@@ -0,0 +1,471 @@
+"""
+Web Builder Agent - 模型请求的自适应限流
+进程内所有 Agent（Developer / QA / AgentOS）的模型请求都经过共享 HTTP 连接池，
+限流器以 httpx Transport 的形式挂在连接池上，按（服务地址, API Key, 模型）分组限流：
+
+- 令牌桶：每分钟请求数（LLM_RATE_RPM）与每分钟 token 数（LLM_RATE_TPM）。
+  发送前按请求体估算 prompt token 预扣，响应解析出 usage 后再补扣 completion token
+- 并发窗口（AIMD）：每个成功请求把窗口加 1/窗口（约每轮加 1）；遇到 429 / 5xx / 超时
+  窗口减半，响应首包延迟超过基线的 LLM_RATE_LATENCY_TOLERANCE 倍时窗口缩小 10%。
+  同一轮在途请求只触发一次缩小，避免一波 429 把窗口直接打到最小
+- 退避：429 / 503 带 Retry-After（或 retry-after-ms）时整组暂停到该时刻，
+  没有时按连续限流次数指数退避；暂停期间新请求（包括 OpenAI 客户端自身的重试）一律排队
+- 名额归还：流式响应在读完、关闭或（调用方未关闭即丢弃时）被回收时归还，release 幂等
+
+Key 只以 sha256 指纹参与分组，不在内存或日志中保留明文。
+"""
+import asyncio
+import email.utils
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import httpx
+from agno.utils.log import logger
+
+from agents.knowledge import estimate_tokens
+from agents.metrics import metrics_registry
+
+
+LLM_RATE_LIMIT = os.getenv("LLM_RATE_LIMIT", "true").lower() == "true"
+LLM_RATE_RPM = float(os.getenv("LLM_RATE_RPM", "0"))  # 0 表示不限
+LLM_RATE_TPM = float(os.getenv("LLM_RATE_TPM", "0"))  # 0 表示不限
+LLM_RATE_BURST_SECONDS = float(os.getenv("LLM_RATE_BURST_SECONDS", "10"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+LLM_RATE_LATENCY_TOLERANCE = float(os.getenv("LLM_RATE_LATENCY_TOLERANCE", "4"))
+LLM_RATE_BACKOFF_BASE = float(os.getenv("LLM_RATE_BACKOFF_BASE", "1"))
+LLM_RATE_BACKOFF_MAX = float(os.getenv("LLM_RATE_BACKOFF_MAX", "60"))
+
+# 计算延迟基线的窗口大小 / 开始按延迟缩小窗口前需要的最少样本数
+LATENCY_WINDOW = 100
+LATENCY_MIN_SAMPLES = 10
+# 视为服务端过载的状态码（与 429 一样减半窗口）
+OVERLOAD_STATUS = {500, 502, 503, 504, 529}
+
+CONCURRENCY_LIMIT = metrics_registry.gauge(
+    "webbuilder_llm_concurrency_limit", "模型请求的自适应并发窗口", ("model",))
+IN_FLIGHT = metrics_registry.gauge(
+    "webbuilder_llm_in_flight", "在途的模型 HTTP 请求数", ("model",))
+THROTTLED_TOTAL = metrics_registry.counter(
+    "webbuilder_llm_throttled_total", "被限流或过载拒绝的模型 HTTP 请求数（reason: 429 / overload）",
+    ("model", "reason"))
+QUEUE_SECONDS = metrics_registry.histogram(
+    "webbuilder_llm_queue_seconds", "模型请求在限流器中的排队时间", ("model",))
+
+
+def key_fingerprint(api_key: str | None) -> str:
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+def parse_retry_after(headers: httpx.Headers) -> float | None:
+    """解析 retry-after-ms / Retry-After（秒数或 HTTP 日期），返回需要等待的秒数"""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    令牌桶（允许透支）：reserve() 立即扣除并返回需要等待的秒数，
+    调用方睡眠该时长后发送，先预约的请求先获得额度。
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = LLM_RATE_BURST_SECONDS):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+@dataclass
+class _Grant:
+    """一次获得的并发名额"""
+    started: float
+    queued: float
+    released: bool = False
+
+
+@dataclass
+class AdaptiveLimiter:
+    """单个（服务地址, Key, 模型）分组的限流状态"""
+    model: str
+    max_concurrency: int = LLM_MAX_CONCURRENCY
+    min_concurrency: int = LLM_MIN_CONCURRENCY
+    rpm: float = LLM_RATE_RPM
+    tpm: float = LLM_RATE_TPM
+    latency_tolerance: float = LLM_RATE_LATENCY_TOLERANCE
+    limit: float = 0.0
+    in_flight: int = 0
+    paused_until: float = 0.0
+    throttle_streak: int = 0
+    last_decrease: float = 0.0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def __post_init__(self):
+        self.limit = float(self.max_concurrency)
+        self.requests = TokenBucket(self.rpm) if self.rpm > 0 else None
+        self.tokens = TokenBucket(self.tpm) if self.tpm > 0 else None
+        # 可重入：未关闭的流在 GC 时（可能恰好发生在本线程持锁期间）经 __del__ 归还名额
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        CONCURRENCY_LIMIT.inc(self.limit, model=self.model)
+
+    # -------------------------------------------------------------------
+    # 获取 / 释放名额
+    # -------------------------------------------------------------------
+
+    def _reserve(self, prompt_tokens: int) -> float:
+        """预扣令牌桶额度，返回需要等待的秒数"""
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens and prompt_tokens:
+            wait = max(wait, self.tokens.reserve(prompt_tokens))
+        return wait
+
+    def _try_acquire(self) -> float | None:
+        """持锁调用：获得名额返回 None，否则返回建议等待的秒数（inf 表示等待释放通知）"""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight < max(self.min_concurrency, int(self.limit)):
+            self.in_flight += 1
+            IN_FLIGHT.inc(model=self.model)
+            return None
+        return float("inf")
+
+    def acquire(self, prompt_tokens: int = 0) -> _Grant:
+        queued = time.monotonic()
+        wait = self._reserve(prompt_tokens)
+        if wait > 0:
+            time.sleep(wait)
+        with self._cond:
+            while (wait := self._try_acquire()) is not None:
+                self._cond.wait(None if wait == float("inf") else wait)
+        return self._granted(queued)
+
+    async def aacquire(self, prompt_tokens: int = 0) -> _Grant:
+        queued = time.monotonic()
+        wait = self._reserve(prompt_tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                wait = self._try_acquire()
+                if wait is None:
+                    break
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await asyncio.wait_for(waiter, None if wait == float("inf") else wait)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+        return self._granted(queued)
+
+    def _granted(self, queued: float) -> _Grant:
+        now = time.monotonic()
+        QUEUE_SECONDS.observe(now - queued, model=self.model)
+        return _Grant(started=now, queued=now - queued)
+
+    def release(self, grant: _Grant) -> None:
+        with self._cond:
+            if grant.released:
+                return
+            grant.released = True
+            self.in_flight -= 1
+            IN_FLIGHT.dec(model=self.model)
+            self._wake()
+
+    def _wake(self) -> None:
+        """持锁调用：唤醒所有同步与异步等待者重新竞争名额"""
+        self._cond.notify_all()
+        for loop, waiter in self._async_waiters:
+            loop.call_soon_threadsafe(_resolve, waiter)
+        self._async_waiters.clear()
+
+    # -------------------------------------------------------------------
+    # AIMD
+    # -------------------------------------------------------------------
+
+    def _set_limit(self, limit: float) -> None:
+        limit = min(float(self.max_concurrency), max(float(self.min_concurrency), limit))
+        CONCURRENCY_LIMIT.inc(limit - self.limit, model=self.model)
+        if limit > self.limit:
+            self._wake()
+        self.limit = limit
+
+    def _decrease(self, grant: _Grant, factor: float) -> bool:
+        """乘性减小窗口；在上次缩小之前发出的请求不再重复触发"""
+        if grant.started < self.last_decrease:
+            return False
+        self.last_decrease = time.monotonic()
+        self._set_limit(self.limit * factor)
+        return True
+
+    def on_success(self, grant: _Grant, latency: float) -> None:
+        with self._lock:
+            self.throttle_streak = 0
+            baseline = min(self.latencies) if len(self.latencies) >= LATENCY_MIN_SAMPLES else None
+            self.latencies.append(latency)
+            if baseline is not None and latency > baseline * self.latency_tolerance:
+                if self._decrease(grant, 0.9):
+                    logger.debug(
+                        f"[RateLimit] {self.model} 延迟 {latency:.2f}s 超过基线 {baseline:.2f}s 的 "
+                        f"{self.latency_tolerance:g} 倍，并发窗口降至 {self.limit:.1f}"
+                    )
+                return
+            self._set_limit(self.limit + 1 / self.limit)
+
+    def on_throttled(self, grant: _Grant, retry_after: float | None, reason: str) -> None:
+        THROTTLED_TOTAL.inc(model=self.model, reason=reason)
+        with self._lock:
+            self.throttle_streak += 1
+            if retry_after is None and reason == "429":
+                backoff = min(LLM_RATE_BACKOFF_MAX, LLM_RATE_BACKOFF_BASE * 2 ** (self.throttle_streak - 1))
+                retry_after = backoff * random.uniform(0.5, 1.0)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + min(retry_after, LLM_RATE_BACKOFF_MAX))
+            if self._decrease(grant, 0.5) or retry_after:
+                logger.warning(
+                    f"[RateLimit] {self.model} 被限流（{reason}），并发窗口={self.limit:.1f}"
+                    + (f"，暂停 {retry_after:.1f}s" if retry_after else "")
+                )
+
+    def charge_tokens(self, amount: int) -> None:
+        """响应返回后补扣 completion token（只计入额度，不等待）"""
+        if self.tokens and amount > 0:
+            self.tokens.reserve(amount)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 2),
+                "throttle_streak": self.throttle_streak,
+            }
+
+
+def _resolve(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class RateLimiterRegistry:
+    """按（服务地址, Key 指纹, 模型）分组的限流器集合（线程安全）"""
+
+    def __init__(self):
+        self._limiters: dict[tuple[str, str, str], AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str, api_key: str | None, model: str) -> AdaptiveLimiter:
+        key = (host, key_fingerprint(api_key), model)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = self._limiters[key] = AdaptiveLimiter(model=model)
+            return limiter
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            items = list(self._limiters.items())
+        return {f"{host}/{model}@{fp}": limiter.snapshot() for (host, fp, model), limiter in items}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._limiters.clear()
+
+
+# 进程级共享实例
+rate_limiters = RateLimiterRegistry()
+
+
+# ---------------------------------------------------------------------------
+# httpx Transport
+# ---------------------------------------------------------------------------
+
+def _request_limiter(request: httpx.Request) -> tuple[AdaptiveLimiter | None, int]:
+    """只限流带 model 字段的 JSON POST（chat.completions 等），返回限流器与估算的 prompt token"""
+    if request.method != "POST" or not request.content:
+        return None, 0
+    try:
+        body = json.loads(request.content)
+    except (ValueError, UnicodeDecodeError):
+        return None, 0
+    if not isinstance(body, dict) or not body.get("model"):
+        return None, 0
+    api_key = request.headers.get("authorization", "").removeprefix("Bearer ")
+    limiter = rate_limiters.get(request.url.host, api_key, str(body["model"]))
+    prompt_tokens = estimate_tokens(json.dumps(body.get("messages") or body.get("input") or "", ensure_ascii=False))
+    return limiter, prompt_tokens
+
+
+def _classify(limiter: AdaptiveLimiter, grant: _Grant, response: httpx.Response) -> None:
+    if response.status_code == 429:
+        limiter.on_throttled(grant, parse_retry_after(response.headers), "429")
+    elif response.status_code in OVERLOAD_STATUS:
+        limiter.on_throttled(grant, parse_retry_after(response.headers), "overload")
+    elif response.status_code < 400:
+        limiter.on_success(grant, time.monotonic() - grant.started)
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """
+    响应体读完或关闭时归还并发名额（流式响应在整个流结束前一直占用名额）。
+    调用方中途放弃且未关闭响应时（如被取消的对冲请求、提前 break 的生成器），
+    由迭代器的 finally 与 __del__ 兜底归还，避免名额泄漏把窗口永久占满。
+    """
+
+    def __init__(self, stream: httpx.SyncByteStream, limiter: AdaptiveLimiter, grant: _Grant):
+        self._stream = stream
+        self._limiter = limiter
+        self._grant = grant
+
+    def __iter__(self):
+        try:
+            yield from self._stream
+        finally:
+            self._limiter.release(self._grant)
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._limiter.release(self._grant)
+
+    def __del__(self):
+        _release_abandoned(self._limiter, self._grant)
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, limiter: AdaptiveLimiter, grant: _Grant):
+        self._stream = stream
+        self._limiter = limiter
+        self._grant = grant
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        finally:
+            self._limiter.release(self._grant)
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._limiter.release(self._grant)
+
+    def __del__(self):
+        _release_abandoned(self._limiter, self._grant)
+
+
+def _release_abandoned(limiter: AdaptiveLimiter, grant: _Grant) -> None:
+    """流对象被回收时仍未归还的名额：记录后归还（release 幂等，正常关闭的流不会重复归还）"""
+    if grant.released:
+        return
+    try:
+        logger.debug(f"[RateLimit] {limiter.model} 响应未关闭即被回收，归还并发名额")
+        limiter.release(grant)
+    except Exception:
+        # 解释器退出时模块全局可能已被清理
+        pass
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """在发送前排队获取限流名额的同步 Transport"""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        limiter, prompt_tokens = _request_limiter(request)
+        if limiter is None:
+            return self._transport.handle_request(request)
+        grant = limiter.acquire(prompt_tokens)
+        try:
+            response = self._transport.handle_request(request)
+        except httpx.TimeoutException:
+            limiter.on_throttled(grant, None, "overload")
+            limiter.release(grant)
+            raise
+        except BaseException:
+            limiter.release(grant)
+            raise
+        _classify(limiter, grant, response)
+        if response.is_closed:
+            # 内容已在内存中的响应（如 MockTransport）不会再关闭流，直接归还
+            limiter.release(grant)
+        else:
+            response.stream = _ReleasingStream(response.stream, limiter, grant)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """RateLimitedTransport 的异步版本，排队时不阻塞事件循环"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        limiter, prompt_tokens = _request_limiter(request)
+        if limiter is None:
+            return await self._transport.handle_async_request(request)
+        grant = await limiter.aacquire(prompt_tokens)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TimeoutException:
+            limiter.on_throttled(grant, None, "overload")
+            limiter.release(grant)
+            raise
+        except BaseException:
+            limiter.release(grant)
+            raise
+        _classify(limiter, grant, response)
+        if response.is_closed:
+            # 内容已在内存中的响应（如 MockTransport）不会再关闭流，直接归还
+            limiter.release(grant)
+        else:
+            response.stream = _AsyncReleasingStream(response.stream, limiter, grant)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,141 @@
+"""
+Web Builder Agent - 提示词与知识库注册表
+系统提示词、Skill YAML、agent-skills 知识库以及由它们拼装出的 system_message
+在进程内只加载一次，所有 Agent 工厂共享：
+- 每个条目记录其依赖文件（或目录）的 mtime 与大小
+- 命中时只做 stat 校验；mtime 变化时再比较内容哈希，内容未变则继续复用
+- 任一依赖内容变化（或目录增删文件）时才重新加载
+- version 在任一条目因依赖变化而失效时递增，持有派生对象的调用方（如 Agent 实例池）据此判断是否过期
+
+并发运行时，运行启动路径上不再有重复的 YAML 解析与文件读取。
+"""
+import copy
+import hashlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import yaml
+
+
+@dataclass
+class _Dependency:
+    path: Path
+    mtime_ns: int
+    size: int
+    digest: str | None  # 目录不计算哈希
+
+
+@dataclass
+class _Entry:
+    value: Any
+    deps: list[_Dependency]
+
+
+def _digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _snapshot(path: Path) -> _Dependency:
+    """记录依赖的当前状态；不存在的路径也记录下来，出现时使条目失效"""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return _Dependency(path, -1, -1, None)
+    digest = None if path.is_dir() else _digest(path)
+    return _Dependency(path, st.st_mtime_ns, st.st_size, digest)
+
+
+class Registry:
+    """按依赖文件自动失效的进程内缓存"""
+
+    def __init__(self):
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.version = 0
+
+    def get(self, key: str, loader: Callable[[], tuple[Any, list[Path]]]) -> Any:
+        """
+        读取缓存条目，失效或不存在时调用 loader 重新加载。
+
+        Args:
+            key: 条目键
+            loader: 返回 (值, 依赖路径列表) 的加载函数
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._valid(entry):
+                self.hits += 1
+                return entry.value
+            if entry is not None:
+                self.version += 1
+            self.misses += 1
+            value, paths = loader()
+            self._entries[key] = _Entry(value, [_snapshot(Path(p)) for p in paths])
+            return value
+
+    def invalidate(self, key: str | None = None) -> None:
+        """清除指定条目（None 表示全部）"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self.version += 1
+
+    def refresh(self) -> int:
+        """校验全部条目（只做 stat），丢弃依赖已变化的条目，返回当前版本号"""
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if not self._valid(entry)]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self.version += 1
+            return self.version
+
+    @staticmethod
+    def _valid(entry: _Entry) -> bool:
+        for dep in entry.deps:
+            try:
+                st = dep.path.stat()
+            except FileNotFoundError:
+                if dep.mtime_ns != -1:
+                    return False
+                continue
+            if st.st_mtime_ns == dep.mtime_ns and st.st_size == dep.size:
+                continue
+            # 目录的 mtime 变化意味着增删了文件；文件则再比较一次内容
+            if dep.digest is None or st.st_size != dep.size or _digest(dep.path) != dep.digest:
+                return False
+            dep.mtime_ns = st.st_mtime_ns
+        return True
+
+    # -------------------------------------------------------------------
+    # 常用加载器
+    # -------------------------------------------------------------------
+
+    def read_text(self, path: str | Path) -> str:
+        """读取文本文件（文件不存在时抛出 FileNotFoundError，不缓存）"""
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(path)
+        return self.get(f"text:{path}", lambda: (path.read_text(encoding="utf-8"), [path]))
+
+    def load_yaml(self, path: str | Path) -> Any:
+        """解析 YAML 文件，返回深拷贝，调用方可以放心修改"""
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(path)
+
+        def _load():
+            with open(path, "r", encoding="utf-8") as f:
+                return yaml.safe_load(f), [path]
+
+        return copy.deepcopy(self.get(f"yaml:{path}", _load))
+
+
+# 进程级共享实例
+registry = Registry()
@@ -0,0 +1,441 @@
+"""
+Web Builder Agent - 延迟感知的模型路由
+某个后端变慢或持续报错时，固定使用单一模型的运行 p95 会急剧上升。RouterModel 位于
+create_model() 之后，对 Developer / QA / AgentOS 的所有 Agent 透明：
+1. ModelHealthTracker 按模型维护滚动窗口内的延迟（流式为首 token 延迟）与错误率
+2. 每次调用路由到当前最快的健康模型；连续失败或错误率过高的模型冷却一段时间后再试探
+3. 对冲请求（可选）：主请求超过 LLM_HEDGE_AFTER 秒仍无响应时，向第二个模型再发一份，
+   先返回者胜出；尚未产出任何内容就失败时自动切换到下一个模型。落败的请求被取消（同步调用
+   无法中断时只丢弃其结果），胜者选出后才到达的结果不计入健康统计，避免记录失真的延迟样本
+
+候选模型由 LLM_ROUTER_MODELS 配置（逗号分隔），每项可写作 "模型ID" 或 "模型ID@Base URL"，
+后者便于对本地桩服务测试。未配置时 create_model() 直接返回单模型实例。
+"""
+import asyncio
+import contextvars
+import copy
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator
+
+from agno.models.openai.like import OpenAILike
+from agno.models.response import ModelResponse
+from agno.utils.log import logger
+
+
+LLM_ROUTER_MODELS = os.getenv("LLM_ROUTER_MODELS", "")
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+LLM_ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "50"))
+LLM_ROUTER_COOLDOWN = float(os.getenv("LLM_ROUTER_COOLDOWN", "30"))
+# 窗口内至少有这么多样本后才按错误率判定不健康
+ROUTER_MIN_SAMPLES = 5
+ROUTER_MAX_ERROR_RATE = 0.5
+ROUTER_MAX_CONSECUTIVE_ERRORS = 3
+
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+_STREAM_END = object()
+
+
+def parse_router_models(spec: str) -> list[tuple[str, str | None]]:
+    """解析 LLM_ROUTER_MODELS：返回 [(模型ID, Base URL 或 None)]"""
+    models = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        model_id, _, base_url = item.partition("@")
+        models.append((model_id.strip(), base_url.strip() or None))
+    return models
+
+
+# ---------------------------------------------------------------------------
+# 健康统计
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ModelHealth:
+    """单个模型的滚动统计"""
+    samples: deque = field(default_factory=lambda: deque(maxlen=LLM_ROUTER_WINDOW))  # (延迟, 是否成功)
+    consecutive_errors: int = 0
+    cooldown_until: float = 0.0
+
+    @property
+    def latency(self) -> float | None:
+        """窗口内成功请求的平均延迟（没有成功样本时为 None）"""
+        ok = [lat for lat, success in self.samples if success]
+        return sum(ok) / len(ok) if ok else None
+
+    @property
+    def error_rate(self) -> float:
+        return sum(1 for _, success in self.samples if not success) / len(self.samples) if self.samples else 0.0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+
+class ModelHealthTracker:
+    """进程内共享的各模型延迟 / 错误率统计（线程安全）"""
+
+    def __init__(self, cooldown: float | None = None):
+        self.cooldown = LLM_ROUTER_COOLDOWN if cooldown is None else cooldown
+        self._health: dict[str, ModelHealth] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, latency: float, success: bool) -> None:
+        with self._lock:
+            health = self._health.setdefault(key, ModelHealth())
+            health.samples.append((latency, success))
+            health.consecutive_errors = 0 if success else health.consecutive_errors + 1
+            if not success and (
+                health.consecutive_errors >= ROUTER_MAX_CONSECUTIVE_ERRORS
+                or (len(health.samples) >= ROUTER_MIN_SAMPLES and health.error_rate > ROUTER_MAX_ERROR_RATE)
+            ):
+                health.cooldown_until = time.monotonic() + self.cooldown
+                logger.warning(
+                    f"[Router] 模型进入冷却 | {key} | 错误率={health.error_rate:.0%} | {self.cooldown:.0f}s"
+                )
+
+    def rank(self, keys: list[str]) -> list[str]:
+        """
+        按路由优先级排序：健康的在前；其中没有样本的先试探一次，其余按平均延迟升序，
+        只有失败样本的排在有成功样本的之后；同等条件下保持传入顺序（首选模型在前）。
+        冷却中的模型排在最后，作为兜底。
+        """
+        now = time.monotonic()
+        with self._lock:
+            def score(item):
+                index, key = item
+                health = self._health.get(key)
+                if health is None:
+                    return (0, 0.0, index)
+                latency = health.latency
+                return (0 if health.healthy(now) else 1, latency if latency is not None else float("inf"), index)
+            return [key for _, key in sorted(enumerate(keys), key=score)]
+
+    def snapshot(self) -> dict[str, dict]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                key: {
+                    "latency": h.latency,
+                    "error_rate": h.error_rate,
+                    "samples": len(h.samples),
+                    "healthy": h.healthy(now),
+                }
+                for key, h in self._health.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._health.clear()
+
+
+# 进程级共享实例
+model_health = ModelHealthTracker()
+
+
+# ---------------------------------------------------------------------------
+# 路由模型
+# ---------------------------------------------------------------------------
+
+def _health_key(model: OpenAILike) -> str:
+    return f"{model.id}@{model.base_url}"
+
+
+def _adopt(assistant_message, used) -> None:
+    """对冲副本胜出时，把它的计时 / 指标同步回调用方传入的 assistant_message"""
+    if used is not assistant_message:
+        assistant_message.metrics = used.metrics
+
+
+@dataclass
+class RouterModel(OpenAILike):
+    """
+    把每次调用路由到候选模型之一的 OpenAILike。
+
+    自身不发请求：消息格式化、请求参数与响应解析都由被选中的候选模型完成，
+    因此候选模型上的连接池、响应缓存与指标统计照常生效。
+    """
+    id: str = "router"
+    name: str = "Router"
+    candidates: list[OpenAILike] = field(default_factory=list)
+    hedge_after: float = 0.0  # 对冲等待秒数，0 表示不对冲
+    tracker: ModelHealthTracker = field(default_factory=lambda: model_health)
+
+    def _ranked(self) -> list[OpenAILike]:
+        by_key = {_health_key(m): m for m in self.candidates}
+        return [by_key[k] for k in self.tracker.rank(list(by_key))]
+
+    def _record(
+        self, model: OpenAILike, started: float, success: bool, cancelled: threading.Event | None = None,
+    ) -> None:
+        if cancelled is not None and cancelled.is_set():
+            # 对冲中落败的请求：胜者已选出，迟到的结果不代表该模型的真实延迟
+            return
+        self.tracker.record(_health_key(model), time.perf_counter() - started, success)
+
+    # -------------------------------------------------------------------
+    # 同步
+    # -------------------------------------------------------------------
+
+    def _call(
+        self, model: OpenAILike, assistant_message, kwargs, cancelled: threading.Event | None = None,
+    ) -> ModelResponse:
+        started = time.perf_counter()
+        try:
+            response = model.invoke(assistant_message=assistant_message, **kwargs)
+        except Exception:
+            self._record(model, started, False, cancelled)
+            raise
+        self._record(model, started, True, cancelled)
+        return response
+
+    def invoke(self, messages, assistant_message, **kwargs) -> ModelResponse:
+        kwargs["messages"] = messages
+        ranked = self._ranked()
+        last_error: Exception | None = None
+        while ranked:
+            primary = ranked.pop(0)
+            if not (self.hedge_after > 0 and ranked):
+                try:
+                    return self._call(primary, assistant_message, kwargs)
+                except Exception as e:
+                    logger.warning(f"[Router] {primary.id} 调用失败，切换模型: {e}")
+                    last_error = e
+                    continue
+
+            # 线程中的同步请求无法中断：胜者选出后置位，落败方的结果不再计入健康统计
+            cancelled = threading.Event()
+
+            def submit(model: OpenAILike, message):
+                return _executor.submit(contextvars.copy_context().run, self._call, model, message, kwargs, cancelled)
+
+            futures = {submit(primary, assistant_message): (primary, assistant_message)}
+            done, _ = wait(futures, timeout=self.hedge_after)
+            if not done:
+                backup = ranked.pop(0)
+                logger.info(f"[Router] {primary.id} 超过 {self.hedge_after}s 未响应，对冲到 {backup.id}")
+                message = copy.deepcopy(assistant_message)
+                futures[submit(backup, message)] = (backup, message)
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    model, message = futures[future]
+                    if future.exception() is None:
+                        cancelled.set()
+                        for other in pending:
+                            other.cancel()
+                        _adopt(assistant_message, message)
+                        return future.result()
+                    last_error = future.exception()
+                    logger.warning(f"[Router] {model.id} 调用失败: {last_error}")
+        raise last_error or RuntimeError("没有可用的候选模型")
+
+    def invoke_stream(self, messages, assistant_message, **kwargs) -> Iterator[ModelResponse]:
+        kwargs["messages"] = messages
+        ranked = self._ranked()
+        last_error: Exception | None = None
+        while ranked:
+            primary = ranked.pop(0)
+            # 各候选流的首项（响应 / 异常 / 结束标记）汇入同一个队列，先到者胜出
+            arrivals: queue.Queue = queue.Queue()
+            streams = [self._start_stream(primary, assistant_message, kwargs, arrivals)]
+            hedge = self.hedge_after > 0 and bool(ranked)
+            winner = first = None
+            while winner is None and streams:
+                try:
+                    stream, item = arrivals.get(timeout=self.hedge_after if hedge else None)
+                except queue.Empty:
+                    backup = ranked.pop(0)
+                    logger.info(f"[Router] {primary.id} 超过 {self.hedge_after}s 无首个响应，对冲到 {backup.id}")
+                    streams.append(self._start_stream(backup, copy.deepcopy(assistant_message), kwargs, arrivals))
+                    hedge = False
+                    continue
+                streams.remove(stream)
+                if isinstance(item, Exception):
+                    logger.warning(f"[Router] {stream.model.id} 调用失败: {item}")
+                    last_error = item
+                    continue
+                winner, first = stream, item
+            if winner is None:
+                continue
+            for stream in streams:
+                stream.cancelled.set()
+            yield from winner.drain(first)
+            _adopt(assistant_message, winner.message)
+            return
+        raise last_error or RuntimeError("没有可用的候选模型")
+
+    def _start_stream(self, model: OpenAILike, assistant_message, kwargs, arrivals: queue.Queue) -> "_ThreadStream":
+        stream = _ThreadStream(model, assistant_message, arrivals)
+        _executor.submit(contextvars.copy_context().run, stream.run, self, kwargs)
+        return stream
+
+    # -------------------------------------------------------------------
+    # 异步
+    # -------------------------------------------------------------------
+
+    async def _acall(self, model: OpenAILike, assistant_message, kwargs) -> ModelResponse:
+        started = time.perf_counter()
+        try:
+            response = await model.ainvoke(assistant_message=assistant_message, **kwargs)
+        except Exception:
+            self._record(model, started, False)
+            raise
+        self._record(model, started, True)
+        return response
+
+    async def ainvoke(self, messages, assistant_message, **kwargs) -> ModelResponse:
+        kwargs["messages"] = messages
+        ranked = self._ranked()
+        last_error: Exception | None = None
+        while ranked:
+            primary = ranked.pop(0)
+            tasks = {asyncio.ensure_future(self._acall(primary, assistant_message, kwargs)): (primary, assistant_message)}
+            if self.hedge_after > 0 and ranked:
+                done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+                if not done:
+                    backup = ranked.pop(0)
+                    logger.info(f"[Router] {primary.id} 超过 {self.hedge_after}s 未响应，对冲到 {backup.id}")
+                    message = copy.deepcopy(assistant_message)
+                    tasks[asyncio.ensure_future(self._acall(backup, message, kwargs))] = (backup, message)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    model, message = tasks[task]
+                    if task.exception() is None:
+                        for other in pending:
+                            other.cancel()
+                        _adopt(assistant_message, message)
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning(f"[Router] {model.id} 调用失败: {last_error}")
+        raise last_error or RuntimeError("没有可用的候选模型")
+
+    async def ainvoke_stream(self, messages, assistant_message, **kwargs) -> AsyncIterator[ModelResponse]:
+        kwargs["messages"] = messages
+        ranked = self._ranked()
+        last_error: Exception | None = None
+        while ranked:
+            primary = ranked.pop(0)
+            # 首项读取任务 -> (候选模型, 其响应流, 其 assistant_message)
+            pending = {}
+
+            def start(model: OpenAILike, message) -> None:
+                stream = self._aopen(model, message, kwargs)
+                pending[asyncio.ensure_future(anext_first(stream))] = (model, stream, message)
+
+            start(primary, assistant_message)
+            hedge = self.hedge_after > 0 and bool(ranked)
+            winner = first = None
+            while pending and winner is None:
+                done, _ = await asyncio.wait(
+                    pending, timeout=self.hedge_after if hedge else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    backup = ranked.pop(0)
+                    logger.info(f"[Router] {primary.id} 超过 {self.hedge_after}s 无首个响应，对冲到 {backup.id}")
+                    start(backup, copy.deepcopy(assistant_message))
+                    hedge = False
+                    continue
+                for task in done:
+                    model, stream, message = pending.pop(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        logger.warning(f"[Router] {model.id} 调用失败: {last_error}")
+                    elif winner is None:
+                        winner, first, winner_message = stream, task.result(), message
+                    else:
+                        await stream.aclose()
+            if winner is None:
+                continue
+            for task, (_, stream, _) in pending.items():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                await stream.aclose()
+            if first is not _STREAM_END:
+                yield first
+                async for item in winner:
+                    yield item
+            _adopt(assistant_message, winner_message)
+            return
+        raise last_error or RuntimeError("没有可用的候选模型")
+
+    async def _aopen(self, model: OpenAILike, assistant_message, kwargs) -> AsyncIterator[ModelResponse]:
+        """候选模型的流，首项到达时记录延迟，出错时记录失败"""
+        started = time.perf_counter()
+        first = True
+        try:
+            async for item in model.ainvoke_stream(assistant_message=assistant_message, **kwargs):
+                if first:
+                    self._record(model, started, True)
+                    first = False
+                yield item
+        except Exception:
+            if first:
+                self._record(model, started, False)
+            raise
+        if first:
+            self._record(model, started, True)
+
+
+async def anext_first(gen: AsyncIterator[ModelResponse]) -> Any:
+    """读取异步流的第一项；空流返回 _STREAM_END"""
+    try:
+        return await gen.__anext__()
+    except StopAsyncIteration:
+        return _STREAM_END
+
+
+class _ThreadStream:
+    """在线程池中消费候选模型的同步流：首项交给共享的 arrivals 队列，其余项放入自身队列"""
+
+    def __init__(self, model: OpenAILike, message, arrivals: queue.Queue):
+        self.model = model
+        self.message = message
+        self.items: queue.Queue = queue.Queue()
+        self.cancelled = threading.Event()
+        self._arrivals = arrivals
+        self._started = False
+
+    def _put(self, item: Any) -> None:
+        if self._started:
+            self.items.put(item)
+        else:
+            self._started = True
+            self._arrivals.put((self, item))
+
+    def run(self, router: RouterModel, kwargs) -> None:
+        started = time.perf_counter()
+        produced = False
+        try:
+            for item in self.model.invoke_stream(assistant_message=self.message, **kwargs):
+                if not produced:
+                    router._record(self.model, started, True, self.cancelled)
+                    produced = True
+                if self.cancelled.is_set():
+                    return
+                self._put(item)
+        except Exception as e:
+            if not produced:
+                router._record(self.model, started, False, self.cancelled)
+            self._put(e)
+            return
+        if not produced:
+            router._record(self.model, started, True, self.cancelled)
+        self._put(_STREAM_END)
+
+    def drain(self, first: Any) -> Iterator[ModelResponse]:
+        item = first
+        while item is not _STREAM_END:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+            item = self.items.get()
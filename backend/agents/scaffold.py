@@ -0,0 +1,92 @@
+"""
+Web Builder Agent - 项目脚手架
+Skill 的技术栈几乎总是 "Vite + React + Tailwind CSS"，package.json、vite / tailwind / postcss 配置、
+index.html、main.tsx 等样板文件每次都一样。Phase 1 之前先用预置脚手架填充 workdir，
+Developer 只需编写业务相关的增量文件。
+
+脚手架放在 scaffolds/<name>/ 下，Skill 通过以下方式关联：
+  1. skills/*.yaml 中显式声明 scaffold: <name>（scaffold: none 表示不使用）
+  2. 未声明时按 stack 在 STACK_SCAFFOLDS 中查找
+
+脚手架根目录下的 SCAFFOLD.md 是给 Developer 的使用说明（如入口文件约定），
+不会复制到 workdir，只在该脚手架被应用时附在 EXISTING_FILES 区块中。
+"""
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from agno.utils.log import logger
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
+SCAFFOLDS_DIR = BASE_DIR / "scaffolds"
+SCAFFOLD_ENABLED = os.getenv("SCAFFOLD_ENABLED", "true").lower() == "true"
+SCAFFOLD_NOTES_FILE = "SCAFFOLD.md"
+
+# 技术栈 → 默认脚手架
+STACK_SCAFFOLDS = {
+    "Vite + React + Tailwind CSS": "vite-react-tailwind",
+}
+
+
+def list_scaffolds() -> list[str]:
+    """列出所有可用的脚手架"""
+    if not SCAFFOLDS_DIR.exists():
+        return []
+    return sorted(p.name for p in SCAFFOLDS_DIR.iterdir() if p.is_dir())
+
+
+def resolve_scaffold(skill: dict) -> str | None:
+    """确定 Skill 使用的脚手架名称，没有匹配时返回 None"""
+    name = skill.get("scaffold") or STACK_SCAFFOLDS.get(skill.get("stack", ""))
+    if not name or name == "none":
+        return None
+    if not (SCAFFOLDS_DIR / name).is_dir():
+        logger.warning(f"[Scaffold] 脚手架不存在: {name}")
+        return None
+    return name
+
+
+@lru_cache(maxsize=None)
+def load_scaffold(name: str) -> dict[str, bytes]:
+    """读取脚手架全部文件（相对路径 → 内容），进程内只读一次磁盘"""
+    root = SCAFFOLDS_DIR / name
+    if not root.is_dir():
+        raise FileNotFoundError(f"脚手架不存在: {root}")
+    return {
+        path.relative_to(root).as_posix(): path.read_bytes()
+        for path in sorted(root.rglob("*"))
+        if path.is_file() and path.relative_to(root).as_posix() != SCAFFOLD_NOTES_FILE
+    }
+
+
+@lru_cache(maxsize=None)
+def scaffold_notes(name: str) -> str:
+    """读取脚手架的使用说明（SCAFFOLD.md），没有时返回空字符串"""
+    path = SCAFFOLDS_DIR / name / SCAFFOLD_NOTES_FILE
+    return path.read_text(encoding="utf-8").strip() if path.is_file() else ""
+
+
+def apply_scaffold(skill: dict, workdir: str | Path) -> list[str]:
+    """
+    用 Skill 对应的脚手架预填充 workdir，已存在的文件不会被覆盖。
+
+    Returns:
+        workdir 中来自脚手架的文件列表（相对路径）；未启用或无匹配脚手架时为空
+    """
+    if not SCAFFOLD_ENABLED:
+        return []
+    name = resolve_scaffold(skill)
+    if name is None:
+        return []
+
+    workdir = Path(workdir)
+    files = []
+    for rel, content in load_scaffold(name).items():
+        target = workdir / rel
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(content)
+        files.append(rel)
+    logger.info(f"[Scaffold] 已应用脚手架 | name={name} | 文件数={len(files)} | workdir={workdir}")
+    return files
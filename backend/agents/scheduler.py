@@ -0,0 +1,219 @@
+"""
+Web Builder Agent - 并发运行调度器
+在单个进程内并发驱动多个 WebBuilderWorkflow.arun()：
+1. 接收任意数量的 (skill_id, user_input) 任务
+2. 通过信号量限制同时在途的运行数（max_concurrency）
+3. 支持按 run_id 取消单个运行（排队中或执行中均可）
+
+大部分耗时都在等待模型响应，异步并发可以让一个进程同时驱动几十个运行。
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable
+
+from agno.agent import RunResponse
+from agno.workflow import RunEvent
+from agno.utils.log import logger
+
+from agents.workflow import WebBuilderWorkflow
+
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("WORKFLOW_MAX_CONCURRENCY", "8"))
+
+
+@dataclass
+class WorkflowJob:
+    """一个待执行的生成任务"""
+    skill_id: str
+    user_input: str = ""
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+
+
+@dataclass
+class JobResult:
+    """单个任务的执行结果"""
+    run_id: str
+    skill_id: str
+    status: str  # success / fail / cancelled / error
+    delivery: dict | None = None
+    error: str | None = None
+    duration: float = 0.0
+
+
+class WorkflowScheduler:
+    """
+    有界并发的 Workflow 调度器。
+
+    用法：
+        scheduler = WorkflowScheduler(max_concurrency=16)
+        results = await scheduler.run_all([WorkflowJob("restaurant-menu"), ...])
+
+    或逐个提交并按需取消：
+        run_id = scheduler.submit("restaurant-menu", "深色主题")
+        scheduler.cancel(run_id)
+        results = await scheduler.join()
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        workflow_factory: Callable[[WorkflowJob], WebBuilderWorkflow] | None = None,
+        on_event: Callable[[RunResponse], None] | None = None,
+    ):
+        """
+        Args:
+            max_concurrency: 同时在途的最大运行数（默认读取 WORKFLOW_MAX_CONCURRENCY，缺省 8）
+            workflow_factory: 为每个任务创建独立 Workflow 实例的工厂函数
+            on_event: 进度事件回调（每个运行的每个事件都会调用一次）
+        """
+        self.max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+        if self.max_concurrency < 1:
+            raise ValueError(f"max_concurrency 必须 >= 1: {self.max_concurrency}")
+        self.workflow_factory = workflow_factory or self._default_workflow_factory
+        self.on_event = on_event
+
+        self._semaphore: asyncio.Semaphore | None = None
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._jobs: dict[str, WorkflowJob] = {}
+        # 经 cancel(run_id) 主动取消的运行；其余来源的取消（如事件循环关闭）需要继续向上传播
+        self._cancel_requested: set[str] = set()
+        # 向上传播取消前记录的结果（任务本身处于 cancelled 状态，无法携带返回值）
+        self._results: dict[str, JobResult] = {}
+
+    @staticmethod
+    def _default_workflow_factory(job: WorkflowJob) -> WebBuilderWorkflow:
+        # 每个运行独立一个 Workflow 实例：developer / qa 是实例属性，不能跨运行共享
+        return WebBuilderWorkflow(session_id=f"sched-{job.run_id}")
+
+    # -------------------------------------------------------------------
+    # 提交 / 取消 / 等待
+    # -------------------------------------------------------------------
+
+    def submit(
+        self,
+        skill_id: str,
+        user_input: str = "",
+        run_id: str | None = None,
+    ) -> str:
+        """
+        提交一个任务，立即返回 run_id。必须在事件循环内调用。
+        """
+        job = WorkflowJob(skill_id=skill_id, user_input=user_input)
+        if run_id:
+            job.run_id = run_id
+        if job.run_id in self._tasks:
+            raise ValueError(f"run_id 已存在: {job.run_id}")
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self._jobs[job.run_id] = job
+        self._tasks[job.run_id] = asyncio.get_running_loop().create_task(
+            self._execute(job), name=f"workflow-{job.run_id}"
+        )
+        return job.run_id
+
+    def cancel(self, run_id: str) -> bool:
+        """取消指定运行。返回 False 表示 run_id 不存在或已经结束。"""
+        task = self._tasks.get(run_id)
+        if task is None or task.done():
+            return False
+        logger.info(f"[Scheduler] 取消运行 | run_id={run_id}")
+        self._cancel_requested.add(run_id)
+        return task.cancel()
+
+    def in_flight(self) -> int:
+        """当前尚未结束的任务数（含排队中）"""
+        return sum(1 for t in self._tasks.values() if not t.done())
+
+    async def wait(self, run_id: str) -> JobResult:
+        """等待单个运行结束并返回结果"""
+        task = self._tasks.get(run_id)
+        if task is None:
+            raise KeyError(f"未知的 run_id: {run_id}")
+        await asyncio.wait([task])
+        return self._task_result(run_id, task)
+
+    async def join(self) -> list[JobResult]:
+        """等待所有已提交的任务结束，按提交顺序返回结果"""
+        if self._tasks:
+            await asyncio.wait(list(self._tasks.values()))
+        return [self._task_result(r, t) for r, t in self._tasks.items()]
+
+    async def run_all(self, jobs: list[WorkflowJob]) -> list[JobResult]:
+        """批量提交并等待全部完成"""
+        run_ids = [self.submit(j.skill_id, j.user_input, j.run_id) for j in jobs]
+        return [await self.wait(r) for r in run_ids]
+
+    def _task_result(self, run_id: str, task: asyncio.Task) -> JobResult:
+        # 尚未开始执行就被取消的任务不会进入 _execute，需要在这里补齐结果
+        if task.cancelled():
+            if run_id in self._results:
+                return self._results[run_id]
+            return JobResult(
+                run_id=run_id,
+                skill_id=self._jobs[run_id].skill_id,
+                status="cancelled",
+            )
+        return task.result()
+
+    # -------------------------------------------------------------------
+    # 执行
+    # -------------------------------------------------------------------
+
+    async def _execute(self, job: WorkflowJob) -> JobResult:
+        start = time.perf_counter()
+        try:
+            async with self._semaphore:
+                logger.info(
+                    f"[Scheduler] 开始运行 | run_id={job.run_id} | skill={job.skill_id} | "
+                    f"in_flight={self.in_flight()}"
+                )
+                workflow = self.workflow_factory(job)
+                last = None
+                async for response in workflow.arun(
+                    skill_id=job.skill_id,
+                    user_input=job.user_input,
+                    run_id=job.run_id,
+                ):
+                    if self.on_event:
+                        self.on_event(response)
+                    if response.event == RunEvent.workflow_completed:
+                        last = response
+
+            delivery = None
+            if last is not None and last.content:
+                delivery = json.loads(last.content)
+            return JobResult(
+                run_id=job.run_id,
+                skill_id=job.skill_id,
+                status=(delivery or {}).get("status", "fail"),
+                delivery=delivery,
+                duration=time.perf_counter() - start,
+            )
+        except asyncio.CancelledError:
+            logger.info(f"[Scheduler] 运行已取消 | run_id={job.run_id}")
+            result = JobResult(
+                run_id=job.run_id,
+                skill_id=job.skill_id,
+                status="cancelled",
+                duration=time.perf_counter() - start,
+            )
+            if job.run_id in self._cancel_requested:
+                return result
+            # 不是调度器自身发起的取消：记录结果后继续传播，不吞掉调用方的取消
+            self._results[job.run_id] = result
+            raise
+        except Exception as e:
+            logger.error(f"[Scheduler] 运行失败 | run_id={job.run_id} | {type(e).__name__}: {e}")
+            return JobResult(
+                run_id=job.run_id,
+                skill_id=job.skill_id,
+                status="error",
+                error=f"{type(e).__name__}: {e}",
+                duration=time.perf_counter() - start,
+            )
@@ -0,0 +1,280 @@
+"""
+Web Builder Agent - 日志压缩的 Shell 工具
+agno 的 ShellTools 会把命令的完整输出（进度条、弃用警告、bundle 体积表）原样返回给模型，
+这些内容随后在每一轮对话中被重复发送。CompactShellTools 改为：
+1. 命令输出完整写入工作目录下的日志文件（LOG_DIR_NAME/，不计入清单与构建指纹）
+2. 只返回退出码、错误摘录（匹配错误特征的行及其上下文）与有限行数的尾部
+3. 支持超时（超时后终止整个进程组，退出码 124）
+4. 需要更多细节时通过 read_log 按行增量读取日志
+
+npm_install / npm_build 也通过 run_logged() 执行，返回同样的压缩摘要。
+"""
+import os
+import re
+import signal
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from agno.tools import Toolkit
+from agno.utils.log import logger
+
+
+LOG_DIR_NAME = ".agent-logs"
+SHELL_TIMEOUT = int(os.getenv("SHELL_TOOL_TIMEOUT", "300"))
+SHELL_TAIL_LINES = int(os.getenv("SHELL_TOOL_TAIL_LINES", "30"))
+SHELL_MAX_EXCERPTS = 20
+SHELL_EXCERPT_CONTEXT = 2
+SHELL_MAX_LINE_CHARS = 300
+LOG_READ_MAX_LINES = 200
+
+_ANSI_RE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+_ERROR_RE = re.compile(
+    r"\berror\b|ERR!|\bfailed\b|\bfailure\b|cannot find|could not resolve|not found|"
+    r"exception|traceback|\bTS\d{4}\b|✘|✖",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class CommandResult:
+    """一次命令执行的结果（完整输出在 log_path 中）"""
+    exit_code: int
+    log_path: Path
+    duration: float
+    line_count: int = 0
+    excerpts: list[str] | None = None
+    tail: list[str] | None = None
+
+    @property
+    def timed_out(self) -> bool:
+        return self.exit_code == 124
+
+    def summary(self, base_dir: Path | None = None) -> str:
+        """压缩摘要：退出码、日志位置、错误摘录与尾部"""
+        return "\n".join([
+            f"exit_code: {self.exit_code}",
+            f"duration: {self.duration:.1f}s",
+            self.log_line(base_dir),
+            self.details(),
+        ])
+
+    def log_line(self, base_dir: Path | None = None) -> str:
+        log = self.log_path.relative_to(base_dir) if base_dir else self.log_path
+        return f"log: {log}（共 {self.line_count} 行，可用 read_log 查看）"
+
+    def details(self) -> str:
+        """错误摘录与输出尾部"""
+        lines = []
+        if self.excerpts:
+            lines += ["", "错误摘录:", *self.excerpts]
+        if self.tail:
+            lines += ["", f"输出尾部（最后 {len(self.tail)} 行）:", *self.tail]
+        return "\n".join(lines)
+
+
+def _split_lines(text: str) -> list[str]:
+    """只按 \n 分行（str.splitlines 会把进度条的 \r 也当作换行）"""
+    lines = text.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def clean_line(line: str) -> str:
+    """去掉 ANSI 控制符；带 \\r 的进度条只保留最后一帧；过长的行截断"""
+    frames = [f for f in _ANSI_RE.sub("", line.rstrip("\n")).split("\r") if f.strip()]
+    line = frames[-1].rstrip() if frames else ""
+    if len(line) > SHELL_MAX_LINE_CHARS:
+        line = line[:SHELL_MAX_LINE_CHARS] + " …"
+    return line
+
+
+def compact_log(
+    lines: list[str],
+    tail: int = SHELL_TAIL_LINES,
+    max_excerpts: int = SHELL_MAX_EXCERPTS,
+) -> tuple[list[str], list[str]]:
+    """
+    从完整日志中提取 (错误摘录, 尾部)。
+
+    错误摘录为匹配错误特征的行及其前后 SHELL_EXCERPT_CONTEXT 行（带行号），
+    已包含在尾部中的行不重复摘录。
+    """
+    cleaned = [clean_line(l) for l in lines]
+    tail_start = max(0, len(cleaned) - tail)
+    picked: list[int] = []
+    seen: set[int] = set()
+    # 第一行是 run_logged 写入的命令行本身，不参与错误匹配
+    for i, line in enumerate(cleaned[:tail_start]):
+        if i == 0 and line.startswith("$ ") or not _ERROR_RE.search(line):
+            continue
+        for j in range(max(0, i - SHELL_EXCERPT_CONTEXT), min(tail_start, i + SHELL_EXCERPT_CONTEXT + 1)):
+            if j not in seen and cleaned[j]:
+                seen.add(j)
+                picked.append(j)
+        if len(picked) >= max_excerpts:
+            break
+
+    excerpts, previous = [], None
+    for j in picked[:max_excerpts]:
+        if previous is not None and j != previous + 1:
+            excerpts.append("  ...")
+        excerpts.append(f"{j + 1:>5}| {cleaned[j]}")
+        previous = j
+    return excerpts, [l for l in cleaned[tail_start:] if l]
+
+
+def log_path_for(base_dir: Path, name: str) -> Path:
+    """
+    在 base_dir/LOG_DIR_NAME 下分配日志文件路径。
+
+    文件名按目录内序号编号（001-npm-install.log），同一运行的同一命令序列得到相同的路径，
+    工具摘要因此保持确定，不会让模型响应缓存（agents.llm_cache）的键逐次变化。
+    """
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "-", name).strip("-")[:40] or "command"
+    log_dir = Path(base_dir) / LOG_DIR_NAME
+    log_dir.mkdir(parents=True, exist_ok=True)
+    seq = len(list(log_dir.glob("*.log")))
+    while True:
+        seq += 1
+        path = log_dir / f"{seq:03d}-{slug}.log"
+        try:
+            # 独占创建，占住序号，并发分配时不会拿到同一路径
+            path.touch(exist_ok=False)
+            return path
+        except FileExistsError:
+            continue
+
+
+def run_logged(
+    args: list[str],
+    cwd: str | Path,
+    log_path: str | Path,
+    timeout: float | None = None,
+    tail: int = SHELL_TAIL_LINES,
+) -> CommandResult:
+    """
+    执行命令，stdout / stderr 合并写入 log_path，返回带压缩摘要的结果。
+
+    Args:
+        args: 命令及参数
+        cwd: 工作目录
+        log_path: 日志文件路径（父目录不存在时自动创建）
+        timeout: 超时秒数（默认 SHELL_TIMEOUT），超时后终止整个进程组并返回退出码 124
+        tail: 摘要中保留的尾部行数
+    """
+    log_path = Path(log_path)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    timeout = timeout or SHELL_TIMEOUT
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8", errors="replace") as log:
+        log.write(f"$ {' '.join(args)}\n")
+        log.flush()
+        try:
+            proc = subprocess.Popen(
+                args,
+                cwd=cwd,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        except OSError as e:
+            log.write(f"无法执行命令: {e}\n")
+            exit_code = 127
+        else:
+            try:
+                exit_code = proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                # npm 会派生子进程，需要终止整个进程组
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                proc.wait()
+                log.write(f"\n命令超时（{timeout}s），已终止\n")
+                exit_code = 124
+
+    # newline="" 保留 \r，进度条的多帧留在同一行内由 clean_line 折叠
+    with open(log_path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        lines = _split_lines(f.read())
+    excerpts, tail_lines = compact_log(lines, tail)
+    return CommandResult(
+        exit_code=exit_code,
+        log_path=log_path,
+        duration=time.perf_counter() - start,
+        line_count=len(lines),
+        excerpts=excerpts,
+        tail=tail_lines,
+    )
+
+
+class CompactShellTools(Toolkit):
+    """限定在 base_dir 内执行、输出写入日志文件并压缩返回的 Shell 工具"""
+
+    def __init__(self, base_dir: str | Path, **kwargs):
+        self.base_dir = Path(base_dir)
+        super().__init__(
+            name="shell_tools",
+            tools=[self.run_shell_command, self.read_log],
+            instructions=(
+                "run_shell_command 只返回退出码、错误摘录和输出尾部，完整输出保存在日志文件中；"
+                "摘要不足以定位问题时，再用 read_log 按行读取日志的相关片段。"
+            ),
+            add_instructions=True,
+            **kwargs,
+        )
+
+    def run_shell_command(self, args: list[str], timeout: int | None = None) -> str:
+        """
+        在项目目录中执行命令。完整输出写入日志文件，只返回退出码、错误摘录与输出尾部。
+
+        Args:
+            args: 命令及参数列表，如 ["ls", "-la"]
+            timeout: 超时秒数（可选，默认 300）
+
+        Returns:
+            exit_code、日志文件路径、错误摘录与输出尾部
+        """
+        if not args:
+            return "exit_code: 1\nerror: 命令为空"
+        logger.info(f"[Shell] {' '.join(args)} | cwd={self.base_dir}")
+        result = run_logged(args, self.base_dir, log_path_for(self.base_dir, "-".join(args[:3])), timeout)
+        return result.summary(self.base_dir)
+
+    def read_log(self, log_file: str, offset: int = 0, max_lines: int = LOG_READ_MAX_LINES) -> str:
+        """
+        增量读取 run_shell_command 生成的日志文件。
+
+        Args:
+            log_file: 日志文件路径（run_shell_command 返回的 log 字段）
+            offset: 起始行号（从 0 开始）
+            max_lines: 最多读取的行数（上限 200）
+
+        Returns:
+            日志片段（带行号），以及下一次读取的 offset
+        """
+        log_dir = (self.base_dir / LOG_DIR_NAME).resolve()
+        path = (self.base_dir / log_file).resolve()
+        if not path.is_relative_to(log_dir):
+            return f"error: 只能读取 {LOG_DIR_NAME}/ 下的日志文件"
+        if not path.is_file():
+            return f"error: 日志文件不存在: {log_file}"
+
+        offset = max(0, offset)
+        max_lines = max(1, min(max_lines, LOG_READ_MAX_LINES))
+        with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+            lines = _split_lines(f.read())
+        total = len(lines)
+        chunk = [
+            f"{i + 1:>5}| {clean_line(lines[i])}"
+            for i in range(offset, min(total, offset + max_lines))
+        ]
+        next_offset = offset + len(chunk)
+        footer = (
+            f"[已读到末尾，共 {total} 行]" if next_offset >= total
+            else f"[共 {total} 行，继续读取请使用 offset={next_offset}]"
+        )
+        return "\n".join(chunk + [footer])
@@ -0,0 +1,189 @@
+"""
+Web Builder Agent - 项目快照工具
+QA Agent 原本通过 FileTools 逐个 list / read 文件了解项目，每读一个文件就是一轮模型往返。
+ProjectSnapshotTools.project_snapshot 一次返回：
+1. 目录树（跳过 node_modules / dist 等目录与 lockfile）
+2. 相关源码文件的内容：按重要程度排序（入口与配置 → 组件 → 样式 → 其他），
+   在 token 预算内尽量完整放入，放不下的文件截断或只列出名称
+
+快照按 workdir 内容哈希缓存（内容清单 + 参数），文件未变化时重复调用直接返回。
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from agno.tools import Toolkit
+from agno.utils.log import logger
+
+from agents.knowledge import estimate_tokens
+from agents.manifest import SKIPPED_FILES, build_manifest
+
+
+SNAPSHOT_TOKEN_BUDGET = int(os.getenv("QA_SNAPSHOT_TOKEN_BUDGET", "24000"))
+SNAPSHOT_CACHE_SIZE = 32
+# 单个文件最多占用的预算比例，避免一个大文件挤掉其余文件
+SNAPSHOT_MAX_FILE_SHARE = 0.25
+
+SNAPSHOT_SUFFIXES = {".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs", ".css", ".html", ".json", ".md", ".svg"}
+
+# 文件优先级：数值越小越先放入
+_PRIORITY_NAMES = {
+    "package.json": 0,
+    "index.html": 1,
+    "main.tsx": 1, "main.ts": 1, "main.jsx": 1, "main.js": 1,
+    "App.tsx": 1, "App.jsx": 1, "App.ts": 1, "App.js": 1,
+}
+_SUFFIX_PRIORITY = {".tsx": 2, ".jsx": 2, ".ts": 3, ".js": 3, ".mjs": 3, ".cjs": 3, ".css": 4,
+                    ".html": 4, ".json": 5, ".md": 6, ".svg": 7}
+
+_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _priority(rel: str) -> tuple:
+    path = Path(rel)
+    in_src = path.parts[0] == "src" if len(path.parts) > 1 else False
+    rank = _PRIORITY_NAMES.get(path.name, _SUFFIX_PRIORITY.get(path.suffix, 9))
+    # 配置文件（vite.config.ts 等）与 src 下的代码同级，其余位置的文件靠后
+    if not in_src and rank in (2, 3) and ".config." not in path.name:
+        rank += 3
+    return rank, len(path.parts), rel
+
+
+def render_tree(paths: list[str]) -> str:
+    """把相对路径列表渲染为缩进目录树"""
+    lines, printed = [], set()
+    for rel in sorted(paths):
+        parts = rel.split("/")
+        for depth in range(len(parts) - 1):
+            prefix = "/".join(parts[:depth + 1])
+            if prefix not in printed:
+                printed.add(prefix)
+                lines.append("  " * depth + parts[depth] + "/")
+        lines.append("  " * (len(parts) - 1) + parts[-1])
+    return "\n".join(lines)
+
+
+def _truncate(text: str, budget: int) -> str:
+    """按行截断到约 budget 个 token"""
+    kept, used = [], 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def build_snapshot(
+    workdir: str | Path,
+    budget: int | None = None,
+    paths: list[str] | None = None,
+) -> str:
+    """
+    生成项目快照（带缓存）。
+
+    Args:
+        workdir: 项目工作目录
+        budget: 文件内容部分的 token 预算（默认读取 QA_SNAPSHOT_TOKEN_BUDGET）
+        paths: 只放入这些文件（或目录前缀）的内容；目录树始终完整
+    """
+    workdir = Path(workdir)
+    budget = budget or SNAPSHOT_TOKEN_BUDGET
+    manifest = {rel: h for rel, h in build_manifest(workdir).items() if Path(rel).name not in SKIPPED_FILES}
+
+    digest = hashlib.sha256(f"{workdir.resolve()}\0{budget}\0{sorted(paths or [])}".encode("utf-8"))
+    for rel, file_hash in manifest.items():
+        digest.update(f"{rel}\0{file_hash}\n".encode("utf-8"))
+    key = digest.hexdigest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    candidates = [rel for rel in manifest if Path(rel).suffix in SNAPSHOT_SUFFIXES]
+    if paths:
+        prefixes = [p.strip("/") for p in paths]
+        candidates = [
+            rel for rel in candidates
+            if any(rel == p or rel.startswith(p + "/") for p in prefixes)
+        ]
+
+    sections, omitted, truncated, used = [], [], [], 0
+    max_file = max(1, int(budget * SNAPSHOT_MAX_FILE_SHARE))
+    for rel in sorted(candidates, key=_priority):
+        try:
+            text = (workdir / rel).read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            omitted.append(rel)
+            continue
+        cost = estimate_tokens(text)
+        remaining = budget - used
+        if cost <= min(remaining, max_file):
+            body = text
+        elif min(remaining, max_file) >= 200:
+            body = _truncate(text, min(remaining, max_file))
+            truncated.append(rel)
+        else:
+            omitted.append(rel)
+            continue
+        used += estimate_tokens(body)
+        sections.append(f"=== {rel}{'（已截断）' if rel in truncated else ''} ===\n{body}")
+
+    parts = [
+        f"# 项目快照（文件数={len(manifest)}，内容约 {used} tokens）",
+        "## 目录结构",
+        render_tree(list(manifest)) or "（空目录）",
+        "## 文件内容",
+        "\n\n".join(sections) or "（无）",
+    ]
+    if truncated or omitted:
+        parts.append(
+            "## 未完整包含的文件（如需审查请用 read_file 单独读取）\n"
+            + "\n".join(f"- {rel}（已截断）" for rel in truncated)
+            + ("\n" if truncated and omitted else "")
+            + "\n".join(f"- {rel}" for rel in omitted)
+        )
+    snapshot = "\n\n".join(parts)
+    logger.info(
+        f"[Snapshot] 生成快照 | 文件={len(sections)} | 截断={len(truncated)} | "
+        f"省略={len(omitted)} | tokens≈{used}"
+    )
+
+    with _cache_lock:
+        _cache[key] = snapshot
+        while len(_cache) > SNAPSHOT_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return snapshot
+
+
+class ProjectSnapshotTools(Toolkit):
+    """为 QA 提供一次性项目快照的工具"""
+
+    def __init__(self, base_dir: str | Path, **kwargs):
+        self.base_dir = Path(base_dir)
+        super().__init__(
+            name="project_snapshot_tools",
+            tools=[self.project_snapshot],
+            instructions=(
+                "审查开始时先调用一次 project_snapshot，一次性获取目录结构与源码内容，"
+                "不要逐个 list_files / read_file；只有快照中被截断或省略的文件才单独读取。"
+            ),
+            add_instructions=True,
+            **kwargs,
+        )
+
+    def project_snapshot(self, paths: list[str] | None = None) -> str:
+        """
+        获取项目快照：完整目录树 + 按重要程度排序的源码文件内容（受 token 预算限制）。
+
+        Args:
+            paths: 可选，只返回这些文件或目录下文件的内容（相对项目目录）
+
+        Returns:
+            目录结构、文件内容，以及被截断 / 省略的文件列表
+        """
+        return build_snapshot(self.base_dir, paths=paths)
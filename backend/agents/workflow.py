@@ -2,15 +2,34 @@
 Web Builder Agent - Workflow 编排
 使用 Agno Workflow 手动编排 Developer → QA 的协作流水线：
 1. Developer Agent 根据 Skill 模板生成完整前端项目
-2. QA Agent 审查生成的代码，输出 QAReport
-3. 如果 QA 未通过且有 critical 问题，将反馈发回 Developer 修复（最多 1 轮）
+   （开始前用 agents.scaffold 预置该 Skill 的项目脚手架，Developer 只需编写增量文件）
+   （随后执行静态预检 agents.precheck，确定性规则直接产出 QAIssue）
+2. QA Agent 审查生成的代码，输出 QAReport（qa_mode="parallel" 时按维度/文件分片并发审查）
+3. 如果 QA 未通过且有 critical 问题，将反馈发回 Developer 修复（默认 1 轮，可配置多轮；
+   轮间基于 workdir 内容哈希清单只复审改动过的文件）
 4. 最终输出交付结果
+
+每个阶段完成后写入检查点（agents.checkpoint），可通过 run_id 从最后完成的阶段恢复。
+
+同时提供同步 run() 与异步 arun() 两条执行路径，arun() 使用 Agent 的异步接口，
+可由 agents.scheduler.WorkflowScheduler 在单进程内并发驱动多个运行。
+
+两条路径都以流式方式运行 Agent，并持续输出细粒度进度事件（models.events）：
+阶段开始/结束、Agent 增量文本、工具调用开始/结束、构建输出行。
+
+运行期间把一个 RunMetrics 绑定到上下文（agents.metrics），汇总各阶段耗时、模型请求延迟与
+token、各工具调用次数与耗时，写入交付 JSON 的 metrics 区块，并同步到进程级 Prometheus 指标。
 """
+import asyncio
+import contextvars
+import inspect
 import json
 import os
+import time
 import uuid
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterator
+from typing import AsyncIterator, Iterator
 
 from agno.agent import Agent, RunResponse
 from agno.workflow import Workflow, RunEvent
@@ -22,8 +41,76 @@ from agents.developer import (
     build_user_message,
     WORKSPACE_DIR,
 )
-from agents.qa import create_qa_agent
-from models.schemas import QAReport
+from agents.qa import (
+    create_qa_agent,
+    create_qa_reviewers,
+    stream_parallel_qa,
+    astream_parallel_qa,
+    reviewer_scope,
+    parse_qa_report,
+    merge_qa_reports,
+    select_qa_knowledge,
+    QA_KNOWLEDGE_MODE,
+    REVIEWABLE_SUFFIXES,
+)
+from agents.checkpoint import (
+    WorkflowCheckpoint,
+    checkpoint_path,
+    load_checkpoint,
+    save_checkpoint,
+)
+from agents.manifest import Manifest, ManifestDiff, build_manifest, diff_manifests, normalize_path
+from agents.metrics import (
+    RunMetrics,
+    bind_run_metrics,
+    current_run_metrics,
+    iter_in_context,
+    observe_phase,
+    unbind_run_metrics,
+)
+from agents.pool import agent_pool
+from agents.precheck import (
+    PrecheckResult,
+    run_precheck,
+    build_precheck_report,
+    format_precheck_for_qa,
+    merge_precheck_report,
+)
+from agents.scaffold import apply_scaffold
+from agents.workspace import WORKSPACE_GC_ON_DELIVERY, WorkspaceManager
+from models.events import ProgressEvent, WorkflowEvent
+from models.schemas import QAIssue, QAReport
+
+
+# Agent 流式输出中代表"增量文本"的事件名（兼容 agno 1.x / 2.x 的命名）
+_CONTENT_EVENTS = {"RunResponseContent", "RunContent"}
+
+# 工具结果在进度事件中的预览长度 / 构建输出转发的最大行数
+_TOOL_RESULT_PREVIEW_CHARS = 500
+_BUILD_OUTPUT_TAIL_LINES = 50
+
+
+@dataclass
+class _Rereview:
+    """一次增量复审的输入"""
+    changed: list[str]
+    carried: list[QAIssue]
+    previous: list[QAIssue] = field(default_factory=list)  # 改动文件上的旧问题，交给复审确认
+    agent: Agent | None = None
+    qa_input: str = ""
+    precheck: PrecheckResult | None = None
+
+
+@dataclass
+class _AgentOutcome:
+    """一次 Agent 流式运行的结果收集器"""
+    response: RunResponse | None = None
+    deltas: list[str] = field(default_factory=list)
+
+    def finalize(self) -> None:
+        # 未拿到最终响应对象时，用累积的增量文本兜底
+        if self.response is None and self.deltas:
+            self.response = RunResponse(content="".join(self.deltas))
 
 
 class WebBuilderWorkflow(Workflow):
@@ -39,154 +126,856 @@ class WebBuilderWorkflow(Workflow):
     developer: Agent | None = None
     qa: Agent | None = None
 
+    # QA 模式："single" 单个 QA Agent 全量审查；"parallel" 扇出多个只读 Reviewer 并发审查
+    qa_mode: str = os.getenv("QA_MODE", "single")
+    # 并行模式的分片方式："category" 按审查维度；"files" 按项目文件
+    qa_shard_by: str = os.getenv("QA_SHARD_BY", "category")
+
+    # Phase 1 与 Phase 2 之间的静态预检；项目干净时可直接跳过 LLM QA
+    precheck_enabled: bool = os.getenv("QA_PRECHECK", "true").lower() != "false"
+    skip_qa_when_clean: bool = os.getenv("QA_SKIP_WHEN_CLEAN", "false").lower() == "true"
+
+    # Phase 3 最大修复轮数；轮间只对改动文件做增量复审
+    max_fix_rounds: int = int(os.getenv("WORKFLOW_MAX_FIX_ROUNDS", "1"))
+
+    # 各阶段边界的 workdir 内容哈希清单（阶段名 → 清单）
+    manifests: dict[str, Manifest] | None = None
+
     def run(
         self,
         skill_id: str,
         user_input: str = "",
         run_id: str | None = None,
+        resume: bool = False,
     ) -> Iterator[RunResponse]:
         """
         执行完整的生成 + 审查工作流。
 
+        运行过程中持续 yield 进度事件（event 为 WorkflowEvent，content 为 ProgressEvent），
+        最后 yield 一个 RunEvent.workflow_completed，content 为交付 JSON。
+        每个阶段完成后写入检查点，resume=True 时从 run_id 的最后完成阶段继续。
+
         Args:
             skill_id: Skill 模板 ID（如 "restaurant-menu"）
             user_input: 用户补充需求
-            run_id: 运行 ID（可选，默认自动生成）
+            run_id: 运行 ID（可选，默认自动生成；resume 时必填）
+            resume: 是否从检查点恢复
         """
+        run_metrics = RunMetrics()
+        # 同步生成器在调用方的上下文中恢复执行：改为在独立上下文中绑定并驱动，
+        # 否则 yield 之间调用方（或交错驱动的其他运行）会看到本次运行的指标
+        context = contextvars.copy_context()
+        token = context.run(bind_run_metrics, run_metrics)
+        status = "error"
+        try:
+            yield from iter_in_context(context, self._run(skill_id, user_input, run_id, resume))
+            status = run_metrics.status
+        except GeneratorExit:
+            status = "cancelled"
+            raise
+        finally:
+            context.run(unbind_run_metrics, token, status)
+
+    def _run(
+        self,
+        skill_id: str,
+        user_input: str,
+        run_id: str | None,
+        resume: bool,
+    ) -> Iterator[RunResponse]:
         # ---------------------------------------------------------------
         # 准备阶段
         # ---------------------------------------------------------------
-        _run_id = run_id or uuid.uuid4().hex[:8]
-        workdir = str(WORKSPACE_DIR / _run_id)
-        os.makedirs(workdir, exist_ok=True)
+        _run_id, workdir, skill, checkpoint = self._prepare(skill_id, run_id, user_input, resume)
+
+        # ---------------------------------------------------------------
+        # Phase 1: Developer 生成项目
+        # ---------------------------------------------------------------
+        if checkpoint.reached("develop"):
+            logger.info("[Workflow] Phase 1 跳过: 已从检查点恢复")
+        else:
+            logger.info("[Workflow] Phase 1: Developer 开始生成项目...")
+            yield self._progress(WorkflowEvent.phase_started, _run_id, "develop")
+            phase_start = time.perf_counter()
 
-        skill = load_skill(skill_id)
+            scaffold_files = apply_scaffold(skill, workdir)
+            user_message = build_user_message(skill, user_input, _run_id, workdir, scaffold_files)
+            dev = _AgentOutcome()
+            yield from self._stream_agent(self.developer, user_message, _run_id, "develop", dev)
 
-        logger.info(f"[Workflow] 开始生成 | skill={skill_id} | run_id={_run_id}")
-        logger.info(f"[Workflow] 工作目录: {workdir}")
+            if not dev.response or not dev.response.content:
+                self._release_agents()
+                yield self._developer_failed_response(_run_id)
+                return
 
-        # 创建 Agent 实例（绑定到当前 run 的工作目录）
-        self.developer = create_developer_agent(workdir=workdir)
-        self.qa = create_qa_agent(workdir=workdir)
+            logger.info("[Workflow] Phase 1 完成: Developer 已生成项目")
+            self._record_manifest("develop", workdir)
+            self._save_checkpoint(checkpoint, "develop", dev_content=str(dev.response.content))
+            yield self._phase_completed(_run_id, "develop", phase_start)
 
         # ---------------------------------------------------------------
-        # Phase 1: Developer 生成项目
+        # Phase 1.5 + Phase 2: 静态预检与 QA 审查
         # ---------------------------------------------------------------
-        logger.info("[Workflow] Phase 1: Developer 开始生成项目...")
+        if checkpoint.reached("qa"):
+            logger.info("[Workflow] Phase 2 跳过: 已从检查点恢复")
+            qa_report = checkpoint.qa_report
+        else:
+            precheck = None
+            if self.precheck_enabled:
+                yield self._progress(WorkflowEvent.phase_started, _run_id, "precheck")
+                precheck = self._run_precheck(workdir, skill)
+                yield self._precheck_completed(_run_id, precheck)
+
+            logger.info("[Workflow] Phase 2: QA 开始审查...")
+            yield self._progress(WorkflowEvent.phase_started, _run_id, "qa")
+            phase_start = time.perf_counter()
 
-        user_message = build_user_message(skill, user_input, _run_id, workdir)
-        dev_response: RunResponse = self.developer.run(user_message)
+            if self._can_skip_qa(precheck):
+                qa_report = build_precheck_report(precheck)
+            else:
+                qa_input = self._build_qa_input(skill, workdir, precheck)
+                if self.qa_mode == "parallel":
+                    reviewers = create_qa_reviewers(workdir, shard_by=self.qa_shard_by)
+                    logger.info(f"[Workflow] Phase 2: 并行审查，Reviewer 数={len(reviewers)}")
+                    reports: list[QAReport] = []
+                    yield from self._stream_reviewers(reviewers, qa_input, _run_id, reports)
+                    qa_report = merge_qa_reports(reports, match_category=self.qa_shard_by != "category")
+                else:
+                    qa = _AgentOutcome()
+                    yield from self._stream_agent(self.qa, qa_input, _run_id, "qa", qa)
+                    qa_report = self._parse_qa_report(qa.response)
+                qa_report = self._merge_precheck(qa_report, precheck, workdir, skill)
+            # QA 可能直接修复文件，在 Phase 2 边界记录快照，修复轮只比较 Developer 的改动
+            self._record_manifest("qa", workdir)
+            self._save_checkpoint(checkpoint, "qa", qa_report=qa_report)
+            yield self._phase_completed(_run_id, "qa", phase_start)
 
-        if not dev_response or not dev_response.content:
-            logger.error("[Workflow] Developer Agent 未返回有效内容")
+        if not qa_report:
+            logger.warning("[Workflow] QA Agent 未返回有效报告，跳过审查环节")
+            self._mark_delivered(checkpoint)
             yield RunResponse(
                 event=RunEvent.workflow_completed,
-                content=json.dumps({
-                    "run_id": _run_id,
-                    "status": "fail",
-                    "error": "Developer Agent 未返回有效内容",
-                }, ensure_ascii=False),
+                content=self._build_delivery_json(
+                    _run_id, workdir, skill, qa_report=None, metrics=self._run_metrics_block()
+                ),
             )
             return
 
-        logger.info("[Workflow] Phase 1 完成: Developer 已生成项目")
+        self._log_qa_report(qa_report)
 
         # ---------------------------------------------------------------
-        # Phase 2: QA 审查
+        # Phase 3: 条件修复（仅当 QA 未通过时，轮间增量复审）
         # ---------------------------------------------------------------
-        logger.info("[Workflow] Phase 2: QA 开始审查...")
+        fix_round = checkpoint.fix_round
+        while not checkpoint.reached("fixed") and fix_round < self.max_fix_rounds:
+            fix_message = self._build_fix_message(qa_report)
+            if not fix_message:
+                break
+            fix_round += 1
 
-        qa_input = (
-            f"请审查以下项目目录中的所有代码文件:\n"
-            f"项目目录: {workdir}\n"
-            f"技术栈: {skill.get('stack', 'Vite + React + Tailwind CSS')}\n"
-            f"项目类型: {skill.get('name', '未知')}\n\n"
-            f"请按照你的审查流程，逐维度检查并输出 QAReport。"
+            yield self._progress(WorkflowEvent.phase_started, _run_id, "fix")
+            phase_start = time.perf_counter()
+            yield from self._stream_agent(
+                self.developer, fix_message, _run_id, "fix", _AgentOutcome()
+            )
+            diff = self._record_manifest(f"fix-{fix_round}", workdir)
+            logger.info(
+                f"[Workflow] Phase 3 完成: Developer 已尝试修复 "
+                f"(第 {fix_round} 轮, 改动文件数={len(diff.changed)})"
+            )
+            yield self._phase_completed(_run_id, "fix", phase_start)
+
+            # 还有下一轮修复机会时，才需要复审以决定是否继续
+            rereview_needed = fix_round < self.max_fix_rounds and bool(diff)
+            if rereview_needed:
+                yield self._progress(WorkflowEvent.phase_started, _run_id, "rereview")
+                phase_start = time.perf_counter()
+                rereview = self._prepare_rereview(qa_report, diff, workdir, skill)
+                outcome = _AgentOutcome()
+                if rereview.agent:
+                    yield from self._stream_agent(
+                        rereview.agent, rereview.qa_input, _run_id, "rereview", outcome
+                    )
+                qa_report = self._finish_rereview(rereview, self._parse_qa_report(outcome.response))
+                yield self._phase_completed(_run_id, "rereview", phase_start)
+
+            self._save_checkpoint(checkpoint, "fix", fix_round=fix_round, qa_report=qa_report)
+            if not rereview_needed:
+                break
+        self._save_checkpoint(checkpoint, "fixed")
+
+        # ---------------------------------------------------------------
+        # Phase 4: 交付
+        # ---------------------------------------------------------------
+        logger.info("[Workflow] Phase 4: 生成交付结果")
+        self._mark_delivered(checkpoint)
+
+        yield RunResponse(
+            event=RunEvent.workflow_completed,
+            content=self._build_delivery_json(
+                _run_id, workdir, skill, qa_report, metrics=self._run_metrics_block()
+            ),
+        )
+
+    async def arun(
+        self,
+        skill_id: str,
+        user_input: str = "",
+        run_id: str | None = None,
+        resume: bool = False,
+    ) -> AsyncIterator[RunResponse]:
+        """
+        run() 的异步版本：各阶段通过 Agent.arun() 执行，等待模型响应时不阻塞事件循环。
+
+        流水线、输出事件与检查点行为与 run() 完全一致；任务被取消时 asyncio.CancelledError
+        会原样抛出，由调用方（如 WorkflowScheduler）负责记录取消状态。
+        """
+        run_metrics = RunMetrics()
+        token = bind_run_metrics(run_metrics)
+        status = "error"
+        try:
+            async for response in self._arun(skill_id, user_input, run_id, resume):
+                yield response
+            status = run_metrics.status
+        except (GeneratorExit, asyncio.CancelledError):
+            status = "cancelled"
+            raise
+        finally:
+            unbind_run_metrics(token, status)
+
+    async def _arun(
+        self,
+        skill_id: str,
+        user_input: str,
+        run_id: str | None,
+        resume: bool,
+    ) -> AsyncIterator[RunResponse]:
+        # 文件系统操作（脚手架、快照、预检、检查点落盘）放到线程池执行，不阻塞事件循环
+        _run_id, workdir, skill, checkpoint = await asyncio.to_thread(
+            self._prepare, skill_id, run_id, user_input, resume
         )
 
-        qa_response: RunResponse = self.qa.run(qa_input)
+        # Phase 1: Developer 生成项目
+        if checkpoint.reached("develop"):
+            logger.info(f"[Workflow] Phase 1 跳过: 已从检查点恢复 | run_id={_run_id}")
+        else:
+            logger.info(f"[Workflow] Phase 1: Developer 开始生成项目... | run_id={_run_id}")
+            yield self._progress(WorkflowEvent.phase_started, _run_id, "develop")
+            phase_start = time.perf_counter()
+
+            scaffold_files = await asyncio.to_thread(apply_scaffold, skill, workdir)
+            user_message = build_user_message(skill, user_input, _run_id, workdir, scaffold_files)
+            dev = _AgentOutcome()
+            async for event in self._astream_agent(self.developer, user_message, _run_id, "develop", dev):
+                yield event
+
+            if not dev.response or not dev.response.content:
+                self._release_agents()
+                yield self._developer_failed_response(_run_id)
+                return
+
+            logger.info(f"[Workflow] Phase 1 完成: Developer 已生成项目 | run_id={_run_id}")
+            await asyncio.to_thread(self._record_manifest, "develop", workdir)
+            await asyncio.to_thread(
+                self._save_checkpoint, checkpoint, "develop", dev_content=str(dev.response.content)
+            )
+            yield self._phase_completed(_run_id, "develop", phase_start)
 
-        # 解析 QA 报告
-        qa_report: QAReport | None = None
-        if qa_response and qa_response.content:
-            if isinstance(qa_response.content, QAReport):
-                qa_report = qa_response.content
+        # Phase 1.5 + Phase 2: 静态预检与 QA 审查
+        if checkpoint.reached("qa"):
+            logger.info(f"[Workflow] Phase 2 跳过: 已从检查点恢复 | run_id={_run_id}")
+            qa_report = checkpoint.qa_report
+        else:
+            precheck = None
+            if self.precheck_enabled:
+                yield self._progress(WorkflowEvent.phase_started, _run_id, "precheck")
+                precheck = await asyncio.to_thread(self._run_precheck, workdir, skill)
+                yield self._precheck_completed(_run_id, precheck)
+
+            logger.info(f"[Workflow] Phase 2: QA 开始审查... | run_id={_run_id}")
+            yield self._progress(WorkflowEvent.phase_started, _run_id, "qa")
+            phase_start = time.perf_counter()
+
+            if self._can_skip_qa(precheck):
+                qa_report = build_precheck_report(precheck)
             else:
-                # 尝试从字符串解析
-                try:
-                    qa_report = QAReport.model_validate_json(
-                        qa_response.content
-                        if isinstance(qa_response.content, str)
-                        else json.dumps(qa_response.content)
-                    )
-                except Exception as e:
-                    logger.warning(f"[Workflow] QA 报告解析失败: {e}")
+                qa_input = await asyncio.to_thread(self._build_qa_input, skill, workdir, precheck)
+                if self.qa_mode == "parallel":
+                    reviewers = create_qa_reviewers(workdir, shard_by=self.qa_shard_by)
+                    logger.info(f"[Workflow] Phase 2: 并行审查，Reviewer 数={len(reviewers)} | run_id={_run_id}")
+                    reports: list[QAReport] = []
+                    async for event in self._astream_reviewers(reviewers, qa_input, _run_id, reports):
+                        yield event
+                    qa_report = merge_qa_reports(reports, match_category=self.qa_shard_by != "category")
+                else:
+                    qa = _AgentOutcome()
+                    async for event in self._astream_agent(self.qa, qa_input, _run_id, "qa", qa):
+                        yield event
+                    qa_report = self._parse_qa_report(qa.response)
+                qa_report = await asyncio.to_thread(self._merge_precheck, qa_report, precheck, workdir, skill)
+            # QA 可能直接修复文件，在 Phase 2 边界记录快照，修复轮只比较 Developer 的改动
+            await asyncio.to_thread(self._record_manifest, "qa", workdir)
+            await asyncio.to_thread(self._save_checkpoint, checkpoint, "qa", qa_report=qa_report)
+            yield self._phase_completed(_run_id, "qa", phase_start)
 
         if not qa_report:
             logger.warning("[Workflow] QA Agent 未返回有效报告，跳过审查环节")
+            await asyncio.to_thread(self._mark_delivered, checkpoint)
             yield RunResponse(
                 event=RunEvent.workflow_completed,
                 content=self._build_delivery_json(
-                    _run_id, workdir, skill, qa_report=None
+                    _run_id, workdir, skill, qa_report=None, metrics=self._run_metrics_block()
                 ),
             )
             return
 
-        logger.info(
-            f"[Workflow] Phase 2 完成: QA 评分={qa_report.score}, "
-            f"通过={qa_report.passed}, "
-            f"问题数={len(qa_report.issues)}"
-        )
+        self._log_qa_report(qa_report)
 
-        # ---------------------------------------------------------------
-        # Phase 3: 条件修复（仅当 QA 未通过时）
-        # ---------------------------------------------------------------
-        if not qa_report.passed and qa_report.score < 80:
-            critical_issues = [
-                i for i in qa_report.issues if i.severity == "critical"
-            ]
-
-            if critical_issues:
-                logger.info(
-                    f"[Workflow] Phase 3: 发现 {len(critical_issues)} 个 critical 问题，"
-                    f"发回 Developer 修复..."
-                )
+        # Phase 3: 条件修复（仅当 QA 未通过时，轮间增量复审）
+        fix_round = checkpoint.fix_round
+        while not checkpoint.reached("fixed") and fix_round < self.max_fix_rounds:
+            fix_message = self._build_fix_message(qa_report)
+            if not fix_message:
+                break
+            fix_round += 1
 
-                fix_message = (
-                    "QA 审查发现以下 critical 问题，请逐一修复：\n\n"
-                    + "\n".join(
-                        f"- [{i.category}] {i.file_path}: {i.description}\n"
-                        f"  建议: {i.suggestion}"
-                        for i in critical_issues
-                    )
-                    + "\n\n修复完成后，请重新执行 npm run build 确认构建通过。"
-                )
+            yield self._progress(WorkflowEvent.phase_started, _run_id, "fix")
+            phase_start = time.perf_counter()
+            async for event in self._astream_agent(
+                self.developer, fix_message, _run_id, "fix", _AgentOutcome()
+            ):
+                yield event
+            diff = await asyncio.to_thread(self._record_manifest, f"fix-{fix_round}", workdir)
+            logger.info(
+                f"[Workflow] Phase 3 完成: Developer 已尝试修复 "
+                f"(第 {fix_round} 轮, 改动文件数={len(diff.changed)}) | run_id={_run_id}"
+            )
+            yield self._phase_completed(_run_id, "fix", phase_start)
 
-                self.developer.run(fix_message)
-                logger.info("[Workflow] Phase 3 完成: Developer 已尝试修复")
-            else:
-                logger.info("[Workflow] Phase 3 跳过: 无 critical 问题需要修复")
+            rereview_needed = fix_round < self.max_fix_rounds and bool(diff)
+            if rereview_needed:
+                yield self._progress(WorkflowEvent.phase_started, _run_id, "rereview")
+                phase_start = time.perf_counter()
+                rereview = await asyncio.to_thread(self._prepare_rereview, qa_report, diff, workdir, skill)
+                outcome = _AgentOutcome()
+                if rereview.agent:
+                    async for event in self._astream_agent(
+                        rereview.agent, rereview.qa_input, _run_id, "rereview", outcome
+                    ):
+                        yield event
+                qa_report = self._finish_rereview(rereview, self._parse_qa_report(outcome.response))
+                yield self._phase_completed(_run_id, "rereview", phase_start)
+
+            await asyncio.to_thread(
+                self._save_checkpoint, checkpoint, "fix", fix_round=fix_round, qa_report=qa_report
+            )
+            if not rereview_needed:
+                break
+        await asyncio.to_thread(self._save_checkpoint, checkpoint, "fixed")
 
-        # ---------------------------------------------------------------
         # Phase 4: 交付
-        # ---------------------------------------------------------------
-        logger.info("[Workflow] Phase 4: 生成交付结果")
+        logger.info(f"[Workflow] Phase 4: 生成交付结果 | run_id={_run_id}")
+        await asyncio.to_thread(self._mark_delivered, checkpoint)
 
         yield RunResponse(
             event=RunEvent.workflow_completed,
             content=self._build_delivery_json(
-                _run_id, workdir, skill, qa_report
+                _run_id, workdir, skill, qa_report, metrics=self._run_metrics_block()
             ),
         )
 
+    # -------------------------------------------------------------------
+    # Agent 流式执行与事件转换
+    # -------------------------------------------------------------------
+
+    def _stream_agent(
+        self,
+        agent: Agent,
+        message: str,
+        run_id: str,
+        phase: str,
+        outcome: "_AgentOutcome",
+    ) -> Iterator[RunResponse]:
+        """以流式方式运行 Agent，转发进度事件，并把最终响应写入 outcome"""
+        for chunk in agent.run(
+            message,
+            stream=True,
+            stream_intermediate_steps=True,
+            yield_run_response=True,
+        ):
+            yield from self._handle_agent_chunk(chunk, agent, run_id, phase, outcome)
+        outcome.finalize()
+
+    async def _astream_agent(
+        self,
+        agent: Agent,
+        message: str,
+        run_id: str,
+        phase: str,
+        outcome: "_AgentOutcome",
+    ) -> AsyncIterator[RunResponse]:
+        """_stream_agent 的异步版本"""
+        stream = agent.arun(
+            message,
+            stream=True,
+            stream_intermediate_steps=True,
+            yield_run_response=True,
+        )
+        # 部分 agno 版本的 arun 是协程，需要先 await 才能拿到异步迭代器
+        if inspect.isawaitable(stream):
+            stream = await stream
+        async for chunk in stream:
+            for event in self._handle_agent_chunk(chunk, agent, run_id, phase, outcome):
+                yield event
+        outcome.finalize()
+
+    def _stream_reviewers(
+        self,
+        reviewers: list[Agent],
+        qa_input: str,
+        run_id: str,
+        reports: list[QAReport],
+    ) -> Iterator[RunResponse]:
+        """并行审查：转发各 Reviewer 的进度事件（category 标记其审查范围），结束后把解析出的报告写入 reports"""
+        outcomes = {id(agent): _AgentOutcome() for agent in reviewers}
+        for agent, chunk in stream_parallel_qa(reviewers, qa_input):
+            yield from self._handle_reviewer_chunk(chunk, agent, run_id, outcomes)
+        reports.extend(self._reviewer_reports(reviewers, outcomes))
+
+    async def _astream_reviewers(
+        self,
+        reviewers: list[Agent],
+        qa_input: str,
+        run_id: str,
+        reports: list[QAReport],
+    ) -> AsyncIterator[RunResponse]:
+        """_stream_reviewers 的异步版本"""
+        outcomes = {id(agent): _AgentOutcome() for agent in reviewers}
+        async for agent, chunk in astream_parallel_qa(reviewers, qa_input):
+            for event in self._handle_reviewer_chunk(chunk, agent, run_id, outcomes):
+                yield event
+        reports.extend(self._reviewer_reports(reviewers, outcomes))
+
+    def _handle_reviewer_chunk(
+        self,
+        chunk,
+        agent: Agent,
+        run_id: str,
+        outcomes: dict[int, "_AgentOutcome"],
+    ) -> Iterator[RunResponse]:
+        if isinstance(chunk, Exception):
+            # 失败的 Reviewer 不参与合并，已累积的增量文本不能当作报告
+            logger.warning(f"[QA] {agent.name} 审查失败: {chunk}")
+            outcomes.pop(id(agent), None)
+            return
+        outcome = outcomes.get(id(agent))
+        if outcome is not None:
+            yield from self._handle_agent_chunk(
+                chunk, agent, run_id, "qa", outcome, category=reviewer_scope(agent),
+            )
+
+    def _reviewer_reports(self, reviewers: list[Agent], outcomes: dict[int, "_AgentOutcome"]) -> list[QAReport]:
+        reports = []
+        for agent in reviewers:
+            outcome = outcomes.get(id(agent))
+            if outcome is None:
+                continue
+            outcome.finalize()
+            report = self._parse_qa_report(outcome.response)
+            if report:
+                reports.append(report)
+        return reports
+
+    def _handle_agent_chunk(
+        self,
+        chunk,
+        agent: Agent,
+        run_id: str,
+        phase: str,
+        outcome: "_AgentOutcome",
+        category: str | None = None,
+    ) -> Iterator[RunResponse]:
+        """把 Agent 的单个流式事件转换为 Workflow 进度事件（category 为并行审查中 Reviewer 的审查范围）"""
+        # 最终的完整响应（yield_run_response=True 时在流末尾给出）
+        if isinstance(chunk, RunResponse):
+            outcome.response = chunk
+            return
+
+        event = getattr(chunk, "event", None)
+        agent_name = agent.name
+
+        if event in _CONTENT_EVENTS:
+            if isinstance(chunk.content, str) and chunk.content:
+                outcome.deltas.append(chunk.content)
+                yield self._progress(
+                    WorkflowEvent.agent_delta, run_id, phase,
+                    agent=agent_name, category=category, content=chunk.content,
+                )
+            return
+
+        tool = getattr(chunk, "tool", None)
+        if tool is None:
+            return
+
+        if event == RunEvent.tool_call_started.value:
+            yield self._progress(
+                WorkflowEvent.tool_call_started, run_id, phase,
+                agent=agent_name, category=category, tool_name=tool.tool_name, tool_args=tool.tool_args,
+            )
+        elif event == RunEvent.tool_call_completed.value:
+            result = str(tool.result or "")
+            duration = getattr(tool.metrics, "duration", None) if tool.metrics else None
+            yield self._progress(
+                WorkflowEvent.tool_call_completed, run_id, phase,
+                agent=agent_name, category=category, tool_name=tool.tool_name, tool_args=tool.tool_args,
+                content=result[:_TOOL_RESULT_PREVIEW_CHARS], duration=duration,
+            )
+            # npm install / npm run build 的输出逐行转发，便于前端实时展示构建日志
+            if self._is_build_command(tool.tool_name, tool.tool_args):
+                for line in result.splitlines()[-_BUILD_OUTPUT_TAIL_LINES:]:
+                    if line.strip():
+                        yield self._progress(
+                            WorkflowEvent.build_output, run_id, phase,
+                            agent=agent_name, category=category, tool_name=tool.tool_name, content=line,
+                        )
+
+    @staticmethod
+    def _is_build_command(tool_name: str | None, tool_args: dict | None) -> bool:
+        if tool_name in ("npm_install", "npm_build"):
+            return True
+        args = (tool_args or {}).get("args")
+        if not isinstance(args, list):
+            return False
+        return bool(args) and args[0] == "npm" and any(a in ("install", "build", "ci") for a in args)
+
+    @staticmethod
+    def _progress(event: WorkflowEvent, run_id: str, phase: str, **fields) -> RunResponse:
+        """构建一个进度事件"""
+        return RunResponse(
+            event=event.value,
+            content=ProgressEvent(event=event, run_id=run_id, phase=phase, **fields),
+        )
+
+    def _phase_completed(self, run_id: str, phase: str, started_at: float) -> RunResponse:
+        duration = time.perf_counter() - started_at
+        observe_phase(phase, duration)
+        return self._progress(
+            WorkflowEvent.phase_completed, run_id, phase,
+            duration=round(duration, 3),
+        )
+
+    @staticmethod
+    def _run_metrics_block() -> dict | None:
+        """当前运行的指标汇总（交付 JSON 的 metrics 区块），并记录本次运行的提示词缓存命中率"""
+        run_metrics = current_run_metrics()
+        if not run_metrics:
+            return None
+        block = run_metrics.to_dict()
+        model = block["model"]
+        if model["prompt_tokens"]:
+            logger.info(
+                f"[Workflow] 提示词缓存 | prompt={model['prompt_tokens']} | cached={model['cached_tokens']} | "
+                f"命中率={model['cached_tokens'] / model['prompt_tokens']:.0%}"
+            )
+        return block
+
+    # -------------------------------------------------------------------
+    # 阶段辅助方法（run / arun 共用）
+    # -------------------------------------------------------------------
+
+    def _prepare(
+        self,
+        skill_id: str,
+        run_id: str | None,
+        user_input: str,
+        resume: bool,
+    ) -> tuple[str, str, dict, WorkflowCheckpoint]:
+        """
+        准备运行：分配 run_id、创建工作目录、加载 Skill 并创建绑定该目录的 Agent；
+        resume=True 时加载已有检查点，否则创建新的检查点。
+        """
+        if resume:
+            if not run_id:
+                raise ValueError("恢复运行必须指定 run_id")
+            checkpoint = load_checkpoint(run_id)
+            if checkpoint is None:
+                raise FileNotFoundError(f"检查点不存在: {checkpoint_path(run_id)}")
+            logger.info(f"[Workflow] 从检查点恢复 | run_id={run_id} | 已完成阶段={checkpoint.phase}")
+        else:
+            checkpoint = WorkflowCheckpoint(
+                run_id=run_id or uuid.uuid4().hex[:8],
+                skill_id=skill_id,
+                user_input=user_input,
+            )
+
+        _run_id = checkpoint.run_id
+        workdir = str(WORKSPACE_DIR / _run_id)
+        if resume and not os.path.isdir(workdir):
+            # 工作目录可能已被配额回收归档，先恢复再续跑，不能在空目录上从检查点阶段继续
+            manager = WorkspaceManager(workspace_dir=WORKSPACE_DIR)
+            if manager.archive_path(_run_id).exists():
+                manager.restore(_run_id)
+            elif checkpoint.reached("develop"):
+                raise FileNotFoundError(f"工作目录与归档均不存在，无法恢复运行: {workdir}")
+        os.makedirs(workdir, exist_ok=True)
+
+        skill = load_skill(checkpoint.skill_id)
+
+        logger.info(f"[Workflow] 开始生成 | skill={checkpoint.skill_id} | run_id={_run_id}")
+        logger.info(f"[Workflow] 工作目录: {workdir}")
+
+        # 从实例池取出 Agent 并绑定到当前 run 的工作目录（池空时新建）
+        self.developer = agent_pool.acquire("developer", workdir, create_developer_agent)
+        self.qa = agent_pool.acquire("qa", workdir, create_qa_agent)
+        self.manifests = dict(checkpoint.manifests)
+
+        self._save_checkpoint(checkpoint, "started")
+        return _run_id, workdir, skill, checkpoint
+
+    def _mark_delivered(self, checkpoint: WorkflowCheckpoint) -> None:
+        """记录交付完成，归还 Agent，并在后台回收其他已完成运行的工作目录"""
+        self._save_checkpoint(checkpoint, "delivered")
+        self._release_agents()
+        if WORKSPACE_GC_ON_DELIVERY:
+            WorkspaceManager().start_background_gc(protect={checkpoint.run_id})
+
+    def _release_agents(self) -> None:
+        """把本次运行的 Developer / QA 归还实例池（运行异常中断时不归还，直接丢弃）"""
+        agent_pool.release("developer", self.developer)
+        agent_pool.release("qa", self.qa)
+        self.developer = None
+        self.qa = None
+
+    def _save_checkpoint(self, checkpoint: WorkflowCheckpoint, phase: str, **updates) -> None:
+        """更新并落盘检查点；阶段只前进不后退"""
+        for key, value in updates.items():
+            setattr(checkpoint, key, value)
+        if not checkpoint.reached(phase):
+            checkpoint.phase = phase
+        checkpoint.manifests = self.manifests
+        save_checkpoint(checkpoint)
+
+    def _record_manifest(self, phase: str, workdir: str) -> ManifestDiff:
+        """在阶段边界记录 workdir 快照，返回相对上一个快照的差异"""
+        previous = list(self.manifests.values())[-1] if self.manifests else {}
+        self.manifests[phase] = build_manifest(workdir)
+        return diff_manifests(previous, self.manifests[phase])
+
+    def _prepare_rereview(
+        self,
+        qa_report: QAReport,
+        diff: ManifestDiff,
+        workdir: str,
+        skill: dict,
+    ) -> "_Rereview":
+        """
+        增量复审准备：未改动文件上的问题原样保留，只让 Reviewer 审查改动过的文件，
+        并把这些文件上的旧问题交给它确认是否已修复。
+        """
+        changed = {normalize_path(f, workdir) for f in diff.changed}
+        removed = {normalize_path(f, workdir) for f in diff.removed}
+        rereview = _Rereview(changed=sorted(changed), carried=[])
+        for issue in qa_report.issues:
+            path = normalize_path(issue.file_path, workdir)
+            if path in changed:
+                rereview.previous.append(issue)
+            elif path not in removed:
+                rereview.carried.append(issue)
+        reviewable = [f for f in rereview.changed if Path(f).suffix in REVIEWABLE_SUFFIXES]
+        if not reviewable:
+            # 改动的文件都不在审查范围内，无法确认旧问题是否已修复，原样沿用
+            rereview.carried += rereview.previous
+            rereview.previous = []
+            return rereview
+
+        previous = rereview.previous
+        rereview.agent = create_qa_agent(workdir=workdir, files=reviewable)
+        rereview.qa_input = (
+            "Developer 刚修复了项目中的部分文件，请只复审以下改动过的文件：\n"
+            + "\n".join(f"- {f}" for f in reviewable)
+            + f"\n\n技术栈: {skill.get('stack', 'Vite + React + Tailwind CSS')}\n"
+            + "\n上一轮在这些文件上报告的问题如下，请逐一确认是否已修复，"
+            "仍存在的问题原样保留，并检查修复是否引入了新问题：\n"
+            + ("\n".join(
+                f"- [{i.severity}/{i.category}] {i.file_path}: {i.description}"
+                for i in previous
+            ) or "（无）")
+        )
+        logger.info(
+            f"[Workflow] 增量复审: 改动文件数={len(reviewable)}, "
+            f"沿用问题数={len(rereview.carried)}"
+        )
+        rereview.precheck = run_precheck(workdir, skill) if self.precheck_enabled else None
+        return rereview
+
+    @staticmethod
+    def _finish_rereview(rereview: "_Rereview", review: QAReport | None) -> QAReport:
+        """合并沿用问题、复审报告与改动文件上的预检问题，得到新的 QAReport"""
+        reports = [QAReport(
+            passed=not any(i.severity == "critical" for i in rereview.carried),
+            score=100, summary="", issues=rereview.carried,
+        )]
+        if review:
+            reports.append(review)
+        elif rereview.previous:
+            # 复审未返回有效报告：改动文件上的旧问题无法确认已修复，按未修复沿用
+            logger.warning("[Workflow] 增量复审未返回有效报告，沿用改动文件上的旧问题")
+            reports.append(QAReport(
+                passed=not any(i.severity == "critical" for i in rereview.previous),
+                score=100, summary="", issues=rereview.previous,
+            ))
+        if rereview.precheck:
+            changed = set(rereview.changed)
+            issues = [i for i in rereview.precheck.issues if i.file_path in changed]
+            reports.append(QAReport(
+                passed=not any(i.severity == "critical" for i in issues),
+                score=100, summary="", issues=issues,
+            ))
+        merged = merge_qa_reports(reports)
+        logger.info(
+            f"[Workflow] 增量复审完成: QA 评分={merged.score}, "
+            f"通过={merged.passed}, 问题数={len(merged.issues)}"
+        )
+        return merged
+
+    @staticmethod
+    def _developer_failed_response(run_id: str) -> RunResponse:
+        """Developer 未返回有效内容时的失败交付"""
+        logger.error("[Workflow] Developer Agent 未返回有效内容")
+        run_metrics = current_run_metrics()
+        if run_metrics:
+            run_metrics.status = "fail"
+        return RunResponse(
+            event=RunEvent.workflow_completed,
+            content=json.dumps({
+                "run_id": run_id,
+                "status": "fail",
+                "error": "Developer Agent 未返回有效内容",
+                "metrics": run_metrics.to_dict() if run_metrics else None,
+            }, ensure_ascii=False),
+        )
+
+    def _build_qa_input(
+        self,
+        skill: dict,
+        workdir: str,
+        precheck: PrecheckResult | None = None,
+    ) -> str:
+        """构建发给 QA Agent 的审查任务（项目目录等每次运行不同的内容放在最后，利于前缀缓存）"""
+        stack = skill.get('stack', 'Vite + React + Tailwind CSS')
+        qa_input = (
+            f"请审查项目目录中的所有代码文件:\n"
+            f"技术栈: {stack}\n"
+            f"项目类型: {skill.get('name', '未知')}\n\n"
+            f"请按照你的审查流程，逐维度检查并输出 QAReport。"
+        )
+        # 并行模式下各 Reviewer 已在 system_message 中注入了本维度的相关知识
+        if QA_KNOWLEDGE_MODE == "retrieval" and self.qa_mode != "parallel":
+            knowledge = select_qa_knowledge(workdir, stack)
+            if knowledge:
+                qa_input += "\n\n" + knowledge
+        if precheck:
+            qa_input += "\n\n" + format_precheck_for_qa(precheck)
+        qa_input += f"\n\n项目目录: {workdir}"
+        return qa_input
+
+    @staticmethod
+    def _run_precheck(workdir: str, skill: dict) -> PrecheckResult:
+        precheck = run_precheck(workdir, skill)
+        logger.info(
+            f"[Workflow] 静态预检完成: 文件数={precheck.files_scanned}, "
+            f"问题数={len(precheck.issues)}, 耗时={precheck.duration * 1000:.0f}ms"
+        )
+        return precheck
+
+    def _precheck_completed(self, run_id: str, precheck: PrecheckResult) -> RunResponse:
+        observe_phase("precheck", precheck.duration)
+        return self._progress(
+            WorkflowEvent.phase_completed, run_id, "precheck",
+            content=build_precheck_report(precheck).summary,
+            duration=round(precheck.duration, 3),
+        )
+
+    def _can_skip_qa(self, precheck: PrecheckResult | None) -> bool:
+        """预检干净且开启 skip_qa_when_clean 时，省掉整轮 LLM QA"""
+        if precheck is None or not precheck.clean or not self.skip_qa_when_clean:
+            return False
+        logger.info("[Workflow] Phase 2: 静态预检未发现问题，跳过 LLM QA")
+        return True
+
+    def _merge_precheck(
+        self,
+        qa_report: QAReport | None,
+        precheck: PrecheckResult | None,
+        workdir: str,
+        skill: dict,
+    ) -> QAReport | None:
+        """
+        把预检问题并入 LLM 报告；LLM 未返回有效报告时以预检报告兜底。
+        QA 审查时可能已直接修复文件，此时重新预检，避免并入已修复的旧问题。
+        """
+        if precheck is None:
+            return qa_report
+        if qa_report is not None and qa_report.fixed_files:
+            precheck = self._run_precheck(workdir, skill)
+        if qa_report is None:
+            return None if precheck.clean else build_precheck_report(precheck)
+        return merge_precheck_report(qa_report, precheck)
+
+    @staticmethod
+    def _parse_qa_report(qa_response: RunResponse | None) -> QAReport | None:
+        """解析 QA 报告"""
+        return parse_qa_report(qa_response.content if qa_response else None)
+
+    @staticmethod
+    def _log_qa_report(qa_report: QAReport) -> None:
+        logger.info(
+            f"[Workflow] Phase 2 完成: QA 评分={qa_report.score}, "
+            f"通过={qa_report.passed}, "
+            f"问题数={len(qa_report.issues)}"
+        )
+
+    @staticmethod
+    def _build_fix_message(qa_report: QAReport) -> str | None:
+        """
+        Phase 3 判定：QA 未通过且存在 critical 问题时，构建发回 Developer 的修复消息。
+        无需修复时返回 None。
+        """
+        if qa_report.passed or qa_report.score >= 80:
+            return None
+
+        critical_issues = [
+            i for i in qa_report.issues if i.severity == "critical"
+        ]
+        if not critical_issues:
+            logger.info("[Workflow] Phase 3 跳过: 无 critical 问题需要修复")
+            return None
+
+        logger.info(
+            f"[Workflow] Phase 3: 发现 {len(critical_issues)} 个 critical 问题，"
+            f"发回 Developer 修复..."
+        )
+
+        return (
+            "QA 审查发现以下 critical 问题，请逐一修复：\n\n"
+            + "\n".join(
+                f"- [{i.category}] {i.file_path}: {i.description}\n"
+                f"  建议: {i.suggestion}"
+                for i in critical_issues
+            )
+            + "\n\n请用 apply_patch 一次提交涉及的全部文件改动，"
+            "修复完成后，请重新执行 npm run build 确认构建通过。"
+        )
+
     @staticmethod
     def _build_delivery_json(
         run_id: str,
         workdir: str,
         skill: dict,
         qa_report: QAReport | None,
+        metrics: dict | None = None,
     ) -> str:
-        """构建最终交付 JSON"""
+        """构建最终交付 JSON（metrics 为本次运行的指标汇总，见 RunMetrics.to_dict）"""
         delivery = {
             "run_id": run_id,
             "status": "success",
@@ -194,6 +983,7 @@ class WebBuilderWorkflow(Workflow):
             "skill": skill.get("name", ""),
             "stack": skill.get("stack", ""),
             "qa": None,
+            "metrics": metrics,
         }
 
         if qa_report:
@@ -0,0 +1,308 @@
+"""
+Web Builder Agent - 工作目录生命周期管理
+每个运行都会在 WORKSPACE_DIR/<run_id> 留下完整项目（含数百 MB 的 node_modules），
+目录只增不减。WorkspaceManager 负责：
+1. 剥离已完成运行的 node_modules（需要时可从依赖缓存重新物化）
+2. 把超出年龄 / 容量配额的运行按 LRU 顺序归档为 tar.gz（源码 + dist/），并删除工作目录
+3. 按 run_id 列出、恢复运行
+
+已交付（检查点 phase=delivered）的运行才会被剥离或归档；未交付的运行仅在超过年龄配额后归档。
+交付时的回收在后台线程执行（start_background_gc），不阻塞工作流与事件循环。
+"""
+import os
+import shutil
+import tarfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from agno.utils.log import logger
+
+from agents.checkpoint import load_checkpoint
+from agents.deps_cache import materialize_node_modules
+from agents.developer import BASE_DIR, WORKSPACE_DIR
+from agents.manifest import SKIPPED_DIRS
+
+
+ARCHIVE_DIR = BASE_DIR / "artifacts" / "archive"
+WORKSPACE_MAX_BYTES = int(float(os.getenv("WORKSPACE_MAX_GB", "5")) * 1024 ** 3)
+WORKSPACE_MAX_AGE = float(os.getenv("WORKSPACE_MAX_AGE_DAYS", "7")) * 86400
+WORKSPACE_GC_ON_DELIVERY = os.getenv("WORKSPACE_GC_ON_DELIVERY", "true").lower() == "true"
+
+# 归档时保留 dist/，其余依赖目录与缓存目录跳过
+ARCHIVE_SKIPPED_DIRS = SKIPPED_DIRS - {"dist"}
+# node_modules 由依赖缓存硬链接物化，不额外占用磁盘，容量统计时不遍历
+QUOTA_SKIPPED_DIRS = {"node_modules"}
+# 删除目录前先改名为 .<name>.deleting-xxxx，回收时清理中断残留
+_TRASH_SUFFIX = ".deleting-"
+
+_gc_lock = threading.Lock()
+_gc_thread: threading.Thread | None = None
+_gc_thread_lock = threading.Lock()
+
+
+@dataclass
+class RunInfo:
+    """一个运行的工作目录 / 归档状态"""
+    run_id: str
+    active: bool  # 工作目录是否存在
+    archived: bool  # 是否存在归档
+    size: int  # 工作目录字节数（未激活时为归档大小）
+    last_used: float  # 最近访问时间（目录内最新 mtime 或归档时间）
+    delivered: bool
+
+
+def _dir_stats(path: Path, skip: set[str] = QUOTA_SKIPPED_DIRS) -> tuple[int, float]:
+    """目录总字节数与最新 mtime（不跟随符号链接，跳过 skip 中的目录）"""
+    size, latest = 0, path.stat().st_mtime
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if d not in skip]
+        for name in files:
+            try:
+                st = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            size += st.st_size
+            latest = max(latest, st.st_mtime)
+    return size, latest
+
+
+class WorkspaceManager:
+    """
+    工作目录配额与归档管理。
+
+    用法：
+        manager = WorkspaceManager()
+        manager.enforce_quota(protect={"current-run-id"})
+        manager.list_runs()
+        manager.restore("a1b2c3d4")
+    """
+
+    def __init__(
+        self,
+        workspace_dir: str | Path | None = None,
+        archive_dir: str | Path | None = None,
+        max_bytes: int | None = None,
+        max_age: float | None = None,
+    ):
+        """
+        Args:
+            workspace_dir: 工作目录根（默认 WORKSPACE_DIR）
+            archive_dir: 归档目录（默认 artifacts/archive）
+            max_bytes: 工作目录总容量配额（默认读取 WORKSPACE_MAX_GB，缺省 5GB）
+            max_age: 未访问多少秒后归档（默认读取 WORKSPACE_MAX_AGE_DAYS，缺省 7 天）
+        """
+        self.workspace_dir = Path(workspace_dir or WORKSPACE_DIR)
+        self.archive_dir = Path(archive_dir or ARCHIVE_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else WORKSPACE_MAX_BYTES
+        self.max_age = max_age if max_age is not None else WORKSPACE_MAX_AGE
+
+    def archive_path(self, run_id: str) -> Path:
+        return self.archive_dir / f"{run_id}.tar.gz"
+
+    # -------------------------------------------------------------------
+    # 查询
+    # -------------------------------------------------------------------
+
+    def list_runs(self) -> list[RunInfo]:
+        """列出所有运行（工作目录与归档合并），最近使用的在前"""
+        runs: dict[str, RunInfo] = {}
+        if self.workspace_dir.exists():
+            for path in self.workspace_dir.iterdir():
+                if not path.is_dir() or path.name.startswith("."):
+                    continue
+                size, last_used = _dir_stats(path)
+                runs[path.name] = RunInfo(
+                    run_id=path.name,
+                    active=True,
+                    archived=self.archive_path(path.name).exists(),
+                    size=size,
+                    last_used=last_used,
+                    delivered=self._delivered(path.name),
+                )
+        if self.archive_dir.exists():
+            for path in self.archive_dir.glob("*.tar.gz"):
+                run_id = path.name[: -len(".tar.gz")]
+                if run_id in runs:
+                    continue
+                st = path.stat()
+                runs[run_id] = RunInfo(
+                    run_id=run_id,
+                    active=False,
+                    archived=True,
+                    size=st.st_size,
+                    last_used=st.st_mtime,
+                    delivered=self._delivered(run_id),
+                )
+        return sorted(runs.values(), key=lambda r: r.last_used, reverse=True)
+
+    @staticmethod
+    def _delivered(run_id: str) -> bool:
+        checkpoint = load_checkpoint(run_id)
+        return checkpoint is not None and checkpoint.reached("delivered")
+
+    # -------------------------------------------------------------------
+    # 剥离 / 归档 / 恢复
+    # -------------------------------------------------------------------
+
+    def strip(self, run_id: str) -> bool:
+        """删除运行的 node_modules，返回是否有可剥离的目录"""
+        target = self.workspace_dir / run_id / "node_modules"
+        if not target.is_dir():
+            return False
+        _remove_tree(target)
+        logger.info(f"[Workspace] 剥离 node_modules | run_id={run_id}")
+        return True
+
+    def archive(self, run_id: str, remove: bool = True) -> Path:
+        """
+        把运行的源码与 dist/ 压缩归档（跳过 node_modules 等依赖目录）。
+
+        Args:
+            run_id: 运行 ID
+            remove: 归档成功后是否删除工作目录
+        """
+        workdir = self.workspace_dir / run_id
+        if not workdir.is_dir():
+            raise FileNotFoundError(f"工作目录不存在: {workdir}")
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        path = self.archive_path(run_id)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}")
+
+        def _filter(info: tarfile.TarInfo) -> tarfile.TarInfo | None:
+            parts = Path(info.name).parts[1:]
+            return None if any(p in ARCHIVE_SKIPPED_DIRS for p in parts) else info
+
+        with tarfile.open(tmp, "w:gz") as tar:
+            tar.add(workdir, arcname=run_id, filter=_filter)
+        os.replace(tmp, path)
+
+        if remove:
+            _remove_tree(workdir)
+        logger.info(f"[Workspace] 已归档 | run_id={run_id} | {path}")
+        return path
+
+    def restore(self, run_id: str, install_deps: bool = True) -> Path:
+        """
+        从归档恢复运行的工作目录。
+
+        Args:
+            run_id: 运行 ID
+            install_deps: 是否尝试从依赖缓存重新物化 node_modules
+        """
+        workdir = self.workspace_dir / run_id
+        if workdir.is_dir():
+            return workdir
+        path = self.archive_path(run_id)
+        if not path.exists():
+            raise FileNotFoundError(f"归档不存在: {path}")
+
+        with tarfile.open(path, "r:gz") as tar:
+            tar.extractall(self.workspace_dir, filter="data")
+        os.utime(workdir)
+        if install_deps:
+            materialize_node_modules(workdir)
+        logger.info(f"[Workspace] 已恢复 | run_id={run_id} | {workdir}")
+        return workdir
+
+    # -------------------------------------------------------------------
+    # 配额
+    # -------------------------------------------------------------------
+
+    def enforce_quota(self, protect: set[str] | None = None) -> dict:
+        """
+        执行一次回收：
+        1. 剥离已交付运行的 node_modules
+        2. 归档超过年龄配额的运行
+        3. 总容量仍超出配额时，按最近使用时间从旧到新归档已交付的运行
+
+        Args:
+            protect: 不参与回收的 run_id（如正在执行的运行）
+
+        Returns:
+            回收统计 {"stripped": [...], "archived": [...], "total_bytes": int}
+        """
+        protect = protect or set()
+        stats = {"stripped": [], "archived": [], "total_bytes": 0}
+        with _gc_lock:
+            now = time.time()
+            runs = [r for r in self.list_runs() if r.active and r.run_id not in protect]
+
+            for run in runs:
+                if run.delivered and self.strip(run.run_id):
+                    stats["stripped"].append(run.run_id)
+
+            remaining = []
+            for run in runs:
+                if now - run.last_used > self.max_age:
+                    self._archive_quietly(run.run_id, stats)
+                else:
+                    remaining.append(run)
+
+            # 容量统计不含 node_modules，剥离前后不变，直接沿用 list_runs 的结果
+            total = sum(r.size for r in remaining)
+            for run in sorted(remaining, key=lambda r: r.last_used):
+                if total <= self.max_bytes:
+                    break
+                if not run.delivered:
+                    continue
+                if self._archive_quietly(run.run_id, stats):
+                    total -= run.size
+            stats["total_bytes"] = total
+
+            # 清理上次回收中断时残留的待删除目录
+            for path in self.workspace_dir.glob(f".*{_TRASH_SUFFIX}*"):
+                shutil.rmtree(path, ignore_errors=True)
+        return stats
+
+    def start_background_gc(self, protect: set[str] | None = None) -> bool:
+        """
+        在后台线程执行一次 enforce_quota，立即返回；已有回收在进行时跳过本次。
+
+        Returns:
+            是否启动了新的回收
+        """
+        global _gc_thread
+        with _gc_thread_lock:
+            if _gc_thread is not None and _gc_thread.is_alive():
+                return False
+            _gc_thread = threading.Thread(
+                target=self._gc_quietly, args=(protect,), name="workspace-gc", daemon=True
+            )
+            _gc_thread.start()
+        return True
+
+    def _gc_quietly(self, protect: set[str] | None) -> None:
+        try:
+            stats = self.enforce_quota(protect=protect)
+        except OSError as e:
+            logger.warning(f"[Workspace] 工作目录回收失败: {e}")
+            return
+        if stats["stripped"] or stats["archived"]:
+            logger.info(
+                f"[Workspace] 工作目录回收 | 剥离={len(stats['stripped'])} | "
+                f"归档={len(stats['archived'])}"
+            )
+
+    def _archive_quietly(self, run_id: str, stats: dict) -> bool:
+        # 并发回收时目录可能已被其他进程归档，忽略即可
+        try:
+            self.archive(run_id)
+        except (FileNotFoundError, OSError) as e:
+            logger.warning(f"[Workspace] 归档失败 | run_id={run_id} | {e}")
+            return False
+        stats["archived"].append(run_id)
+        return True
+
+
+def _remove_tree(path: Path) -> None:
+    """先原子改名再删除，删除中途退出时不会留下看似完整的目录"""
+    trash = path.with_name(f".{path.name}{_TRASH_SUFFIX}{uuid.uuid4().hex[:8]}")
+    try:
+        os.rename(path, trash)
+    except OSError:
+        trash = path
+    shutil.rmtree(trash, ignore_errors=True)
@@ -0,0 +1,12 @@
+"""
+Web Builder Agent - 离线基准测试
+不依赖网络与真实模型，度量工作流自身的开销：
+- mock_server: 本地 OpenAI 兼容桩服务，按脚本回放 Developer / QA / AgentOS 的工具调用轨迹
+- trajectories: 脚本化轨迹（写文件、执行构建、输出 QAReport），可配置延迟与输出速度
+- runner: 以不同并发驱动 WebBuilderWorkflow 与 AgentOS 应用，报告吞吐量、分阶段延迟、内存与 CPU，
+  并可与基线结果比较作为回归门禁
+
+用法（在 backend/ 下）：
+  python -m bench --concurrency 1,4,16 --runs 16 --output bench.json
+  python -m bench --baseline bench.json --max-regression 0.15
+"""
@@ -0,0 +1,6 @@
+import sys
+
+from bench.runner import main
+
+
+sys.exit(main())
@@ -0,0 +1,42 @@
+"""
+Web Builder Agent - 基准测试用的模拟构建
+代替 npm run build（离线环境没有 node_modules）：读取 src/ 下的源码，
+拼接写入 dist/，并补足到指定耗时，输出与 vite 相似的构建日志。
+
+用法: python fake_build.py <秒数>
+"""
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+
+def main() -> int:
+    started = time.perf_counter()
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    root = Path.cwd()
+    sources = sorted(p for p in (root / "src").rglob("*") if p.is_file()) if (root / "src").is_dir() else []
+
+    print("vite v5.4.0 building for production...")
+    bundle = "\n".join(p.read_text(encoding="utf-8", errors="replace") for p in sources)
+    digest = hashlib.sha256(bundle.encode("utf-8")).hexdigest()[:8]
+    assets = root / "dist" / "assets"
+    assets.mkdir(parents=True, exist_ok=True)
+    (assets / f"index-{digest}.js").write_text(bundle, encoding="utf-8")
+    (root / "dist" / "index.html").write_text(
+        f'<!doctype html><html><body><div id="root"></div>'
+        f'<script type="module" src="/assets/index-{digest}.js"></script></body></html>\n',
+        encoding="utf-8",
+    )
+    print(f"✓ {len(sources)} modules transformed.")
+    print(f"dist/assets/index-{digest}.js  {len(bundle) / 1024:.2f} kB")
+
+    remaining = seconds - (time.perf_counter() - started)
+    if remaining > 0:
+        time.sleep(remaining)
+    print(f"✓ built in {int((time.perf_counter() - started) * 1000)}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
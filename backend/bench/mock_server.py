@@ -0,0 +1,314 @@
+"""
+Web Builder Agent - 本地 OpenAI 兼容桩服务
+实现基准测试需要的最小接口：
+  POST /v1/chat/completions   流式（SSE，可带 usage）与非流式
+  GET  /v1/models
+  GET  /stats                 累计请求数、各发起方请求数、token 数
+  POST /reset                 清零统计
+
+响应内容由 bench.trajectories.next_step 决定；延迟按 MockProfile 模拟：
+先等待首 token 延迟，再按输出速度逐块发送内容与工具调用参数。
+
+可以在当前进程的后台线程中运行（MockOpenAIServer），也可以作为独立进程运行，
+避免桩服务自身的 CPU 计入被测进程：
+  python -m bench.mock_server --port 0 --profile '{"latency": 0.2}'
+"""
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from bench.trajectories import MockProfile, Step, next_step
+
+
+# 流式输出时每块的字符数
+CHUNK_CHARS = 64
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format, *args):  # noqa: A002 - 覆盖基类签名
+        pass
+
+    # -------------------------------------------------------------------
+    # 路由
+    # -------------------------------------------------------------------
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._json(200, {"object": "list", "data": [{"id": "bench-model", "object": "model"}]})
+        elif self.path == "/stats":
+            self._json(200, self.server.stats_snapshot())
+        else:
+            self._json(404, {"error": {"message": f"not found: {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if self.path == "/reset":
+            self.server.reset_stats()
+            self._json(200, {"ok": True})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._json(404, {"error": {"message": f"not found: {self.path}"}})
+            return
+        try:
+            body = json.loads(raw or b"{}")
+        except json.JSONDecodeError as e:
+            self._json(400, {"error": {"message": f"invalid json: {e}"}})
+            return
+
+        profile = self.server.profile
+        role, step = next_step(body, profile)
+        prompt_tokens = _estimate_tokens(json.dumps(body.get("messages") or [], ensure_ascii=False))
+        completion_tokens = _estimate_tokens(
+            step.content + "".join(json.dumps(args, ensure_ascii=False) for _, args in step.tool_calls)
+        )
+        self.server.record(role, prompt_tokens, completion_tokens)
+
+        time.sleep(profile.latency)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        model = body.get("model", "bench-model")
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            self._stream(model, step, usage if include_usage else None)
+        else:
+            self._pace(completion_tokens)
+            self._json(200, self._completion(model, step, usage))
+
+    # -------------------------------------------------------------------
+    # 响应
+    # -------------------------------------------------------------------
+
+    def _pace(self, tokens: int) -> None:
+        tps = self.server.profile.tokens_per_second
+        if tps > 0:
+            time.sleep(tokens / tps)
+
+    def _json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    @staticmethod
+    def _completion(model: str, step: Step, usage: dict) -> dict:
+        message: dict = {"role": "assistant", "content": step.content or None}
+        if step.tool_calls:
+            message["tool_calls"] = [
+                {"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                 "function": {"name": name, "arguments": json.dumps(args, ensure_ascii=False)}}
+                for name, args in step.tool_calls
+            ]
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": message,
+                         "finish_reason": "tool_calls" if step.tool_calls else "stop"}],
+            "usage": usage,
+        }
+
+    def _stream(self, model: str, step: Step, usage: dict | None) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        def chunk(delta: dict, finish_reason: str | None = None, **extra) -> dict:
+            return {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra,
+            }
+
+        self._event(chunk({"role": "assistant", "content": ""}))
+        for i in range(0, len(step.content), CHUNK_CHARS):
+            piece = step.content[i:i + CHUNK_CHARS]
+            self._pace(_estimate_tokens(piece))
+            self._event(chunk({"content": piece}))
+        for index, (name, args) in enumerate(step.tool_calls):
+            arguments = json.dumps(args, ensure_ascii=False)
+            self._event(chunk({"tool_calls": [{
+                "index": index, "id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                "function": {"name": name, "arguments": ""},
+            }]}))
+            for i in range(0, len(arguments), CHUNK_CHARS):
+                piece = arguments[i:i + CHUNK_CHARS]
+                self._pace(_estimate_tokens(piece))
+                self._event(chunk({"tool_calls": [{"index": index, "function": {"arguments": piece}}]}))
+        self._event(chunk({}, "tool_calls" if step.tool_calls else "stop"))
+        if usage:
+            self._event({"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                         "model": model, "choices": [], "usage": usage})
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _event(self, payload: dict) -> None:
+        self._write_chunk(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, profile: MockProfile):
+        super().__init__(address, _Handler)
+        self.profile = profile
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def record(self, role: str, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            self._requests += 1
+            self._roles[role] += 1
+            self._prompt_tokens += prompt_tokens
+            self._completion_tokens += completion_tokens
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._requests = 0
+            self._roles: Counter = Counter()
+            self._prompt_tokens = 0
+            self._completion_tokens = 0
+
+    def stats_snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "roles": dict(self._roles),
+                "prompt_tokens": self._prompt_tokens,
+                "completion_tokens": self._completion_tokens,
+            }
+
+
+class MockOpenAIServer:
+    """在后台线程中运行的桩服务"""
+
+    def __init__(self, profile: MockProfile | None = None, host: str = "127.0.0.1", port: int = 0):
+        self._server = _Server((host, port), profile or MockProfile())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def stats(self) -> dict:
+        return self._server.stats_snapshot()
+
+    def reset_stats(self) -> None:
+        self._server.reset_stats()
+
+    def start(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class MockServerProcess:
+    """在独立进程中运行的桩服务，接口与 MockOpenAIServer 相同"""
+
+    def __init__(self, profile: MockProfile | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.profile = profile or MockProfile()
+        self.host = host
+        self.port = port
+        self._proc: subprocess.Popen | None = None
+        self.base_url = ""
+
+    def _call(self, method: str, path: str) -> dict:
+        import urllib.request
+        root = self.base_url.removesuffix("/v1")
+        request = urllib.request.Request(root + path, method=method, data=b"" if method == "POST" else None)
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.loads(response.read())
+
+    def stats(self) -> dict:
+        return self._call("GET", "/stats")
+
+    def reset_stats(self) -> None:
+        self._call("POST", "/reset")
+
+    def start(self) -> "MockServerProcess":
+        self._proc = subprocess.Popen(
+            [sys.executable, "-m", "bench.mock_server", "--host", self.host, "--port", str(self.port),
+             "--profile", self.profile.to_json()],
+            cwd=Path(__file__).resolve().parent.parent,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        line = self._proc.stdout.readline().strip()
+        if not line.startswith("http://"):
+            self.stop()
+            raise RuntimeError(f"桩服务启动失败: {line or '无输出'}")
+        self.base_url = line
+        return self
+
+    def stop(self) -> None:
+        if self._proc and self._proc.poll() is None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+
+    def __enter__(self) -> "MockServerProcess":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.mock_server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--profile", default="{}", help="MockProfile 的 JSON")
+    args = parser.parse_args(argv)
+
+    server = MockOpenAIServer(MockProfile.from_json(args.profile), args.host, args.port)
+    # 第一行输出 base_url，供 MockServerProcess 读取
+    print(server.base_url, flush=True)
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
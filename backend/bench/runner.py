@@ -0,0 +1,447 @@
+"""
+Web Builder Agent - 基准测试驱动
+启动桩服务（默认独立进程），把模型地址指向它，然后在每个并发度下：
+- workflow: 通过 WorkflowScheduler 并发执行 WebBuilderWorkflow.arun()（--mode sync 时用线程池驱动 run()）
+- agentos : 通过 ASGI 直接调用 AgentOS 应用的 POST /agents/{agent_id}/runs
+
+每组测量输出：吞吐量（运行/分钟）、单次运行与各阶段耗时的 p50 / p95 / max、
+各工具的调用次数与耗时、模型请求数与 token、进程 RSS 峰值、CPU 时间（含构建子进程）。
+结果可写入 JSON，并与基线 JSON 比较，超出允许的退化比例时以非零状态退出。
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from bench.mock_server import MockOpenAIServer, MockServerProcess
+from bench.trajectories import MockProfile
+
+
+RUN_PREFIX = "bench-"
+AGENTOS_PROJECT_PREFIX = "bench-agentos-"
+
+# 基准运行期间的环境变量：模型指向桩服务，关闭缓存 / 路由 / 交付后回收等会干扰测量的功能
+BENCH_ENV = {
+    "OPENAI_API_KEY": "bench",
+    "OPENAI_MODEL": "bench-model",
+    "LLM_CACHE": "off",
+    "LLM_ROUTER_MODELS": "",
+    "WORKSPACE_GC_ON_DELIVERY": "false",
+    "AGNO_TELEMETRY": "false",
+}
+
+# 基线比较的指标：(名称, 取值函数, 越大越好)
+GATED_METRICS = [
+    ("throughput", lambda r: r["throughput"], True),
+    ("run_p95", lambda r: r["run_latency"]["p95"], False),
+    ("cpu_per_run", lambda r: r["cpu_per_run"], False),
+    ("rss_peak_mb", lambda r: r["rss_peak_mb"], False),
+]
+
+
+# ---------------------------------------------------------------------------
+# 统计
+# ---------------------------------------------------------------------------
+
+def percentile(values: list[float], pct: float) -> float:
+    """最近秩法百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+@dataclass
+class LatencyStats:
+    count: int = 0
+    mean: float = 0.0
+    p50: float = 0.0
+    p95: float = 0.0
+    max: float = 0.0
+
+    @classmethod
+    def of(cls, values: list[float]) -> "LatencyStats":
+        if not values:
+            return cls()
+        return cls(
+            count=len(values),
+            mean=round(sum(values) / len(values), 4),
+            p50=round(percentile(values, 50), 4),
+            p95=round(percentile(values, 95), 4),
+            max=round(max(values), 4),
+        )
+
+
+@dataclass
+class BenchResult:
+    """一组（目标, 模式, 并发度）的测量结果"""
+    target: str
+    mode: str
+    concurrency: int
+    runs: int = 0
+    ok: int = 0
+    wall_time: float = 0.0
+    throughput: float = 0.0  # 运行/分钟
+    run_latency: LatencyStats = field(default_factory=LatencyStats)
+    phases: dict[str, LatencyStats] = field(default_factory=dict)
+    tools: dict[str, LatencyStats] = field(default_factory=dict)
+    model_requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    rss_start_mb: float = 0.0
+    rss_peak_mb: float = 0.0
+    cpu_seconds: float = 0.0  # 本进程
+    children_cpu_seconds: float = 0.0  # 构建等子进程
+    cpu_percent: float = 0.0
+    cpu_per_run: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        return f"{self.target}/{self.mode}/c{self.concurrency}"
+
+    def format(self) -> str:
+        lines = [
+            f"[{self.key}] 运行={self.runs} 成功={self.ok} | 总耗时={self.wall_time:.2f}s | "
+            f"吞吐量={self.throughput:.1f} 运行/分钟",
+            f"  单次运行: p50={self.run_latency.p50:.3f}s p95={self.run_latency.p95:.3f}s "
+            f"max={self.run_latency.max:.3f}s",
+        ]
+        for phase, stats in self.phases.items():
+            lines.append(
+                f"  阶段 {phase:<9} n={stats.count:<4} p50={stats.p50:.3f}s p95={stats.p95:.3f}s max={stats.max:.3f}s"
+            )
+        if self.tools:
+            lines.append("  工具: " + ", ".join(
+                f"{name}×{s.count}(p95={s.p95:.3f}s)" for name, s in sorted(self.tools.items())
+            ))
+        lines += [
+            f"  模型请求={self.model_requests} | prompt tokens={self.prompt_tokens} | "
+            f"completion tokens={self.completion_tokens}",
+            f"  RSS: 起始={self.rss_start_mb:.1f}MB 峰值={self.rss_peak_mb:.1f}MB | "
+            f"CPU: 本进程={self.cpu_seconds:.2f}s ({self.cpu_percent:.0f}%) 子进程={self.children_cpu_seconds:.2f}s "
+            f"每次运行={self.cpu_per_run * 1000:.0f}ms",
+        ]
+        lines += [f"  错误: {e}" for e in self.errors[:5]]
+        return "\n".join(lines)
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # 非 Linux：退回进程生命周期内的峰值（macOS 单位为字节，Linux 为 KB）
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ResourceSampler:
+    """在后台线程中采样 RSS，并统计区间内本进程与子进程的 CPU 时间"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.rss_start = 0
+        self.rss_peak = 0
+        self.cpu = 0.0
+        self.children_cpu = 0.0
+        self.wall = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.rss_peak = max(self.rss_peak, _rss_bytes())
+
+    def __enter__(self) -> "ResourceSampler":
+        self.rss_start = self.rss_peak = _rss_bytes()
+        self._times = os.times()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="bench-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.rss_peak = max(self.rss_peak, _rss_bytes())
+        end = os.times()
+        self.wall = time.perf_counter() - self._started
+        self.cpu = (end.user - self._times.user) + (end.system - self._times.system)
+        self.children_cpu = (end.children_user - self._times.children_user) + (
+            end.children_system - self._times.children_system
+        )
+
+
+class _Collector:
+    """汇总进度事件中的阶段耗时与工具耗时（线程安全）"""
+
+    def __init__(self):
+        self.phases: dict[str, list[float]] = defaultdict(list)
+        self.tools: dict[str, list[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __call__(self, response) -> None:
+        from models.events import WorkflowEvent
+
+        event = getattr(response, "content", None)
+        kind = getattr(event, "event", None)
+        if kind == WorkflowEvent.phase_completed and event.duration is not None:
+            with self._lock:
+                self.phases[event.phase].append(event.duration)
+        elif kind == WorkflowEvent.tool_call_completed and event.tool_name:
+            with self._lock:
+                self.tools[event.tool_name].append(event.duration or 0.0)
+
+
+# ---------------------------------------------------------------------------
+# 被测目标
+# ---------------------------------------------------------------------------
+
+async def _workflow_async(concurrency: int, run_ids: list[str], skill_id: str, collector: _Collector):
+    from agents.scheduler import WorkflowJob, WorkflowScheduler
+
+    scheduler = WorkflowScheduler(max_concurrency=concurrency, on_event=collector)
+    results = await scheduler.run_all([WorkflowJob(skill_id=skill_id, run_id=r) for r in run_ids])
+    return [(r.duration, r.status == "success", r.error) for r in results]
+
+
+def _workflow_sync(concurrency: int, run_ids: list[str], skill_id: str, collector: _Collector):
+    from agents.workflow import WebBuilderWorkflow
+    from agno.workflow import RunEvent
+
+    def run_one(run_id: str):
+        started = time.perf_counter()
+        status, error = "fail", None
+        try:
+            for response in WebBuilderWorkflow(session_id=f"bench-{run_id}").run(skill_id, run_id=run_id):
+                collector(response)
+                if response.event == RunEvent.workflow_completed and response.content:
+                    status = json.loads(response.content).get("status", "fail")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return time.perf_counter() - started, status == "success", error
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as pool:
+        return list(pool.map(run_one, run_ids))
+
+
+def _load_agentos(env: dict[str, str]):
+    """导入 AgentOS 应用，并把其中的 Agent 改为使用桩服务"""
+    # 先导入 agents 包：其模块在导入时读取环境变量，需在 agentos 的 load_dotenv 之前完成
+    import agents.workflow  # noqa: F401
+    import agentos
+    from agents.llm import create_model
+
+    # agentos 导入时 load_dotenv(override=True) 会用 .env 覆盖模型地址，这里恢复
+    os.environ.update(env)
+    for agent in agentos.agent_os.agents:
+        budget = getattr(agent.model, "history_token_budget", 0)
+        agent.model = create_model(agent.model.id, history_token_budget=budget)
+        agent.set_id()
+    return agentos
+
+
+async def _agentos_runs(concurrency: int, run_ids: list[str], env: dict[str, str]):
+    import httpx
+
+    agentos = _load_agentos(env)
+    agent = agentos.agent_os.agents[0]
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=agentos.app)
+
+    async def run_one(client: httpx.AsyncClient, run_id: str):
+        async with semaphore:
+            started = time.perf_counter()
+            project = AGENTOS_PROJECT_PREFIX + run_id.removeprefix(RUN_PREFIX)
+            try:
+                response = await client.post(
+                    f"/agents/{agent.id}/runs",
+                    data={
+                        "message": f"帮我做个饭店菜单网页\n项目目录: {project}",
+                        "stream": "false",
+                        "session_id": run_id,
+                    },
+                )
+                error = None if response.status_code == 200 else f"HTTP {response.status_code}: {response.text[:200]}"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            return time.perf_counter() - started, error is None, error
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://agentos", timeout=600) as client:
+        return await asyncio.gather(*(run_one(client, r) for r in run_ids))
+
+
+def run_benchmark(
+    target: str,
+    mode: str,
+    concurrency: int,
+    runs: int,
+    server,
+    skill_id: str = "restaurant-menu",
+    env: dict[str, str] | None = None,
+) -> BenchResult:
+    """执行一组测量"""
+    run_ids = [f"{RUN_PREFIX}{uuid.uuid4().hex[:8]}" for _ in range(runs)]
+    collector = _Collector()
+    server.reset_stats()
+
+    with ResourceSampler() as sampler:
+        if target == "agentos":
+            outcomes = asyncio.run(_agentos_runs(concurrency, run_ids, env or {}))
+        elif mode == "sync":
+            outcomes = _workflow_sync(concurrency, run_ids, skill_id, collector)
+        else:
+            outcomes = asyncio.run(_workflow_async(concurrency, run_ids, skill_id, collector))
+
+    stats = server.stats()
+    durations = [d for d, _, _ in outcomes]
+    return BenchResult(
+        target=target,
+        mode=mode,
+        concurrency=concurrency,
+        runs=runs,
+        ok=sum(1 for _, ok, _ in outcomes if ok),
+        wall_time=round(sampler.wall, 3),
+        throughput=round(runs / sampler.wall * 60, 2) if sampler.wall > 0 else 0.0,
+        run_latency=LatencyStats.of(durations),
+        phases={p: LatencyStats.of(v) for p, v in collector.phases.items()},
+        tools={t: LatencyStats.of(v) for t, v in collector.tools.items()},
+        model_requests=stats["requests"],
+        prompt_tokens=stats["prompt_tokens"],
+        completion_tokens=stats["completion_tokens"],
+        rss_start_mb=round(sampler.rss_start / 1024 ** 2, 1),
+        rss_peak_mb=round(sampler.rss_peak / 1024 ** 2, 1),
+        cpu_seconds=round(sampler.cpu, 3),
+        children_cpu_seconds=round(sampler.children_cpu, 3),
+        cpu_percent=round(sampler.cpu / sampler.wall * 100, 1) if sampler.wall > 0 else 0.0,
+        cpu_per_run=round(sampler.cpu / runs, 4) if runs else 0.0,
+        errors=[e for _, _, e in outcomes if e],
+    )
+
+
+# ---------------------------------------------------------------------------
+# 基线比较与清理
+# ---------------------------------------------------------------------------
+
+def compare_with_baseline(results: list[dict], baseline: list[dict], max_regression: float) -> list[str]:
+    """返回超出允许退化比例的指标说明；基线中没有对应分组的结果不参与比较"""
+    base = {f"{r['target']}/{r['mode']}/c{r['concurrency']}": r for r in baseline}
+    failures = []
+    for result in results:
+        key = f"{result['target']}/{result['mode']}/c{result['concurrency']}"
+        if key not in base:
+            continue
+        for name, value, higher_is_better in GATED_METRICS:
+            old, new = value(base[key]), value(result)
+            if not old:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > max_regression:
+                failures.append(f"{key} {name}: {old} → {new} ({change:+.0%})")
+    return failures
+
+
+def cleanup() -> int:
+    """删除基准运行产生的工作目录与检查点，返回删除的条目数"""
+    from agents.checkpoint import CHECKPOINT_DIR
+    from agents.developer import WORKSPACE_DIR
+
+    removed = 0
+    for path in list(WORKSPACE_DIR.glob(f"{RUN_PREFIX}*")) + list(CHECKPOINT_DIR.glob(f"{RUN_PREFIX}*.json")):
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+# ---------------------------------------------------------------------------
+# 入口
+# ---------------------------------------------------------------------------
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Web Builder 离线基准测试")
+    parser.add_argument("--target", choices=["workflow", "agentos", "all"], default="workflow")
+    parser.add_argument("--mode", choices=["async", "sync"], default="async", help="workflow 的驱动方式")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16], help="逗号分隔的并发度列表")
+    parser.add_argument("--runs", type=int, default=16, help="每个并发度的运行次数")
+    parser.add_argument("--warmup", type=int, default=1, help="每个目标正式测量前的预热运行次数")
+    parser.add_argument("--skill", default="restaurant-menu")
+    parser.add_argument("--latency", type=float, default=MockProfile.latency, help="模型首 token 延迟（秒）")
+    parser.add_argument("--tps", type=float, default=MockProfile.tokens_per_second, help="模型输出 token/秒，0 不限速")
+    parser.add_argument("--files", type=int, default=MockProfile.files, help="Developer 生成的组件文件数")
+    parser.add_argument("--build-seconds", type=float, default=MockProfile.build_seconds)
+    parser.add_argument("--build-command", default=None, help='自定义构建命令，如 "npm run build"')
+    parser.add_argument("--qa-pass", action="store_true", help="首次 QA 即通过（不走修复轮）")
+    parser.add_argument("--inline-server", action="store_true", help="桩服务运行在本进程内（CPU 会计入测量）")
+    parser.add_argument("--output", default=None, help="结果 JSON 输出路径")
+    parser.add_argument("--baseline", default=None, help="基线结果 JSON，用于回归门禁")
+    parser.add_argument("--max-regression", type=float, default=0.15, help="允许的最大退化比例")
+    parser.add_argument("--keep", action="store_true", help="保留运行产生的工作目录与检查点")
+    args = parser.parse_args(argv)
+
+    profile = MockProfile(
+        latency=args.latency,
+        tokens_per_second=args.tps,
+        files=args.files,
+        build_seconds=args.build_seconds,
+        build_command=args.build_command.split() if args.build_command else None,
+        qa_fail=not args.qa_pass,
+    )
+    targets = ["workflow", "agentos"] if args.target == "all" else [args.target]
+    server_cls = MockOpenAIServer if args.inline_server else MockServerProcess
+
+    results: list[BenchResult] = []
+    with server_cls(profile) as server, tempfile.TemporaryDirectory(prefix="bench-db-") as db_dir:
+        env = {**BENCH_ENV, "OPENAI_BASE_URL": server.base_url, "AGENT_DB_DIR": db_dir}
+        os.environ.update(env)
+        print(f"桩服务: {server.base_url} | profile={profile.to_json()}")
+        try:
+            for target in targets:
+                mode = "async" if target == "agentos" else args.mode
+                if args.warmup:
+                    run_benchmark(target, mode, 1, args.warmup, server, args.skill, env)
+                for concurrency in args.concurrency:
+                    result = run_benchmark(target, mode, concurrency, args.runs, server, args.skill, env)
+                    results.append(result)
+                    print(result.format())
+        finally:
+            if not args.keep:
+                cleanup()
+
+    payload = [asdict(r) for r in results]
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps({"profile": json.loads(profile.to_json()), "results": payload}, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+        print(f"结果已写入 {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        failures = compare_with_baseline(payload, baseline.get("results", []), args.max_regression)
+        if failures:
+            print(f"性能退化超过 {args.max_regression:.0%}:")
+            for line in failures:
+                print(f"  - {line}")
+            return 1
+        print(f"与基线相比未发现超过 {args.max_regression:.0%} 的退化")
+    return 0 if all(r.ok == r.runs for r in results) else 2
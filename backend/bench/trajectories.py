@@ -0,0 +1,212 @@
+"""
+Web Builder Agent - 基准测试的脚本化轨迹
+桩服务根据请求推断发起方与所处步骤，返回预先编排好的下一步：
+- 发起方：按请求中声明的工具判断
+    write_files                         → Developer（用户消息以 "QA 审查发现" 开头时为修复轮）
+    project_snapshot + run_shell_command → 完整 QA Agent
+    project_snapshot                    → 只读 Reviewer（增量复审 / 并行审查）
+    save_file + run_shell_command       → AgentOS 对话 Agent
+- 步骤：最后一条用户消息之后已有的 assistant 消息数
+
+轨迹只依赖请求内容，不在服务端保存会话状态，因此任意并发下都是确定的。
+"""
+import json
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+FAKE_BUILD_SCRIPT = BENCH_DIR / "fake_build.py"
+
+_AGENTOS_PROJECT_RE = re.compile(r"项目目录: ([\w./-]+)")
+
+
+@dataclass
+class MockProfile:
+    """桩服务的行为配置"""
+    latency: float = 0.2  # 首 token 延迟（秒）
+    tokens_per_second: float = 1000.0  # 输出速度，0 表示不限速
+    files: int = 6  # Developer 生成的组件文件数
+    file_lines: int = 30  # 每个组件文件的行数
+    build_seconds: float = 0.5  # 模拟构建耗时
+    build_command: list[str] | None = None  # 自定义构建命令（如 ["npm", "run", "build"]），默认用 fake_build.py
+    qa_fail: bool = True  # 首次 QA 报告 critical 问题，触发修复轮
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, text: str) -> "MockProfile":
+        return cls(**json.loads(text))
+
+
+@dataclass
+class Step:
+    """轨迹中的一步：要么发起工具调用，要么给出最终文本"""
+    content: str = ""
+    tool_calls: list[tuple[str, dict]] = field(default_factory=list)
+
+
+# ---------------------------------------------------------------------------
+# 生成的项目内容
+# ---------------------------------------------------------------------------
+
+def _component(index: int, lines: int) -> str:
+    name = f"Section{index}"
+    body = [
+        f"      <li key={{{i}}} className=\"rounded-lg bg-white p-4 shadow\">条目 {index}-{i}</li>"
+        for i in range(max(lines - 12, 1))
+    ]
+    return "\n".join([
+        "import { memo } from 'react'",
+        "",
+        f"function {name}() {{",
+        "  return (",
+        f"    <section aria-labelledby=\"{name.lower()}-title\" className=\"mx-auto max-w-4xl py-8\">",
+        f"      <h2 id=\"{name.lower()}-title\" className=\"text-2xl font-bold\">分区 {index}</h2>",
+        "      <ul className=\"grid gap-4 md:grid-cols-2\">",
+        *body,
+        "      </ul>",
+        "    </section>",
+        "  )",
+        "}",
+        "",
+        f"export default memo({name})",
+        "",
+    ])
+
+
+def project_files(profile: MockProfile) -> list[dict[str, str]]:
+    """Developer 在 Phase 1 写入的文件（write_files 的 entries）"""
+    imports = "\n".join(f"import Section{i} from './components/Section{i}'" for i in range(profile.files))
+    sections = "\n".join(f"      <Section{i} />" for i in range(profile.files))
+    app = (
+        f"{imports}\n\nexport default function App() {{\n  return (\n"
+        f"    <main className=\"min-h-screen bg-gray-50\">\n{sections}\n    </main>\n  )\n}}\n"
+    )
+    entries = [{"path": "src/App.tsx", "content": app}]
+    entries += [
+        {"path": f"src/components/Section{i}.tsx", "content": _component(i, profile.file_lines)}
+        for i in range(profile.files)
+    ]
+    return entries
+
+
+def _build_args(profile: MockProfile) -> list[str]:
+    if profile.build_command:
+        return list(profile.build_command)
+    return [sys.executable, "-I", str(FAKE_BUILD_SCRIPT), str(profile.build_seconds)]
+
+
+def _qa_report(passed: bool) -> str:
+    issues = [] if passed else [{
+        "severity": "critical",
+        "category": "accessibility",
+        "file_path": "src/App.tsx",
+        "description": "页面缺少顶层标题，屏幕阅读器无法识别页面主题",
+        "suggestion": "在 main 内添加 h1 标题",
+    }]
+    return json.dumps({
+        "passed": passed,
+        "score": 92 if passed else 65,
+        "summary": "结构清晰，组件划分合理" if passed else "存在可访问性问题，需修复后交付",
+        "issues": issues,
+        "fixed_files": [],
+    }, ensure_ascii=False)
+
+
+# 在 App.tsx 的 <main> 之后插入标题（行号 = import 行数 + 空行 + 函数头 + return）
+_FIX_PATCH = """--- a/src/App.tsx
++++ b/src/App.tsx
+@@ -{line},1 +{line},2 @@
+     <main className="min-h-screen bg-gray-50">
++      <h1 className="sr-only">餐厅菜单</h1>
+"""
+
+
+# ---------------------------------------------------------------------------
+# 各发起方的轨迹
+# ---------------------------------------------------------------------------
+
+def developer_steps(profile: MockProfile) -> list[Step]:
+    return [
+        Step(tool_calls=[("write_files", {"entries": project_files(profile)})]),
+        Step(tool_calls=[("run_shell_command", {"args": _build_args(profile)})]),
+        Step(content=json.dumps({"status": "success", "build": "passed"}, ensure_ascii=False)),
+    ]
+
+
+def fix_steps(profile: MockProfile) -> list[Step]:
+    return [
+        Step(tool_calls=[("apply_patch", {"patch": _FIX_PATCH.format(line=profile.files + 4)})]),
+        Step(tool_calls=[("run_shell_command", {"args": _build_args(profile)})]),
+        Step(content="已修复 QA 报告的 critical 问题，构建通过。"),
+    ]
+
+
+def qa_steps(profile: MockProfile) -> list[Step]:
+    return [
+        Step(tool_calls=[("project_snapshot", {})]),
+        Step(content=_qa_report(passed=not profile.qa_fail)),
+    ]
+
+
+def reviewer_steps(profile: MockProfile) -> list[Step]:
+    return [
+        Step(tool_calls=[("project_snapshot", {"paths": ["src"]})]),
+        Step(content=_qa_report(passed=True)),
+    ]
+
+
+def agentos_steps(profile: MockProfile, project: str) -> list[Step]:
+    app = project_files(profile)[1]["content"]
+    return [
+        Step(tool_calls=[("save_file", {"contents": app, "file_name": f"{project}/src/App.tsx"})]),
+        Step(tool_calls=[("run_shell_command", {"args": ["ls", project]})]),
+        Step(content=f"项目已生成在 {project}，构建通过。"),
+    ]
+
+
+def _tool_names(body: dict) -> set[str]:
+    return {
+        t.get("function", {}).get("name")
+        for t in body.get("tools") or []
+        if isinstance(t, dict)
+    }
+
+
+def _text(message: dict) -> str:
+    content = message.get("content")
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def next_step(body: dict, profile: MockProfile) -> tuple[str, Step]:
+    """
+    根据 chat.completions 请求体选出下一步。
+
+    Returns:
+        (发起方, 步骤)
+    """
+    messages = body.get("messages") or []
+    last_user = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+    index = sum(1 for m in messages[last_user + 1:] if m.get("role") == "assistant")
+    user_text = _text(messages[last_user]) if last_user >= 0 else ""
+    tools = _tool_names(body)
+
+    if "write_files" in tools:
+        role = "fix" if user_text.startswith("QA 审查发现") else "developer"
+        steps = fix_steps(profile) if role == "fix" else developer_steps(profile)
+    elif "project_snapshot" in tools:
+        role = "qa" if "run_shell_command" in tools else "reviewer"
+        steps = qa_steps(profile) if role == "qa" else reviewer_steps(profile)
+    elif "save_file" in tools and "run_shell_command" in tools:
+        role = "agentos"
+        match = _AGENTOS_PROJECT_RE.search(user_text)
+        steps = agentos_steps(profile, match.group(1) if match else "bench-agentos")
+    else:
+        return "chat", Step(content="好的。")
+    return role, steps[min(index, len(steps) - 1)]
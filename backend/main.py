@@ -3,25 +3,41 @@ Web Builder Coding Agent - CLI 模式入口
 支持两种运行方式：
   1. 交互模式: python main.py
   2. 命令行模式: python main.py <skill_id> [user_input]
+  3. 断点续跑: python main.py --resume <run_id>
+  4. 批量模式: python main.py --batch <jobs.jsonl|jobs.yaml> [--workers N] [--output DIR]
+  5. 工作目录管理: python main.py --workspace list | gc | restore <run_id>
 
 v2: 使用 WebBuilderWorkflow（Developer + QA 多 Agent 协作）
 """
 import os
 import sys
 import json
+import time
+import argparse
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from agno.workflow import RunEvent
+
+from agents.batch import load_batch_manifest, run_batch
+from agents.checkpoint import load_checkpoint
 from agents.developer import list_skills
 from agents.workflow import WebBuilderWorkflow
+from agents.workspace import WorkspaceManager
+from models.events import ProgressEvent, WorkflowEvent
 
 
 # ---------------------------------------------------------------------------
 # 主流程
 # ---------------------------------------------------------------------------
 
-def run_with_skill(skill_id: str, user_input: str = ""):
+def run_with_skill(
+    skill_id: str,
+    user_input: str = "",
+    run_id: str | None = None,
+    resume: bool = False,
+):
     """使用 Workflow 运行完整的 生成 + QA 审查 流程"""
     print(f"\n{'='*60}")
     print(f"  Web Builder Agent v2 - Developer + QA 协作模式")
@@ -32,10 +48,16 @@ def run_with_skill(skill_id: str, user_input: str = ""):
         session_id=f"cli-{skill_id}",
     )
 
-    results = list(workflow.run(skill_id=skill_id, user_input=user_input))
+    last = None
+    for response in workflow.run(
+        skill_id=skill_id, user_input=user_input, run_id=run_id, resume=resume
+    ):
+        if response.event == RunEvent.workflow_completed:
+            last = response
+        elif isinstance(response.content, ProgressEvent):
+            print_progress(response.content)
 
-    if results:
-        last = results[-1]
+    if last:
         if last.content:
             try:
                 delivery = json.loads(last.content)
@@ -57,6 +79,82 @@ def run_with_skill(skill_id: str, user_input: str = ""):
         print("[错误] Workflow 未返回结果")
 
 
+def resume_run(run_id: str):
+    """从检查点恢复指定运行"""
+    checkpoint = load_checkpoint(run_id)
+    if checkpoint is None:
+        print(f"[错误] 未找到运行 {run_id} 的检查点")
+        sys.exit(1)
+    print(f"[恢复] run_id={run_id} | 已完成阶段: {checkpoint.phase}")
+    run_with_skill(checkpoint.skill_id, checkpoint.user_input, run_id=run_id, resume=True)
+
+
+def batch_mode(argv: list[str]):
+    """批量模式：按任务清单并行生成，输出交付 JSON 与汇总报告"""
+    parser = argparse.ArgumentParser(prog="main.py --batch")
+    parser.add_argument("manifest", help="任务清单（.jsonl / .yaml）")
+    parser.add_argument("--workers", type=int, default=None, help="并行工作进程数（默认 BATCH_WORKERS）")
+    parser.add_argument("--output", default=None, help="交付 JSON 输出目录")
+    args = parser.parse_args(argv)
+
+    jobs = load_batch_manifest(args.manifest)
+    print(f"\n{'='*60}")
+    print(f"  Web Builder Agent v2 - 批量模式")
+    print(f"  任务数: {len(jobs)}")
+    print(f"{'='*60}\n")
+
+    results, report = run_batch(jobs, workers=args.workers, output_dir=args.output)
+
+    for r in results:
+        score = ((r.delivery or {}).get("qa") or {}).get("score", "N/A")
+        line = f"  [{r.status}] {r.run_id} {r.skill_id} | {r.duration:.1f}s | QA: {score}"
+        print(line + (f" | {r.error}" if r.error else ""))
+    print(f"\n{'='*60}")
+    print(report.format())
+    print(f"{'='*60}\n")
+
+
+def workspace_mode(argv: list[str]):
+    """工作目录管理：列出运行、执行配额回收、按 run_id 恢复归档"""
+    parser = argparse.ArgumentParser(prog="main.py --workspace")
+    parser.add_argument("action", choices=["list", "gc", "restore"])
+    parser.add_argument("run_id", nargs="?", help="restore 时指定的运行 ID")
+    args = parser.parse_args(argv)
+
+    manager = WorkspaceManager()
+    if args.action == "list":
+        for run in manager.list_runs():
+            state = "active" if run.active else "archived"
+            print(
+                f"  {run.run_id:<12} {state:<9} {run.size / 1024 ** 2:>9.1f}MB  "
+                f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(run.last_used))}"
+                f"{'  delivered' if run.delivered else ''}"
+            )
+    elif args.action == "gc":
+        stats = manager.enforce_quota()
+        print(f"  剥离 node_modules: {len(stats['stripped'])} 个运行")
+        print(f"  归档: {', '.join(stats['archived']) or '无'}")
+        print(f"  工作目录占用: {stats['total_bytes'] / 1024 ** 2:.1f}MB")
+    else:
+        if not args.run_id:
+            parser.error("restore 需要指定 run_id")
+        print(f"  已恢复到: {manager.restore(args.run_id)}")
+
+
+def print_progress(event: ProgressEvent):
+    """实时打印 Workflow 进度事件"""
+    if event.event == WorkflowEvent.agent_delta:
+        print(event.content, end="", flush=True)
+    elif event.event == WorkflowEvent.phase_started:
+        print(f"\n>>> [{event.phase}] 开始", flush=True)
+    elif event.event == WorkflowEvent.phase_completed:
+        print(f"\n<<< [{event.phase}] 完成 ({event.duration:.1f}s)", flush=True)
+    elif event.event == WorkflowEvent.tool_call_started:
+        print(f"\n  -> {event.tool_name} {json.dumps(event.tool_args or {}, ensure_ascii=False)[:120]}", flush=True)
+    elif event.event == WorkflowEvent.build_output:
+        print(f"     | {event.content}", flush=True)
+
+
 def interactive_mode():
     """交互模式：选择 Skill 并输入需求"""
     print("\n" + "="*60)
@@ -97,6 +195,11 @@ def interactive_mode():
 
 def main():
     """入口"""
+    if len(sys.argv) > 1 and sys.argv[1] == "--workspace":
+        # 工作目录管理（不调用模型，无需 API Key）: python main.py --workspace list | gc | restore <run_id>
+        workspace_mode(sys.argv[2:])
+        return
+
     api_key = os.getenv("OPENAI_API_KEY", "")
     if not api_key or api_key == "your-api-key-here":
         print("[错误] 请先配置 OPENAI_API_KEY")
@@ -104,7 +207,17 @@ def main():
         print("  2. 填入你的 API Key")
         sys.exit(1)
 
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        # 批量模式: python main.py --batch <manifest> [--workers N] [--output DIR]
+        batch_mode(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "--resume":
+        # 断点续跑: python main.py --resume <run_id>
+        if len(sys.argv) < 3:
+            print("[错误] 缺少 run_id")
+            print("  用法: python main.py --resume <run_id>")
+            sys.exit(2)
+        resume_run(sys.argv[2])
+    elif len(sys.argv) > 1:
         # 命令行模式: python main.py <skill_id> [user_input]
         skill_id = sys.argv[1]
         user_input = " ".join(sys.argv[2:]) if len(sys.argv) > 2 else ""
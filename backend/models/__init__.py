@@ -1,3 +1,4 @@
 from .schemas import QAIssue, QAReport
+from .events import WorkflowEvent, ProgressEvent
 
-__all__ = ["QAIssue", "QAReport"]
+__all__ = ["QAIssue", "QAReport", "WorkflowEvent", "ProgressEvent"]
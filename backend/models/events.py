@@ -0,0 +1,57 @@
+"""
+Web Builder Agent - Workflow 进度事件模型
+WebBuilderWorkflow 在运行过程中流式输出的细粒度事件
+"""
+from enum import Enum
+
+from pydantic import BaseModel, Field
+
+
+class WorkflowEvent(str, Enum):
+    """Workflow 进度事件类型（最终交付仍使用 RunEvent.workflow_completed）"""
+    phase_started = "PhaseStarted"
+    phase_completed = "PhaseCompleted"
+    agent_delta = "AgentDelta"
+    tool_call_started = "ToolCallStarted"
+    tool_call_completed = "ToolCallCompleted"
+    build_output = "BuildOutput"
+
+
+class ProgressEvent(BaseModel):
+    """单个进度事件"""
+    event: WorkflowEvent = Field(
+        ...,
+        description="事件类型",
+    )
+    run_id: str = Field(
+        ...,
+        description="所属运行 ID",
+    )
+    phase: str = Field(
+        ...,
+        description="所属阶段: develop / precheck / qa / fix / rereview",
+    )
+    agent: str | None = Field(
+        default=None,
+        description="产生事件的 Agent 名称",
+    )
+    category: str | None = Field(
+        default=None,
+        description="并行审查时产生事件的 Reviewer 范围：审查维度，按文件分片时为 files-N",
+    )
+    content: str = Field(
+        default="",
+        description="增量文本、工具结果摘要或构建输出行",
+    )
+    tool_name: str | None = Field(
+        default=None,
+        description="工具名称（仅工具调用事件）",
+    )
+    tool_args: dict | None = Field(
+        default=None,
+        description="工具参数（仅工具调用事件）",
+    )
+    duration: float | None = Field(
+        default=None,
+        description="耗时（秒），用于 phase_completed / tool_call_completed",
+    )
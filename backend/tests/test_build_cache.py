@@ -0,0 +1,36 @@
+"""构建结果缓存的容量淘汰"""
+import os
+import time
+
+from agents import build_cache
+from agents.build_cache import BuildResult
+
+
+def test_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_cache, "BUILD_CACHE_DIR", tmp_path / "cache")
+    keys = []
+    for i in range(3):
+        workdir = tmp_path / f"run{i}"
+        (workdir / "dist").mkdir(parents=True)
+        (workdir / "dist" / "index.js").write_bytes(b"x" * 1000)
+        key = f"key{i}"
+        build_cache._store(BuildResult(exit_code=0, log_summary="ok", duration=1.0, key=key), workdir)
+        record = build_cache.BUILD_CACHE_DIR / key / "result.json"
+        os.utime(record, (time.time() - 100 + i, time.time() - 100 + i))
+        keys.append(key)
+
+    # 命中的条目刷新最近使用时间，不会被淘汰
+    build_cache._restore(build_cache.BUILD_CACHE_DIR / "key0", tmp_path / "run0")
+    size = build_cache._entry_size(build_cache.BUILD_CACHE_DIR / "key0")
+    assert build_cache.evict(max_bytes=2 * size, max_age=1e9) == 1
+    assert sorted(p.name for p in build_cache.BUILD_CACHE_DIR.iterdir()) == ["key0", "key2"]
+
+
+def test_evicts_expired_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_cache, "BUILD_CACHE_DIR", tmp_path / "cache")
+    workdir = tmp_path / "run"
+    workdir.mkdir()
+    build_cache._store(BuildResult(exit_code=0, log_summary="ok", duration=1.0, key="old"), workdir)
+    os.utime(build_cache.BUILD_CACHE_DIR / "old" / "result.json", (1, 1))
+    assert build_cache.evict(max_age=86400) == 1
+    assert not (build_cache.BUILD_CACHE_DIR / "old").exists()
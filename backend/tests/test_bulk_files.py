@@ -0,0 +1,55 @@
+"""批量文件工具：越界路径校验、整批原子落盘与重命名补丁"""
+from agents.bulk_files import BulkFileTools
+
+
+def _tools(tmp_path):
+    (tmp_path / "src").mkdir(parents=True)
+    (tmp_path / "src" / "App.tsx").write_text("line1\nline2\nline3\n", encoding="utf-8")
+    return BulkFileTools(tmp_path)
+
+
+def test_write_files_rejects_paths_outside_workdir(tmp_path):
+    tools = _tools(tmp_path / "proj")
+    for bad in ("../escape.txt", "/etc/passwd", "src/../../escape.txt", ""):
+        result = tools.write_files([{"path": bad, "content": "x"}])
+        assert result.startswith("error:"), bad
+    assert not (tmp_path / "escape.txt").exists()
+
+
+def test_write_files_is_all_or_nothing(tmp_path):
+    tools = _tools(tmp_path)
+    result = tools.write_files([
+        {"path": "src/Header.tsx", "content": "header"},
+        {"path": "../escape.txt", "content": "x"},
+    ])
+    assert result.startswith("error:")
+    assert not (tmp_path / "src" / "Header.tsx").exists()
+
+
+def test_apply_patch_rejects_escaping_paths(tmp_path):
+    tools = _tools(tmp_path / "proj")
+    patch = "--- /dev/null\n+++ b/../escape.txt\n@@ -0,0 +1 @@\n+x\n"
+    assert tools.apply_patch(patch).startswith("error:")
+    # 重命名的旧路径同样要校验
+    patch = "--- a/../outside.txt\n+++ b/src/inside.txt\n@@ -1 +1 @@\n-a\n+b\n"
+    assert tools.apply_patch(patch).startswith("error:")
+    assert not (tmp_path / "escape.txt").exists()
+
+
+def test_apply_patch_is_all_or_nothing(tmp_path):
+    tools = _tools(tmp_path)
+    patch = (
+        "--- a/src/App.tsx\n+++ b/src/App.tsx\n@@ -1,3 +1,3 @@\n line1\n-line2\n+changed\n line3\n"
+        "--- a/src/Missing.tsx\n+++ b/src/Missing.tsx\n@@ -1 +1 @@\n-a\n+b\n"
+    )
+    assert tools.apply_patch(patch).startswith("error:")
+    assert (tmp_path / "src" / "App.tsx").read_text(encoding="utf-8") == "line1\nline2\nline3\n"
+
+
+def test_apply_patch_renames_file(tmp_path):
+    tools = _tools(tmp_path)
+    patch = "--- a/src/App.tsx\n+++ b/src/Main.tsx\n@@ -1,3 +1,3 @@\n line1\n-line2\n+changed\n line3\n"
+    result = tools.apply_patch(patch)
+    assert "[重命名] src/App.tsx -> src/Main.tsx" in result
+    assert not (tmp_path / "src" / "App.tsx").exists()
+    assert (tmp_path / "src" / "Main.tsx").read_text(encoding="utf-8") == "line1\nchanged\nline3\n"
@@ -0,0 +1,20 @@
+"""Skill 目录索引：重复 id 的处理"""
+from agents.catalog import SkillCatalog
+
+
+def _write(path, skill_id: str, name: str):
+    path.write_text(f"id: {skill_id}\nname: {name}\ndescription: {name}\n", encoding="utf-8")
+
+
+def test_duplicate_ids_keep_first_path_and_warn(tmp_path, caplog):
+    _write(tmp_path / "a.yaml", "menu", "菜单 A")
+    _write(tmp_path / "b.yaml", "menu", "菜单 B")
+    catalog = SkillCatalog(tmp_path, reload_interval=0)
+    catalog.refresh(force=True)
+    assert [e.name for e in catalog.all()] == ["菜单 A"]
+    assert "Skill id 重复" in caplog.text
+
+    # 生效的文件被删除后，被忽略的同 id 文件接替
+    (tmp_path / "a.yaml").unlink()
+    catalog.refresh(force=True)
+    assert [e.name for e in catalog.all()] == ["菜单 B"]
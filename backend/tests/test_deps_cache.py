@@ -0,0 +1,57 @@
+"""node_modules 共享缓存：只读条目与容量淘汰"""
+import json
+import os
+import time
+
+import pytest
+
+from agents import deps_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / "cache"
+    monkeypatch.setattr(deps_cache, "NODE_MODULES_CACHE_DIR", path)
+    monkeypatch.setattr(deps_cache, "NODE_MODULES_CACHE_ENABLED", True)
+    monkeypatch.setattr(deps_cache, "_node_version", "v20.0.0")
+    return path
+
+
+def _installed_project(path, version: str):
+    path.mkdir()
+    (path / "package.json").write_text(json.dumps({"dependencies": {"react": version}}))
+    (path / "node_modules" / "react").mkdir(parents=True)
+    (path / "node_modules" / "react" / "index.js").write_text("module.exports = 1")
+    return path
+
+
+def test_cached_files_are_read_only(tmp_path, cache_dir):
+    source = _installed_project(tmp_path / "a", "18.0.0")
+    assert deps_cache.store_node_modules(source)
+
+    target = tmp_path / "b"
+    target.mkdir()
+    (target / "package.json").write_text((source / "package.json").read_text())
+    assert deps_cache.materialize_node_modules(target)
+
+    linked = target / "node_modules" / "react" / "index.js"
+    assert not linked.stat().st_mode & 0o222
+    # 整体替换（npm 的行为）仍然可以，且不影响缓存
+    linked.unlink()
+    linked.write_text("replaced")
+    key = deps_cache.dependency_key(source)
+    assert (cache_dir / key / "node_modules" / "react" / "index.js").read_text() == "module.exports = 1"
+
+
+def test_evicts_least_recently_used(tmp_path, cache_dir):
+    old = _installed_project(tmp_path / "old", "17.0.0")
+    new = _installed_project(tmp_path / "new", "18.0.0")
+    deps_cache.store_node_modules(old)
+    old_entry = cache_dir / deps_cache.dependency_key(old)
+    os.utime(old_entry, (time.time() - 60, time.time() - 60))
+    deps_cache.store_node_modules(new)
+
+    size = int((old_entry / deps_cache.SIZE_FILE).read_text())
+    assert deps_cache.evict_node_modules_cache(max_bytes=size, max_age=1e12) == 1
+    assert not old_entry.exists()
+    assert (cache_dir / deps_cache.dependency_key(new)).exists()
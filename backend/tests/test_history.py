@@ -0,0 +1,89 @@
+"""对话历史压缩：预算内不变、省略后参数仍是合法 JSON、按整轮丢弃与块边界稳定"""
+import json
+
+import pytest
+from agno.models.message import Message
+
+from agents import history
+from agents.history import compact_history, message_tokens
+
+
+@pytest.fixture(autouse=True)
+def _block(monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_COMPACT_BLOCK", 2)
+
+
+def _turn(index: int) -> list[Message]:
+    """一轮历史对话：用户消息 → 写文件的工具调用 → 工具结果 → 文字回复"""
+    call_id = f"call_{index}"
+    content = f"export default function Section{index}() {{}}\n" + "x" * 2000
+    args = {"file_name": f"src/Section{index}.tsx", "contents": content}
+    return [
+        Message(role="user", content=f"第 {index} 次修改", from_history=True),
+        Message(role="assistant", from_history=True, tool_calls=[{
+            "id": call_id, "type": "function",
+            "function": {"name": "save_file", "arguments": json.dumps(args)},
+        }]),
+        Message(role="tool", tool_call_id=call_id, tool_name="save_file", tool_args=args,
+                content=content, from_history=True),
+        Message(role="assistant", content=f"已完成第 {index} 次修改", from_history=True),
+    ]
+
+
+def _messages(turns: int) -> list[Message]:
+    messages = [Message(role="system", content="你是网页开发助手")]
+    for i in range(turns):
+        messages += _turn(i)
+    return messages + [Message(role="user", content="本轮消息")]
+
+
+def _dump(messages: list[Message]) -> list[tuple]:
+    return [(m.role, m.content, json.dumps(m.tool_calls)) for m in messages]
+
+
+def _history_tokens(messages: list[Message]) -> int:
+    return sum(message_tokens(m) for m in messages if m.from_history)
+
+
+def test_under_budget_keeps_messages():
+    messages = _messages(3)
+    result = compact_history(messages, budget=_history_tokens(messages))
+    assert result.messages is messages
+    assert not result.changed
+
+
+def test_elided_tool_arguments_stay_valid_json():
+    messages = _messages(4)
+    result = compact_history(messages, budget=_history_tokens(messages) // 2)
+    assert result.elided and not result.dropped_turns
+    calls = [c for m in result.messages for c in m.tool_calls or []]
+    assert len(calls) == 4
+    for call in calls:
+        args = json.loads(call["function"]["arguments"])
+        assert args["file_name"].startswith("src/Section")
+    # 原消息对象不被修改
+    assert len(messages[2].tool_calls[0]["function"]["arguments"]) > 2000
+
+
+def test_drops_whole_turns_without_splitting_tool_pairs():
+    messages = _messages(5)
+    result = compact_history(messages, budget=300)
+    assert result.dropped_turns == 4
+    kept = [m for m in result.messages if m.from_history]
+    assert kept[0].role == "user"
+    call_ids = {c["id"] for m in kept for c in m.tool_calls or []}
+    result_ids = {m.tool_call_id for m in kept if m.role == "tool"}
+    assert call_ids == result_ids == {"call_4"}
+    assert result.messages[0].role == "system"
+    assert result.messages[-1].content == "本轮消息"
+
+
+def test_compacted_prefix_is_stable_within_block():
+    shorter, longer = _messages(4), _messages(5)
+    # 两份历史都需要省略，且都恰好省略最早的一块（2 轮，共 4 条工具载荷）
+    budget = _history_tokens(longer) * 3 // 4
+    first = compact_history(shorter, budget=budget)
+    second = compact_history(longer, budget=budget)
+    assert first.elided == second.elided == 4
+    history_end = len(first.messages) - 1
+    assert _dump(second.messages)[:history_end] == _dump(first.messages)[:history_end]
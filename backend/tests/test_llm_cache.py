@@ -0,0 +1,50 @@
+"""模型响应缓存键的归一化：两次相同的运行应得到相同的键序列"""
+import uuid
+
+from agents.llm_cache import BASE_DIR, ResponseCache
+from agents.shell_tools import log_path_for, run_logged
+
+
+def _run_keys(tmp_path, run_id: str) -> list[str]:
+    """模拟一次运行：用户消息 → 执行 echo hi → 执行 npm 构建，返回每轮模型请求的缓存键"""
+    workdir = tmp_path / run_id
+    workdir.mkdir()
+    messages = [
+        {"role": "system", "content": "你是网页开发助手"},
+        {"role": "user", "content": (
+            f"run_id: {run_id}\nworkdir: {BASE_DIR / 'workspace' / run_id}\n"
+            "current_time: 2026-10-18 12:00 UTC"
+        )},
+    ]
+    keys = []
+    for call_id, args in (("call_1", ["echo", "hi"]), ("call_2", ["echo", "✓ built in 812ms"])):
+        keys.append(ResponseCache.make_key("m", {"model": "m", "messages": list(messages)})[0])
+        result = run_logged(args, workdir, log_path_for(workdir, "-".join(args[:2])))
+        messages += [
+            {"role": "assistant", "tool_calls": [{"id": call_id, "type": "function",
+                                                  "function": {"name": "run_shell_command", "arguments": "{}"}}]},
+            {"role": "tool", "tool_call_id": call_id, "content": result.summary(workdir)},
+        ]
+    keys.append(ResponseCache.make_key("m", {"model": "m", "messages": list(messages)})[0])
+    return keys
+
+
+def test_identical_runs_produce_same_key_sequence(tmp_path):
+    first = _run_keys(tmp_path, f"run-{uuid.uuid4().hex[:8]}")
+    second = _run_keys(tmp_path, f"run-{uuid.uuid4().hex[:8]}")
+    assert first == second
+    assert len(set(first)) == len(first)
+
+
+def test_make_key_normalizes_every_run_id():
+    params = {"messages": [
+        {"role": "user", "content": "run_id: run-a"},
+        {"role": "user", "content": "上一次 run_id: run-b"},
+    ]}
+    other = {"messages": [
+        {"role": "user", "content": "run_id: run-c"},
+        {"role": "user", "content": "上一次 run_id: run-d"},
+    ]}
+    key, run_id = ResponseCache.make_key("m", params)
+    assert run_id == "run-a"
+    assert key == ResponseCache.make_key("m", other)[0]
@@ -0,0 +1,39 @@
+"""运行指标：指标基类约束与同步运行的上下文绑定"""
+import pytest
+
+from agents import workflow
+from agents.metrics import RunMetrics, _Metric, current_run_metrics, observe_phase
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("webbuilder_test", "测试")
+
+    class Incomplete(_Metric):
+        def reset(self) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete("webbuilder_test", "测试")
+
+
+def test_sync_run_binds_metrics_only_while_running(monkeypatch):
+    def fake_run(self, skill_id, user_input, run_id, resume):
+        for _ in range(2):
+            observe_phase("develop", 1.0)
+            yield current_run_metrics()
+
+    monkeypatch.setattr(workflow.WebBuilderWorkflow, "_run", fake_run)
+    first = workflow.WebBuilderWorkflow(session_id="metrics-a").run("restaurant-menu")
+    second = workflow.WebBuilderWorkflow(session_id="metrics-b").run("restaurant-menu")
+
+    # 交错驱动两个运行：各自只看到自己的指标，调用方在 yield 之间看不到任何绑定
+    a1 = next(first)
+    assert current_run_metrics() is None
+    b1 = next(second)
+    assert current_run_metrics() is None
+    a2 = next(first)
+    assert isinstance(a1, RunMetrics) and a1 is a2 and a1 is not b1
+    assert list(first) == [] and len(list(second)) == 1
+    assert a1.to_dict()["phases"]["develop"] == 2.0
+    assert current_run_metrics() is None
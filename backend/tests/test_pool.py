@@ -0,0 +1,29 @@
+"""Agent 实例池：提示词热更新后不再复用旧 Agent"""
+import os
+
+from agents.pool import AgentPool
+from agents.registry import registry
+
+
+class _StubAgent:
+    def __init__(self, system_message: str):
+        self.system_message = system_message
+        self.tools = []
+
+
+def test_pool_drops_agents_built_from_stale_prompt(tmp_path):
+    prompt = tmp_path / "system_prompt.txt"
+    prompt.write_text("v1", encoding="utf-8")
+    factory = lambda workdir: _StubAgent(registry.read_text(prompt))
+    pool = AgentPool(max_idle=2)
+
+    agent = pool.acquire("developer", tmp_path, factory)
+    pool.release("developer", agent)
+    assert pool.acquire("developer", tmp_path, factory) is agent
+    pool.release("developer", agent)
+
+    prompt.write_text("v2", encoding="utf-8")
+    os.utime(prompt, ns=(1, 1))
+    fresh = pool.acquire("developer", tmp_path, factory)
+    assert fresh is not agent
+    assert fresh.system_message == "v2"
@@ -0,0 +1,53 @@
+"""静态预检：emoji 规则与预检问题并入 QA 报告"""
+from agents.precheck import PrecheckResult, check_emoji, merge_precheck_report
+from models.schemas import QAIssue, QAReport
+
+
+def _issue(severity: str, file_path: str = "src/App.tsx", description: str = "问题") -> QAIssue:
+    return QAIssue(
+        severity=severity, category="ui-ux", file_path=file_path,
+        description=description, suggestion="",
+    )
+
+
+def test_emoji_rule_ignores_text_symbols():
+    for text in ("评分 ★★★", "✓ 已完成", "<span>✕</span>", "下一步 ➜"):
+        assert check_emoji("src/App.tsx", ".tsx", text) == [], text
+
+
+def test_emoji_rule_flags_emoji():
+    for text in ("🚀 上线", "✅ 完成", "❌", "⚡ 快速", "❤️ 喜欢"):
+        assert check_emoji("src/App.tsx", ".tsx", text), text
+
+
+def test_merge_keeps_qa_verdict_for_fixed_critical():
+    # QA 报告中列出了已直接修复的 critical 问题，仍判定通过
+    qa = QAReport(passed=True, score=85, summary="", issues=[_issue("critical")],
+                  fixed_files=["src/App.tsx"])
+    merged = merge_precheck_report(qa, PrecheckResult(issues=[_issue("info", "src/main.tsx")]))
+    assert merged.passed
+    assert merged.score == 84
+    assert len(merged.issues) == 2
+
+
+def test_merge_downgrades_on_unfixed_precheck_critical():
+    qa = QAReport(passed=True, score=100, summary="", issues=[])
+    merged = merge_precheck_report(qa, PrecheckResult(issues=[_issue("critical", description="emoji")]))
+    assert not merged.passed
+    assert merged.score == 85
+
+
+def test_merge_does_not_double_count_known_issues():
+    issue = _issue("warning", description="缺少 alt")
+    qa = QAReport(passed=True, score=95, summary="", issues=[issue])
+    merged = merge_precheck_report(qa, PrecheckResult(issues=[issue]))
+    assert merged.passed
+    assert merged.score == 95
+    assert len(merged.issues) == 1
+
+
+def test_merge_keeps_dotfile_paths_distinct():
+    qa = QAReport(passed=True, score=100, summary="", issues=[])
+    issues = [_issue("info", ".eslintrc.cjs"), _issue("info", "eslintrc.cjs")]
+    merged = merge_precheck_report(qa, PrecheckResult(issues=issues))
+    assert len(merged.issues) == 2
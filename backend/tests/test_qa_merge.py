@@ -0,0 +1,117 @@
+"""并行审查：Reviewer 事件流的汇总与多个报告的合并去重"""
+import asyncio
+from types import SimpleNamespace
+
+from agno.agent import RunResponse
+
+from agents.qa import (
+    arun_parallel_qa,
+    astream_parallel_qa,
+    merge_qa_reports,
+    reviewer_scope,
+    stream_parallel_qa,
+)
+from models.schemas import QAIssue, QAReport
+
+
+def _issue(severity: str, category: str, description: str, file_path: str = "src/App.tsx") -> QAIssue:
+    return QAIssue(
+        severity=severity, category=category, file_path=file_path,
+        description=description, suggestion="",
+    )
+
+
+def _report(*issues: QAIssue, passed: bool = True) -> QAReport:
+    return QAReport(passed=passed, score=100, summary="", issues=list(issues))
+
+
+def test_category_shards_merge_cross_category_duplicates():
+    # 不同维度的 Reviewer 以不同措辞报告了同一处问题
+    ui = _report(_issue("warning", "ui-ux", "Hero 区域的 <img> 缺少 alt 属性"))
+    a11y = _report(_issue("critical", "accessibility", "<img> 缺少 alt 属性，读屏软件无法识别 Hero 图片"))
+    merged = merge_qa_reports([ui, a11y], match_category=False)
+    assert len(merged.issues) == 1
+    assert merged.issues[0].severity == "critical"
+    assert merged.score == 85
+
+
+def test_line_numbers_decide_when_present():
+    first = _report(
+        _issue("warning", "accessibility", "第 12 行 <img> 缺少 alt 属性"),
+        _issue("warning", "accessibility", "第 30 行 <img> 缺少 alt 属性"),
+    )
+    second = _report(_issue("info", "ui-ux", "Line 12: image has no alt text"))
+    merged = merge_qa_reports([first, second], match_category=False)
+    assert len(merged.issues) == 2
+    assert merged.score == 90
+
+
+def test_distinct_issues_and_files_are_kept():
+    reports = [
+        _report(_issue("warning", "performance", "整库导入 lodash 导致 bundle 体积过大")),
+        _report(
+            _issue("warning", "ui-ux", "按钮缺少 hover 状态"),
+            _issue("warning", "performance", "整库导入 lodash 导致 bundle 体积过大", "src/main.tsx"),
+        ),
+    ]
+    merged = merge_qa_reports(reports, match_category=False)
+    assert len(merged.issues) == 3
+
+
+def test_category_is_matched_by_default():
+    reports = [
+        _report(_issue("warning", "ui-ux", "按钮缺少 hover 状态")),
+        _report(_issue("warning", "react-practices", "按钮缺少 hover 状态")),
+    ]
+    assert len(merge_qa_reports(reports).issues) == 2
+    assert len(merge_qa_reports(reports, match_category=False).issues) == 1
+
+
+def test_any_failed_reviewer_fails_merged_report():
+    merged = merge_qa_reports([_report(), _report(passed=False)])
+    assert merged.score == 100
+    assert not merged.passed
+
+
+def _reviewer(scope: str, issue: QAIssue | None = None, fail: bool = False):
+    """只产出两段增量文本与最终报告的桩 Reviewer"""
+    report = _report(*([issue] if issue else []))
+    chunks = [SimpleNamespace(event="RunContent", content=f"{scope}-{i}") for i in range(2)]
+
+    def run(message, **kwargs):
+        yield from chunks
+        if fail:
+            raise RuntimeError("模型请求失败")
+        yield RunResponse(content=report.model_dump_json())
+
+    async def arun(message, **kwargs):
+        for chunk in run(message, **kwargs):
+            await asyncio.sleep(0)
+            yield chunk
+
+    return SimpleNamespace(name=f"QAReviewer[{scope}]", run=run, arun=arun, _review_scope=scope)
+
+
+def test_stream_parallel_qa_forwards_every_reviewer_event():
+    reviewers = [_reviewer("ui-ux"), _reviewer("performance", fail=True)]
+    events = list(stream_parallel_qa(reviewers, "审查"))
+    by_scope = {}
+    for agent, item in events:
+        by_scope.setdefault(reviewer_scope(agent), []).append(item)
+    assert [c.content for c in by_scope["ui-ux"][:2]] == ["ui-ux-0", "ui-ux-1"]
+    assert isinstance(by_scope["ui-ux"][-1], RunResponse)
+    assert isinstance(by_scope["performance"][-1], RuntimeError)
+
+
+def test_async_parallel_qa_streams_and_merges():
+    issue = _issue("warning", "ui-ux", "按钮缺少 hover 状态")
+    reviewers = [_reviewer("ui-ux", issue), _reviewer("accessibility", issue), _reviewer("performance", fail=True)]
+
+    async def main():
+        events = [item async for _, item in astream_parallel_qa(reviewers, "审查")]
+        report = await arun_parallel_qa(reviewers, "审查", match_category=False)
+        return events, report
+
+    events, report = asyncio.run(main())
+    assert sum(1 for e in events if getattr(e, "event", None) == "RunContent") == 6
+    assert len(report.issues) == 1
@@ -0,0 +1,152 @@
+"""自适应限流：令牌桶、AIMD 窗口、Retry-After 退避与流式响应的名额归还"""
+import asyncio
+import gc
+import json
+import time
+
+import httpx
+import pytest
+
+from agents.ratelimit import (
+    AsyncRateLimitedTransport,
+    RateLimitedTransport,
+    TokenBucket,
+    parse_retry_after,
+    rate_limiters,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_limiters():
+    rate_limiters.reset()
+    yield
+    rate_limiters.reset()
+
+
+def _body(model: str = "m") -> bytes:
+    return json.dumps({"model": model, "messages": [{"role": "user", "content": "hi"}]}).encode()
+
+
+def _limiter(model: str = "m"):
+    return rate_limiters.get("upstream", "key", model)
+
+
+class _Chunks(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """逐块产出的流式响应体，模拟 SSE"""
+
+    def __iter__(self):
+        for i in range(3):
+            yield f"data: {i}\n\n".encode()
+
+    async def __aiter__(self):
+        for i in range(3):
+            yield f"data: {i}\n\n".encode()
+
+
+def _streaming_client() -> httpx.Client:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=_Chunks()))
+    return httpx.Client(transport=RateLimitedTransport(transport), base_url="http://upstream",
+                        headers={"authorization": "Bearer key"})
+
+
+def test_token_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(per_minute=60, burst_seconds=2)
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    # 透支的请求按预约顺序排队
+    assert bucket.reserve(1) == pytest.approx(2.0, abs=0.05)
+
+
+def test_429_halves_window_once_per_round():
+    responses = iter([429, 429])
+    transport = httpx.MockTransport(lambda request: httpx.Response(next(responses), headers={"retry-after": "0"}))
+    limiter = _limiter()
+    start = limiter.limit
+    grants = [limiter.acquire(), limiter.acquire()]
+    # 同一轮发出的两个请求都被 429，只缩小一次
+    for grant in grants:
+        limiter.on_throttled(grant, 0.0, "429")
+        limiter.release(grant)
+    assert limiter.limit == start / 2
+
+    with httpx.Client(transport=RateLimitedTransport(transport), base_url="http://upstream",
+                      headers={"authorization": "Bearer key"}) as client:
+        assert client.post("/v1/chat/completions", content=_body()).status_code == 429
+    assert limiter.limit == start / 4
+    assert limiter.in_flight == 0
+
+
+def test_success_grows_window_additively():
+    limiter = _limiter()
+    limiter.on_throttled(limiter.acquire(), 0.0, "overload")
+    halved = limiter.limit
+    grant = limiter.acquire()
+    limiter.on_success(grant, 0.1)
+    limiter.release(grant)
+    assert limiter.limit == pytest.approx(halved + 1 / halved)
+
+
+def test_retry_after_pauses_the_group():
+    transport = httpx.MockTransport(lambda request: httpx.Response(429, headers={"retry-after": "2"}))
+    with httpx.Client(transport=RateLimitedTransport(transport), base_url="http://upstream",
+                      headers={"authorization": "Bearer key"}) as client:
+        client.post("/v1/chat/completions", content=_body())
+    paused_for = _limiter().snapshot()["paused_for"]
+    assert 1.5 < paused_for <= 2
+
+
+def test_parse_retry_after_formats():
+    assert parse_retry_after(httpx.Headers({"retry-after-ms": "1500"})) == 1.5
+    assert parse_retry_after(httpx.Headers({"retry-after": "3"})) == 3.0
+    date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))
+    assert 25 < parse_retry_after(httpx.Headers({"retry-after": date})) <= 30
+    assert parse_retry_after(httpx.Headers({})) is None
+
+
+def test_stream_releases_after_full_read():
+    with _streaming_client() as client:
+        with client.stream("POST", "/v1/chat/completions", content=_body()) as response:
+            assert _limiter().in_flight == 1
+            assert len(list(response.iter_bytes())) >= 1
+            assert _limiter().in_flight == 0
+    assert _limiter().in_flight == 0
+
+
+def test_stream_releases_when_closed_early():
+    with _streaming_client() as client:
+        with client.stream("POST", "/v1/chat/completions", content=_body()) as response:
+            next(response.iter_bytes())
+        assert _limiter().in_flight == 0
+
+
+def test_abandoned_stream_releases_on_gc():
+    with _streaming_client() as client:
+        # 读了一部分后提前 break，且从未关闭响应
+        response = client.send(client.build_request("POST", "/v1/chat/completions", content=_body()), stream=True)
+        chunks = response.iter_bytes()
+        next(chunks)
+        assert _limiter().in_flight == 1
+        del chunks, response
+        gc.collect()
+        assert _limiter().in_flight == 0
+
+        # 一次都没有读取就被丢弃（如输掉的对冲请求）
+        response = client.send(client.build_request("POST", "/v1/chat/completions", content=_body()), stream=True)
+        assert _limiter().in_flight == 1
+        del response
+        gc.collect()
+        assert _limiter().in_flight == 0
+
+
+def test_async_stream_releases_when_closed_early():
+    async def main():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=_Chunks()))
+        async with httpx.AsyncClient(transport=AsyncRateLimitedTransport(transport), base_url="http://upstream",
+                                     headers={"authorization": "Bearer key"}) as client:
+            async with client.stream("POST", "/v1/chat/completions", content=_body()) as response:
+                async for _ in response.aiter_bytes():
+                    break
+            assert _limiter().in_flight == 0
+
+    asyncio.run(main())
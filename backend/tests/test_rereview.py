@@ -0,0 +1,41 @@
+"""修复轮之间的增量复审：路径归一化与复审失败时的问题沿用"""
+from agents.manifest import ManifestDiff, normalize_path
+from agents.workflow import WebBuilderWorkflow, _Rereview
+from models.schemas import QAIssue, QAReport
+
+
+def _issue(file_path: str, severity: str = "critical") -> QAIssue:
+    return QAIssue(
+        severity=severity, category="react-practices", file_path=file_path,
+        description=f"{file_path} 有问题", suggestion="",
+    )
+
+
+def test_normalize_path(tmp_path):
+    workdir = tmp_path / "run"
+    assert normalize_path("./src/App.tsx", workdir) == "src/App.tsx"
+    assert normalize_path(f"{workdir}/src/App.tsx", workdir) == "src/App.tsx"
+    assert normalize_path(" src/App.tsx ", workdir) == "src/App.tsx"
+    assert normalize_path(".eslintrc.cjs", workdir) == ".eslintrc.cjs"
+
+
+def test_unreviewable_changes_keep_previous_issues(tmp_path):
+    report = QAReport(passed=False, score=70, summary="", issues=[
+        _issue("./public/logo.svg"), _issue("src/App.tsx", "warning"),
+    ])
+    diff = ManifestDiff(modified=["public/logo.svg"])
+    workflow = WebBuilderWorkflow.__new__(WebBuilderWorkflow)
+    rereview = workflow._prepare_rereview(report, diff, str(tmp_path), {})
+    assert rereview.agent is None
+    merged = WebBuilderWorkflow._finish_rereview(rereview, None)
+    assert {i.file_path for i in merged.issues} == {"./public/logo.svg", "src/App.tsx"}
+    assert not merged.passed
+
+
+def test_failed_rereview_keeps_previous_issues():
+    rereview = _Rereview(
+        changed=["src/App.tsx"], carried=[], previous=[_issue("./src/App.tsx")],
+    )
+    merged = WebBuilderWorkflow._finish_rereview(rereview, None)
+    assert [i.file_path for i in merged.issues] == ["./src/App.tsx"]
+    assert not merged.passed
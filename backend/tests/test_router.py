@@ -0,0 +1,70 @@
+"""延迟感知路由：两个桩服务之间的选路、失败切换与对冲"""
+import socket
+import time
+
+import pytest
+from agno.agent import Agent
+
+from agents.llm import InstrumentedOpenAILike
+from agents.router import ModelHealthTracker, RouterModel, _health_key
+from bench.mock_server import MockOpenAIServer
+from bench.trajectories import MockProfile
+
+
+def _candidate(base_url: str, model_id: str = "bench-model") -> InstrumentedOpenAILike:
+    return InstrumentedOpenAILike(id=model_id, api_key="test", base_url=base_url, max_retries=0)
+
+
+def _run(router: RouterModel) -> str:
+    return Agent(model=router, system_message="你是网页开发助手").run("做一个菜单网页").content
+
+
+@pytest.fixture
+def servers():
+    slow = MockOpenAIServer(MockProfile(latency=0.4)).start()
+    fast = MockOpenAIServer(MockProfile(latency=0.02)).start()
+    yield slow, fast
+    slow.stop()
+    fast.stop()
+
+
+def _dead_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def test_routes_to_faster_endpoint(servers):
+    slow, fast = servers
+    router = RouterModel(candidates=[_candidate(slow.base_url), _candidate(fast.base_url)],
+                         tracker=ModelHealthTracker())
+    # 前两次各试探一个没有样本的候选，之后按延迟选路
+    for _ in range(4):
+        assert _run(router)
+    assert slow.stats()["requests"] == 1
+    assert fast.stats()["requests"] == 3
+
+
+def test_fails_over_to_next_endpoint(servers):
+    _, fast = servers
+    dead = _candidate(_dead_url())
+    tracker = ModelHealthTracker()
+    router = RouterModel(candidates=[dead, _candidate(fast.base_url)], tracker=tracker)
+    assert _run(router)
+    assert fast.stats()["requests"] == 1
+    assert tracker.snapshot()[_health_key(dead)]["error_rate"] == 1.0
+
+
+def test_hedge_returns_faster_backup_and_drops_late_sample(servers):
+    slow, fast = servers
+    primary = _candidate(slow.base_url)
+    tracker = ModelHealthTracker()
+    router = RouterModel(candidates=[primary, _candidate(fast.base_url)], hedge_after=0.1, tracker=tracker)
+    started = time.perf_counter()
+    assert _run(router)
+    assert time.perf_counter() - started < 0.35
+    assert slow.stats()["requests"] == fast.stats()["requests"] == 1
+    # 等落败的主请求在后台完成：它的延迟不计入统计
+    time.sleep(0.5)
+    assert _health_key(primary) not in tracker.snapshot()
@@ -0,0 +1,32 @@
+"""项目脚手架：使用说明只随对应脚手架注入，不复制到 workdir"""
+from agents import scaffold
+from agents.developer import build_user_message
+
+MAIN_HINT = "src/main.tsx 会渲染 src/App.tsx"
+
+
+def test_builtin_scaffold_notes_are_injected_not_copied(tmp_path):
+    skill = {"name": "菜单", "scaffold": "vite-react-tailwind"}
+    files = scaffold.apply_scaffold(skill, tmp_path)
+    assert "src/main.tsx" in files
+    assert scaffold.SCAFFOLD_NOTES_FILE not in files
+    assert not (tmp_path / scaffold.SCAFFOLD_NOTES_FILE).exists()
+    assert MAIN_HINT in build_user_message(skill, "", "r1", str(tmp_path), files)
+
+
+def test_other_scaffold_gets_only_its_own_notes(tmp_path, monkeypatch):
+    root = tmp_path / "scaffolds"
+    (root / "plain-html-notes-test").mkdir(parents=True)
+    (root / "plain-html-notes-test" / "index.html").write_text("<html></html>", encoding="utf-8")
+    monkeypatch.setattr(scaffold, "SCAFFOLDS_DIR", root)
+    skill = {"name": "静态页", "scaffold": "plain-html-notes-test"}
+    files = scaffold.apply_scaffold(skill, tmp_path / "work")
+    message = build_user_message(skill, "", "r1", str(tmp_path / "work"), files)
+    assert "<EXISTING_FILES>" in message and "- index.html" in message
+    assert MAIN_HINT not in message
+
+
+def test_no_existing_files_block_without_scaffold():
+    message = build_user_message({"name": "菜单", "scaffold": "none"}, "", "r1", "/tmp/w", [])
+    assert "<EXISTING_FILES>" not in message
+    assert MAIN_HINT not in message
@@ -0,0 +1,58 @@
+"""并发调度器：主动取消返回结果，外部取消继续向上传播"""
+import asyncio
+from types import SimpleNamespace
+
+from agents.scheduler import WorkflowScheduler
+
+
+def _hanging_workflow(job):
+    async def arun(**kwargs):
+        await asyncio.sleep(3600)
+        yield  # pragma: no cover - 只为构成异步生成器
+
+    return SimpleNamespace(arun=arun)
+
+
+def test_scheduler_cancel_returns_cancelled_result():
+    async def main():
+        scheduler = WorkflowScheduler(max_concurrency=2, workflow_factory=_hanging_workflow)
+        run_id = scheduler.submit("restaurant-menu")
+        await asyncio.sleep(0.05)
+        assert scheduler.cancel(run_id)
+        result = await scheduler.wait(run_id)
+        assert not scheduler._tasks[run_id].cancelled()
+        return result
+
+    result = asyncio.run(main())
+    assert result.status == "cancelled"
+    assert result.duration > 0
+
+
+def test_external_cancel_propagates_and_keeps_result():
+    async def main():
+        scheduler = WorkflowScheduler(max_concurrency=2, workflow_factory=_hanging_workflow)
+        run_id = scheduler.submit("restaurant-menu")
+        await asyncio.sleep(0.05)
+        task = scheduler._tasks[run_id]
+        task.cancel()
+        await asyncio.wait([task])
+        assert task.cancelled()
+        return await scheduler.wait(run_id)
+
+    result = asyncio.run(main())
+    assert result.status == "cancelled"
+    assert result.duration > 0
+
+
+def test_cancel_before_start():
+    async def main():
+        scheduler = WorkflowScheduler(max_concurrency=1, workflow_factory=_hanging_workflow)
+        first = scheduler.submit("restaurant-menu")
+        queued = scheduler.submit("restaurant-menu")
+        await asyncio.sleep(0.05)
+        assert scheduler.cancel(queued)
+        scheduler.cancel(first)
+        return await scheduler.join()
+
+    results = asyncio.run(main())
+    assert [r.status for r in results] == ["cancelled", "cancelled"]
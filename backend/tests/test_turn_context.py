@@ -0,0 +1,50 @@
+"""每轮附加上下文：只进入本轮请求，system_message 与历史保持稳定"""
+import itertools
+
+import pytest
+from agno.agent import Agent
+from agno.db.in_memory import InMemoryDb
+from agno.models.openai.chat import OpenAIChat
+
+from agents.llm import InstrumentedOpenAILike
+from bench.mock_server import MockOpenAIServer
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """记录每次请求实际发给模型的消息"""
+    requests = []
+    original = OpenAIChat.invoke
+
+    def invoke(self, *args, **kwargs):
+        requests.append([(m.role, m.content) for m in kwargs["messages"]])
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(OpenAIChat, "invoke", invoke)
+    return requests
+
+
+def test_two_turns_share_system_message_and_history(sent):
+    counter = itertools.count(1)
+    with MockOpenAIServer() as server:
+        model = InstrumentedOpenAILike(
+            id="bench-model", api_key="test", base_url=server.base_url,
+            turn_context=lambda text: f"\n\n<RUNTIME_CONTEXT>第 {next(counter)} 轮</RUNTIME_CONTEXT>",
+        )
+        agent = Agent(
+            model=model, system_message="你是网页开发助手", db=InMemoryDb(),
+            session_id="turns", add_history_to_context=True,
+        )
+        first = agent.run("做一个菜单网页")
+        agent.run("把标题改成红色")
+
+    assert len(sent) == 2
+    turn1, turn2 = sent
+    assert turn1[0] == turn2[0] == ("system", "你是网页开发助手")
+    # 第一轮的用户消息在第二轮作为历史原样出现，不带当时的附加上下文
+    assert turn1[1] == ("user", "做一个菜单网页\n\n<RUNTIME_CONTEXT>第 1 轮</RUNTIME_CONTEXT>")
+    assert turn2[1] == ("user", "做一个菜单网页")
+    assert turn2[-1] == ("user", "把标题改成红色\n\n<RUNTIME_CONTEXT>第 2 轮</RUNTIME_CONTEXT>")
+    # 会话中保存的输入不含附加上下文
+    assert first.input.input_content == "做一个菜单网页"
+    assert all("RUNTIME_CONTEXT" not in (m.content or "") for m in first.messages)
@@ -0,0 +1,71 @@
+"""工作目录配额回收"""
+import os
+from types import SimpleNamespace
+
+from agents import workspace
+from agents.pool import AgentPool
+from agents.workspace import WorkspaceManager
+
+
+def _make_run(root, run_id: str, size: int):
+    workdir = root / run_id
+    (workdir / "src").mkdir(parents=True)
+    (workdir / "src" / "main.tsx").write_bytes(b"x" * size)
+    (workdir / "node_modules" / "react").mkdir(parents=True)
+    (workdir / "node_modules" / "react" / "index.js").write_bytes(b"y" * 10 * size)
+    return workdir
+
+
+def test_quota_ignores_node_modules_and_archives_oldest(tmp_path, monkeypatch):
+    monkeypatch.setattr(WorkspaceManager, "_delivered", staticmethod(lambda run_id: True))
+    manager = WorkspaceManager(tmp_path / "ws", tmp_path / "archive", max_bytes=1500, max_age=1e9)
+    old = _make_run(manager.workspace_dir, "old", 1000)
+    _make_run(manager.workspace_dir, "new", 1000)
+    os.utime(old / "src" / "main.tsx", (1, 1))
+    os.utime(old / "src", (1, 1))
+    os.utime(old, (1, 1))
+
+    runs = {r.run_id: r for r in manager.list_runs()}
+    assert runs["old"].size == 1000
+
+    stats = manager.enforce_quota()
+    assert sorted(stats["stripped"]) == ["new", "old"]
+    assert stats["archived"] == ["old"]
+    assert stats["total_bytes"] == 1000
+    assert [p.name for p in manager.workspace_dir.iterdir()] == ["new"]
+    assert manager.archive_path("old").exists()
+
+
+def test_background_gc_does_not_block(tmp_path, monkeypatch):
+    started = []
+    monkeypatch.setattr(WorkspaceManager, "enforce_quota", lambda self, protect=None: started.append(protect) or {
+        "stripped": [], "archived": [], "total_bytes": 0,
+    })
+    manager = WorkspaceManager(tmp_path / "ws", tmp_path / "archive")
+    assert manager.start_background_gc(protect={"run"})
+    workspace._gc_thread.join(timeout=5)
+    assert started == [{"run"}]
+
+
+def test_resume_restores_archived_workdir(tmp_path, monkeypatch):
+    from agents import checkpoint, workflow
+    from agents.checkpoint import WorkflowCheckpoint, save_checkpoint
+
+    monkeypatch.setattr(workflow, "WORKSPACE_DIR", tmp_path / "ws")
+    monkeypatch.setattr(workspace, "ARCHIVE_DIR", tmp_path / "archive")
+    monkeypatch.setattr(checkpoint, "CHECKPOINT_DIR", tmp_path / "checkpoints")
+    monkeypatch.setattr(workflow, "agent_pool", AgentPool(max_idle=0))
+    monkeypatch.setattr(workflow, "create_developer_agent", lambda workdir: SimpleNamespace())
+    monkeypatch.setattr(workflow, "create_qa_agent", lambda workdir: SimpleNamespace())
+    save_checkpoint(WorkflowCheckpoint(run_id="stale", skill_id="restaurant-menu", phase="qa"))
+    workdir = _make_run(tmp_path / "ws", "stale", 10)
+    # 超过年龄配额的未交付运行被归档
+    manager = WorkspaceManager(tmp_path / "ws", max_age=0)
+    assert manager.enforce_quota()["archived"] == ["stale"]
+    assert not workdir.exists()
+
+    flow = workflow.WebBuilderWorkflow(session_id="resume")
+    run_id, path, _, restored = flow._prepare("restaurant-menu", "stale", "", resume=True)
+    flow._release_agents()
+    assert restored.reached("qa")
+    assert (workdir / "src" / "main.tsx").read_bytes() == b"x" * 10